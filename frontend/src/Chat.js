@@ -39,50 +39,88 @@ const Chat = () => {
 
   /* ================= AUTO SCROLL ================= */
   useEffect(() => {
-    if (!botTyping && chatRef.current) {
+    // Follow streamed tokens as well as finished messages
+    if (chatRef.current) {
       chatRef.current.scrollTop = chatRef.current.scrollHeight;
     }
   }, [chatHistory, botTyping]);
 
-  /* ================= BOT MESSAGE ================= */
-  const addBotMessage = (message, options = []) => {
+  const addUserMessage = (m) =>
+    setChatHistory((p) => [...p, { sender: "user", message: m }]);
+
+  /* ================= STREAMED BOT MESSAGE ================= */
+  // Reads Server-Sent Events from /chat/stream and appends each token to the
+  // last bot message as it arrives.
+  const setLastBotMessage = (update) =>
+    setChatHistory((p) => {
+      const copy = [...p];
+      const last = copy[copy.length - 1];
+      copy[copy.length - 1] = { ...last, message: update(last.message) };
+      return copy;
+    });
+
+  const streamBotMessage = async (query) => {
     setBotTyping(true);
-    let i = 0;
-    const msg = { sender: "bot", message: "", options };
-    setChatHistory((p) => [...p, msg]);
-
-    const interval = setInterval(() => {
-      i++;
-      setChatHistory((p) => {
-        const copy = [...p];
-        copy[copy.length - 1].message = message.slice(0, i);
-        return copy;
+    setChatHistory((p) => [...p, { sender: "bot", message: "", options: [] }]);
+
+    try {
+      const res = await fetch("http://localhost:8000/chat/stream", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({
+          query,
+          profile: {},  // Empty profile - intent-driven mode
+          session_id: sessionId,  // Session ID for context tracking
+        }),
       });
-      if (i >= message.length) {
-        clearInterval(interval);
-        setBotTyping(false);
+      if (!res.ok || !res.body) throw new Error(`HTTP ${res.status}`);
+
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+
+      for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        // Events are separated by a blank line
+        let sep;
+        while ((sep = buffer.indexOf("\n\n")) !== -1) {
+          const raw = buffer.slice(0, sep);
+          buffer = buffer.slice(sep + 2);
+
+          let event = "message";
+          let data = "";
+          raw.split("\n").forEach((line) => {
+            if (line.startsWith("event:")) event = line.slice(6).trim();
+            else if (line.startsWith("data:")) data += line.slice(5).trim();
+          });
+          const payload = data ? JSON.parse(data) : {};
+
+          if (event === "token") {
+            setLastBotMessage((m) => m + payload.text);
+          } else if (event === "reset") {
+            setLastBotMessage(() => "");
+          } else if (event === "final") {
+            // Authoritative answer (also covers cached / calculator replies)
+            setLastBotMessage(() => payload.answer);
+          }
+        }
       }
-    }, 18);
+    } catch {
+      setLastBotMessage(() => "Unable to reach the server right now.");
+    }
+    setBotTyping(false);
   };
 
-  const addUserMessage = (m) =>
-    setChatHistory((p) => [...p, { sender: "user", message: m }]);
-
   /* ================= CHAT FLOW ================= */
   const sendQuery = async () => {
     if (!userInput || botTyping) return;
-    addUserMessage(userInput);
-    try {
-      const res = await axios.post("http://localhost:8000/chat", {
-        query: userInput,
-        profile: {},  // Empty profile - intent-driven mode
-        session_id: sessionId,  // Session ID for context tracking
-      });
-      addBotMessage(res.data.answer);
-    } catch {
-      addBotMessage("Unable to reach the server right now.");
-    }
+    const query = userInput;
+    addUserMessage(query);
     setUserInput("");
+    await streamBotMessage(query);
   };
 
   const handleOptionClick = async (opt) => {
@@ -90,16 +128,7 @@ const Chat = () => {
     addUserMessage(opt);
 
     // Treat option clicks as queries
-    try {
-      const res = await axios.post("http://localhost:8000/chat", {
-        query: opt,
-        profile: {},
-        session_id: sessionId,  // Session ID for context tracking
-      });
-      addBotMessage(res.data.answer);
-    } catch {
-      addBotMessage("Unable to reach the server right now.");
-    }
+    await streamBotMessage(opt);
   };
 
   /* ================= GOAL APIs ================= */
@@ -0,0 +1,338 @@
+"""
+AMFI mutual fund NAVs as an in-memory table.
+
+AMFI publishes every scheme's NAV once a day (after ~9 PM IST) in
+NAVAll.txt. Instead of downloading and scanning that file per lookup, it is
+parsed once per publication cycle into a columnar NAVTable:
+
+    codes / names / isin_growth / isin_reinvest / dates / fund_houses /
+    categories    lists, one entry per scheme
+    navs          float64 array (NaN where AMFI has "N.A.")
+    by_code       scheme code -> row
+    by_isin       ISIN (growth / payout and reinvestment) -> row
+    index         SchemeIndex for fuzzy, ranked name search
+
+NAVStore holds the current table and swaps in a new one atomically. A table
+is fresh while its latest NAV date is the one AMFI should have published by
+now (the last business day as of AMFI_REFRESH_AT, IST), not merely because it
+was downloaded recently: a download made before AMFI publishes still holds
+the previous day's NAVs. A daemon thread refreshes the table after each
+publication and retries every AMFI_RETRY_SECONDS until the download fails no
+more and the NAV date advances, so lookups never touch the network once the
+first table is loaded. The
+downloaded file is also kept in the persistent realtime cache, so a restarted
+(or additional) worker builds its table from disk instead of downloading it.
+"""
+
+import os
+import re
+import time
+import logging
+import threading
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+import numpy as np
+from dateutil import tz
+
+from src.scheme_search import SchemeIndex
+
+AMFI_NAV_URL = os.getenv("AMFI_NAV_URL", "https://www.amfiindia.com/spages/NAVAll.txt")
+AMFI_REFRESH_AT = os.getenv("AMFI_REFRESH_AT", "21:30")  # IST, after the daily NAV publication
+AMFI_RETRY_SECONDS = int(os.getenv("AMFI_RETRY_SECONDS", "900"))
+# Downloads per publication cycle before a stale table is left alone until the
+# next one (weekday market holidays publish no new NAVs at all)
+AMFI_MAX_ATTEMPTS = int(os.getenv("AMFI_MAX_ATTEMPTS", "8"))
+AMFI_BACKGROUND_REFRESH = os.getenv("AMFI_BACKGROUND_REFRESH", "1") == "1"
+AMFI_RETENTION = 7 * 24 * 3600  # keep the last downloaded file this long in the persistent cache
+STORE_KEY = "NAVAll.txt"
+
+IST = tz.gettz("Asia/Kolkata")
+ISIN_RE = re.compile(r"^IN[A-Z0-9]{10}$", re.IGNORECASE)
+
+log = logging.getLogger(__name__)
+
+
+# -----------------------------
+# Table
+# -----------------------------
+class NAVTable:
+    def __init__(self):
+        self.codes = []
+        self.names = []
+        self.isin_growth = []
+        self.isin_reinvest = []
+        self.dates = []
+        self.fund_houses = []
+        self.categories = []
+        self.navs = np.empty(0, dtype=np.float64)
+        self.by_code = {}
+        self.by_isin = {}
+        self.index: Optional[SchemeIndex] = None
+        self.nav_date: Optional[date] = None  # latest NAV date in the file
+        self.loaded_at: Optional[datetime] = None  # when the file was downloaded
+
+    def __len__(self):
+        return len(self.codes)
+
+    def row(self, i: int) -> dict:
+        nav = float(self.navs[i])
+        return {
+            "scheme_code": self.codes[i],
+            "scheme_name": self.names[i],
+            "isin": self.isin_growth[i] or self.isin_reinvest[i] or None,
+            "nav": None if np.isnan(nav) else nav,
+            "date": self.dates[i],
+            "fund_house": self.fund_houses[i],
+            "category": self.categories[i],
+        }
+
+    def find(self, identifier: str) -> Optional[int]:
+        """Row for a scheme code or ISIN (hash lookups), else the best-matching scheme name."""
+        key = identifier.strip()
+        row = self.by_code.get(key)
+        if row is None:
+            row = self.by_isin.get(key.upper())
+        if row is not None or not key:
+            return row
+        return self.index.best(key)
+
+    def search(self, query: str, n: int = 5) -> list:
+        """Top-n scheme rows for a name query, best first, each with its match score."""
+        ids, scores = self.index.top(query, n)
+        return [{**self.row(i), "score": round(float(score), 3)} for i, score in zip(ids, scores)]
+
+
+def _parse_date(value: str) -> Optional[date]:
+    try:
+        return datetime.strptime(value, "%d-%b-%Y").date()
+    except ValueError:
+        return None
+
+
+def _parse_nav(value: str) -> float:
+    try:
+        return float(value.replace(",", ""))
+    except ValueError:
+        return float("nan")  # "N.A." and similar
+
+
+def parse_nav_file(text: str) -> NAVTable:
+    """
+    Parse NAVAll.txt. Scheme rows look like
+        code;ISIN growth/payout;ISIN reinvestment;name;NAV;date
+    and are preceded by category ("Open Ended Schemes(...)") and fund house lines.
+    """
+    table = NAVTable()
+    navs = []
+    category = fund_house = None
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        parts = line.split(";")
+        if len(parts) < 6:
+            if "Schemes(" in line or line.endswith("Schemes"):
+                category = line
+            else:
+                fund_house = line
+            continue
+        code = parts[0].strip()
+        if not code.isdigit():
+            continue  # header row
+        isin_growth = parts[1].strip() if parts[1].strip() not in ("", "-") else ""
+        isin_reinvest = parts[2].strip() if parts[2].strip() not in ("", "-") else ""
+        row = len(table.codes)
+        table.codes.append(code)
+        table.names.append(parts[3].strip())
+        table.isin_growth.append(isin_growth)
+        table.isin_reinvest.append(isin_reinvest)
+        table.dates.append(parts[5].strip())
+        table.fund_houses.append(fund_house)
+        table.categories.append(category)
+        navs.append(_parse_nav(parts[4].strip()))
+        table.by_code.setdefault(code, row)
+        for isin in (isin_growth, isin_reinvest):
+            if isin:
+                table.by_isin.setdefault(isin.upper(), row)
+    table.navs = np.asarray(navs, dtype=np.float64)
+    table.index = SchemeIndex.build(table.names)
+    dates = [d for d in map(_parse_date, set(table.dates)) if d is not None]
+    table.nav_date = max(dates) if dates else None
+    table.loaded_at = datetime.now(tz=IST)
+    return table
+
+
+# -----------------------------
+# Store + background refresh
+# -----------------------------
+def last_publication(now: datetime) -> datetime:
+    """Most recent AMFI_REFRESH_AT (IST) at or before `now`."""
+    hour, minute = (int(x) for x in AMFI_REFRESH_AT.split(":"))
+    now = now.astimezone(IST)
+    cutoff = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    return cutoff if cutoff <= now else cutoff - timedelta(days=1)
+
+
+def expected_nav_date(now: datetime) -> date:
+    """NAV date AMFI should have published by `now`: the last weekday up to the last publication."""
+    day = last_publication(now).date()
+    while day.weekday() >= 5:  # no NAVs for Saturday / Sunday
+        day -= timedelta(days=1)
+    return day
+
+
+class NAVStore:
+    def __init__(self, session, url=AMFI_NAV_URL, store=None):
+        self.session = session
+        self.url = url
+        self.store = store  # get(key) -> (value, fetched_at) | None, put(key, value, fetched_at)
+        self.loaded_from: Optional[str] = None
+        self.table: Optional[NAVTable] = None
+        self.refreshes = 0
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._attempted_at = float("-inf")  # last download that failed or brought no new NAVs
+        self._cycle: Optional[datetime] = None  # publication the attempts below were made for
+        self._cycle_attempts = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def refresh(self) -> NAVTable:
+        resp = self.session.get(self.url, timeout=30)
+        resp.raise_for_status()
+        table = parse_nav_file(resp.text)
+        if not len(table):
+            raise ValueError("AMFI NAV file had no scheme rows")
+        self.table = table  # readers keep whichever table they already hold
+        self.loaded_from = "network"
+        self.refreshes += 1
+        if self.store is not None:
+            self.store.put(STORE_KEY, {"text": resp.text}, time.time())
+        self.last_error = None
+        log.info("AMFI NAV table loaded: %d schemes", len(table))
+        return table
+
+    def _from_store(self, newer_than: Optional[datetime] = None) -> Optional[NAVTable]:
+        """Table from the last file any worker downloaded (if newer), stamped with its download time."""
+        entry = self.store.get(STORE_KEY) if self.store is not None else None
+        if entry is None:
+            return None
+        value, fetched_at = entry
+        if newer_than is not None and fetched_at <= newer_than.timestamp():
+            return None
+        table = parse_nav_file(value["text"])
+        if not len(table):
+            return None
+        table.loaded_at = datetime.fromtimestamp(fetched_at, tz=IST)
+        self.loaded_from = "store"
+        log.info("AMFI NAV table loaded from the realtime cache: %d schemes", len(table))
+        return table
+
+    def _stale(self, table: NAVTable) -> bool:
+        now = datetime.now(tz=IST)
+        if table.nav_date is None:
+            return table.loaded_at < last_publication(now)
+        return table.nav_date < expected_nav_date(now)
+
+    def _attempts_exhausted(self) -> bool:
+        """True once this publication cycle has used up AMFI_MAX_ATTEMPTS downloads."""
+        return (self._cycle == last_publication(datetime.now(tz=IST))
+                and self._cycle_attempts >= AMFI_MAX_ATTEMPTS)
+
+    def _count_attempt(self):
+        cycle = last_publication(datetime.now(tz=IST))
+        if cycle != self._cycle:
+            self._cycle, self._cycle_attempts = cycle, 0
+        self._cycle_attempts += 1
+
+    def freshness(self, table: NAVTable) -> dict:
+        """Same shape as SWRCache's "freshness" metadata, plus the NAV date it is judged by."""
+        age = (datetime.now(tz=IST) - table.loaded_at).total_seconds()
+        return {
+            "state": "stale" if self._stale(table) else "fresh",
+            "age_seconds": round(age, 1),
+            "fetched_at": table.loaded_at.isoformat(),
+            "nav_date": table.nav_date.isoformat() if table.nav_date is not None else None,
+        }
+
+    def get(self) -> NAVTable:
+        """
+        Current table. Only the very first lookup waits for a download; after
+        that a stale table is served while the background thread refreshes it
+        (without the thread, a stale table is refreshed in-line at most once
+        per AMFI_RETRY_SECONDS, including when AMFI has not published yet).
+        After AMFI_MAX_ATTEMPTS downloads in one publication cycle the stale
+        table is served as-is until the next publication.
+        """
+        table = self.table
+        if table is not None and (self._thread is not None or not self._stale(table)):
+            return table
+        return self._load(wait_for_refresh=self._thread is None)
+
+    def _load(self, wait_for_refresh=True) -> NAVTable:
+        with self._lock:
+            table = self.table
+            if table is None or self._stale(table):
+                # another worker (or this one before a restart) may already have the file
+                cached = self._from_store(newer_than=table.loaded_at if table is not None else None)
+                if cached is not None:
+                    table = self.table = cached
+            if table is not None and (not self._stale(table) or not wait_for_refresh):
+                return table  # fresh, or stale but the background thread will refresh it
+            if table is not None and time.monotonic() - self._attempted_at < AMFI_RETRY_SECONDS:
+                return table  # the last attempt failed or found no new NAVs recently
+            if table is not None and self._attempts_exhausted():
+                return table  # nothing new all cycle (e.g. a market holiday): wait for the next one
+            self._count_attempt()
+            try:
+                table = self.refresh()
+                self._attempted_at = time.monotonic() if self._stale(table) else float("-inf")
+                return table
+            except Exception as e:
+                self._attempted_at = time.monotonic()
+                self.last_error = f"{type(e).__name__}: {e}"
+                if table is None:
+                    raise
+                log.warning("AMFI NAV refresh failed, serving previous table: %s", e)
+                return table
+
+    def start(self):
+        """Start the daemon thread that loads the table and refreshes it after each publication."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="amfi-nav-refresh", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                table = self.table
+                if table is None or self._stale(table):
+                    self._attempted_at = float("-inf")  # the thread paces its own retries
+                    table = self._load()
+                if self._stale(table):
+                    if not self._attempts_exhausted():
+                        raise RuntimeError(self.last_error or f"AMFI has not published NAVs after {table.nav_date}")
+                    log.warning("AMFI NAVs still stale after %d attempts; serving %s NAVs until the next publication",
+                                self._cycle_attempts, table.nav_date)
+                now = datetime.now(tz=IST)
+                wait = (last_publication(now) + timedelta(days=1) - now).total_seconds()
+            except Exception as e:
+                log.warning("AMFI NAV load failed, retrying in %ss: %s", AMFI_RETRY_SECONDS, e)
+                wait = AMFI_RETRY_SECONDS
+            self._stop.wait(max(wait, 1))
+
+    def stats(self) -> dict:
+        table = self.table
+        return {
+            "schemes": len(table) if table is not None else 0,
+            "loaded_at": table.loaded_at.isoformat() if table is not None else None,
+            "nav_date": table.nav_date.isoformat() if table is not None and table.nav_date else None,
+            "loaded_from": self.loaded_from,
+            "refreshes": self.refreshes,
+            "attempts_this_cycle": self._cycle_attempts if self._cycle == last_publication(datetime.now(tz=IST)) else 0,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,234 @@
+"""
+Pluggable FAISS index types for the knowledge-base index.
+
+build_index.py picks an index type and its parameters, saves them to
+index_config.json next to faiss.index, and Retriever reads them back to set
+query-time knobs (nprobe, efSearch) and build filtered SearchParameters.
+
+Supported types:
+- flat:  exact brute force (IndexFlatL2); the recall reference
+- ivf:   inverted lists over a k-means coarse quantizer; tune nlist / nprobe
+- hnsw:  graph search; tune M / ef_search
+- ivfpq: IVF with product-quantized vectors (m sub-vectors x nbits)
+- sq:    8-bit scalar-quantized flat index
+
+The sweep (python -m src.ann) measures recall@k against flat search and QPS
+for a grid of settings, so each deployment can choose its point on the curve.
+"""
+
+import os
+import json
+import time
+import math
+import argparse
+import faiss
+import numpy as np
+
+from src.index_store import resolve_index_dir
+
+CONFIG_FILE = "index_config.json"
+
+DEFAULT_PARAMS = {
+    "flat": {},
+    "ivf": {"nlist": 64, "nprobe": 8},
+    "hnsw": {"M": 32, "ef_construction": 200, "ef_search": 64},
+    "ivfpq": {"nlist": 64, "nprobe": 8, "m": 16, "nbits": 8},
+    "sq": {"qtype": "QT_8bit"},
+}
+
+# Settings explored by the sweep (merged over DEFAULT_PARAMS)
+SWEEP_GRID = {
+    "flat": [{}],
+    "ivf": [{"nprobe": p} for p in (1, 2, 4, 8, 16, 32)],
+    "hnsw": [{"ef_search": ef} for ef in (16, 32, 64, 128, 256)],
+    "ivfpq": [{"nprobe": p} for p in (4, 8, 16, 32)],
+    "sq": [{}],
+}
+
+
+def resolve_params(kind, params, n_vectors, dim):
+    """
+    Merge params over the defaults for kind and clamp them to what the corpus
+    can support (IVF needs at least nlist training points, PQ needs m | dim
+    and 2**nbits training points).
+    """
+    if kind not in DEFAULT_PARAMS:
+        raise ValueError(f"Unknown index type: {kind} (expected one of {sorted(DEFAULT_PARAMS)})")
+    resolved = {**DEFAULT_PARAMS[kind], **(params or {})}
+
+    if "nlist" in resolved:
+        # k-means wants ~39 training points per centroid
+        resolved["nlist"] = max(1, min(int(resolved["nlist"]), n_vectors // 39))
+        resolved["nprobe"] = max(1, min(int(resolved["nprobe"]), resolved["nlist"]))
+    if kind == "ivfpq":
+        m = int(resolved["m"])
+        while dim % m:
+            m -= 1
+        resolved["m"] = m
+        resolved["nbits"] = max(1, min(int(resolved["nbits"]), int(math.log2(max(n_vectors, 2)))))
+    return resolved
+
+
+def build_ann_index(embeddings, kind="flat", params=None):
+    """Build and train an index of the given type. Returns (index, resolved_params)."""
+    embeddings = np.ascontiguousarray(embeddings, dtype="float32")
+    n, dim = embeddings.shape
+    params = resolve_params(kind, params, n, dim)
+
+    if kind == "flat":
+        index = faiss.IndexFlatL2(dim)
+    elif kind == "ivf":
+        index = faiss.IndexIVFFlat(faiss.IndexFlatL2(dim), dim, params["nlist"])
+    elif kind == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, params["M"])
+        index.hnsw.efConstruction = params["ef_construction"]
+    elif kind == "ivfpq":
+        index = faiss.IndexIVFPQ(faiss.IndexFlatL2(dim), dim, params["nlist"], params["m"], params["nbits"])
+    else:  # sq
+        index = faiss.IndexScalarQuantizer(dim, getattr(faiss.ScalarQuantizer, params["qtype"]))
+
+    if not index.is_trained:
+        index.train(embeddings)
+    index.add(embeddings)
+    apply_search_params(index, kind, params)
+    return index, params
+
+
+def apply_search_params(index, kind, params):
+    """Set index-level query-time knobs used by unfiltered searches."""
+    if "nprobe" in params:
+        faiss.extract_index_ivf(index).nprobe = params["nprobe"]
+    if kind == "hnsw":
+        index.hnsw.efSearch = params["ef_search"]
+
+
+def make_search_params(kind, params, selector=None, exhaustive=False, ef_search=None):
+    """
+    SearchParameters carrying the ID selector plus the type's query-time knobs.
+    exhaustive=True probes every IVF list, for filtered queries whose allowed
+    chunks fall outside the nprobe nearest lists; ef_search overrides the
+    HNSW candidate list size for the same purpose.
+    """
+    if kind in ("ivf", "ivfpq"):
+        nprobe = params["nlist"] if exhaustive else params["nprobe"]
+        return faiss.SearchParametersIVF(sel=selector, nprobe=nprobe)
+    if kind == "hnsw":
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=ef_search or params["ef_search"])
+    return faiss.SearchParameters(sel=selector)
+
+
+def save_index_config(out_dir, kind, params):
+    with open(os.path.join(out_dir, CONFIG_FILE), "w", encoding="utf-8") as f:
+        json.dump({"kind": kind, "params": params}, f, indent=2)
+
+
+def load_index_config(index_dir):
+    """Read index_config.json; indexes built before it existed are flat."""
+    path = os.path.join(index_dir, CONFIG_FILE)
+    if not os.path.exists(path):
+        return {"kind": "flat", "params": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def parse_param_overrides(pairs):
+    """Turn ["nprobe=16", "qtype=QT_4bit"] into {"nprobe": 16, "qtype": "QT_4bit"}."""
+    params = {}
+    for pair in pairs or []:
+        key, _, value = pair.partition("=")
+        params[key] = int(value) if value.lstrip("-").isdigit() else value
+    return params
+
+
+# -----------------------------
+# Recall / QPS sweep
+# -----------------------------
+def load_corpus_embeddings(index_dir):
+    """Raw embeddings of the live index (reconstructed from a flat index if needed)."""
+    live_dir = resolve_index_dir(index_dir)
+    emb_path = os.path.join(live_dir, "embeddings.npy")
+    if os.path.exists(emb_path):
+        return np.load(emb_path)
+    index = faiss.read_index(os.path.join(live_dir, "faiss.index"))
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def measure_qps(index, queries, k, rounds=5):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        index.search(queries, k)
+    elapsed = time.perf_counter() - start
+    return rounds * len(queries) / elapsed if elapsed else float("inf")
+
+
+def sweep(embeddings, queries, k=5, kinds=None, grid=SWEEP_GRID, rounds=5):
+    """
+    Build each index type once and evaluate every grid setting for it.
+
+    Returns a list of {kind, params, recall@k, qps, build_seconds} rows,
+    with recall measured against exact flat search.
+    """
+    queries = np.ascontiguousarray(queries, dtype="float32")
+    k = min(k, len(embeddings))
+    reference = faiss.IndexFlatL2(embeddings.shape[1])
+    reference.add(embeddings)
+    _, truth = reference.search(queries, k)
+
+    rows = []
+    for kind in kinds or list(grid):
+        start = time.perf_counter()
+        index, base_params = build_ann_index(embeddings, kind)
+        build_seconds = time.perf_counter() - start
+
+        for overrides in grid[kind]:
+            params = resolve_params(kind, {**base_params, **overrides}, len(embeddings), embeddings.shape[1])
+            apply_search_params(index, kind, params)
+            _, found = index.search(queries, k)
+            hits = sum(len(set(t) & set(f)) for t, f in zip(truth, found))
+            rows.append({
+                "kind": kind,
+                "params": params,
+                f"recall@{k}": round(hits / truth.size, 4),
+                "qps": round(measure_qps(index, queries, k, rounds), 1),
+                "build_seconds": round(build_seconds, 3),
+            })
+    return rows
+
+
+def main():
+    from src.build_index import INDEX_DIR, MODEL_NAME
+
+    parser = argparse.ArgumentParser(description="Sweep FAISS index types for recall vs QPS.")
+    parser.add_argument("--index-dir", default=INDEX_DIR)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--kinds", nargs="*", choices=list(SWEEP_GRID), default=None)
+    parser.add_argument("--queries", choices=["golden", "corpus"], default="golden",
+                        help="golden: encode benchmark queries; corpus: perturbed corpus vectors (no model needed)")
+    parser.add_argument("--out", default="./benchmarks/results/ann_sweep.json")
+    args = parser.parse_args()
+
+    embeddings = load_corpus_embeddings(args.index_dir)
+    if args.queries == "golden":
+        from sentence_transformers import SentenceTransformer
+        from src.bench_retrieval import load_golden
+        texts = [q["query"] for q in load_golden()]
+        queries = SentenceTransformer(MODEL_NAME).encode(texts).astype("float32")
+    else:
+        rng = np.random.default_rng(0)
+        queries = embeddings + rng.normal(0, embeddings.std() * 0.5, embeddings.shape).astype("float32")
+
+    rows = sweep(embeddings, queries, k=args.k, kinds=args.kinds)
+
+    recall_key = f"recall@{min(args.k, len(embeddings))}"
+    print(f"{'kind':<8}{'params':<52}{recall_key:>10}{'QPS':>12}")
+    for row in rows:
+        print(f"{row['kind']:<8}{json.dumps(row['params']):<52}{row[recall_key]:>10.3f}{row['qps']:>12.0f}")
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump({"vectors": len(embeddings), "queries": len(queries), "results": rows}, f, indent=2)
+    print(f"\nResults written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
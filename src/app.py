@@ -1,35 +1,80 @@
+import os
+import re
+import json
+import time
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import Optional
-from .llm import shorten_answer, call_llm
-from .safety import check_safety
-from .retriever import Retriever
-from .personalizer import make_chat_messages
-from .realtime import RealtimeFetcher
-from .profiling import calculate_risk_profile
-from .intent_classifier import classify_intent, get_allowed_docs
-from .calculator import calculate
-from .context_manager import get_or_create_state, is_followup_response, bind_response, should_persist_intent
-from .question_detector import detect_question_type, is_asking_question
+from src.llm import shorten_answer, call_llm, acall_llm, astream_llm, SentenceLimiter, FALLBACK_RESPONSE, llm_flight, llm_scheduler, llm_hedger, llm_telemetry
+from src.safety import check_safety
+from src.retriever import Retriever
+from src.personalizer import make_chat_messages
+from src.realtime import RealtimeFetcher
+from src.persistent_cache import REALTIME_CACHE, shared_db
+from src.amfi import ISIN_RE
+from src.scheme_search import clean_query
+from src.profiling import calculate_risk_profile
+from src.intent_classifier import classify_intent, get_allowed_docs, requires_rag
+from src.calculator import calculate
+from src.explainer import render_explanation
+from src.context_manager import get_or_create_state, is_followup_response, bind_response, should_persist_intent
+from src.question_detector import detect_question_type, is_asking_question
+from src.lifecycle import Lifecycle
+from src.response_cache import SemanticResponseCache, normalize_query
+from src.hedging import DecisionStats
 from fastapi.middleware.cors import CORSMiddleware
 from pymongo import MongoClient
 from bson import ObjectId
 import datetime
 
-app = FastAPI(title="Personalized Finance Chatbot")
+INDEX_DIR = os.getenv("INDEX_DIR", "C:/Users/Admin/Desktop/Finance_bot/index")
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
+WARM_ON_STARTUP = os.getenv("WARM_ON_STARTUP", "1") == "1"
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "vector")  # "vector" or "hybrid"
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "1") == "1"
+# Start the no-KB answer alongside the RAG answer when retrieval looks weak (education intent)
+SPECULATIVE_FALLBACK = os.getenv("SPECULATIVE_FALLBACK", "0") == "1"
+# Best squared-L2 distance above which KB coverage counts as weak (unit vectors: 1.2 ~ cosine 0.4)
+WEAK_COVERAGE_DISTANCE = float(os.getenv("WEAK_COVERAGE_DISTANCE", "1.2"))
+# "template": explain calculator results locally (no LLM call); "llm": have the LLM explain them
+CALC_EXPLANATION_MODE = os.getenv("CALC_EXPLANATION_MODE", "template")
 
 # -----------------------------
-# Load modules
+# Load modules (lazily - nothing heavy runs at import time)
 # -----------------------------
-retriever = Retriever(index_dir="C:/Users/Admin/Desktop/Finance_bot/index")
-fetcher = RealtimeFetcher()
+lifecycle = Lifecycle()
+retriever = lifecycle.register("retriever", lambda: Retriever(index_dir=INDEX_DIR, mode=RETRIEVAL_MODE))
+fetcher = lifecycle.register("realtime_fetcher", RealtimeFetcher)
+response_cache = SemanticResponseCache(
+    threshold=float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.92")),
+    ttl=int(os.getenv("RESPONSE_CACHE_TTL", "3600")),
+    maxsize=int(os.getenv("RESPONSE_CACHE_MAXSIZE", "2048")),
+)
 
 # -----------------------------
 # MongoDB Setup
 # -----------------------------
-client = MongoClient("mongodb://localhost:27017")
-db = client["finance_chatbot"]
-goals_collection = db["goals"]
+def _connect_goals_collection():
+    # connect=False defers the network handshake to the first operation
+    client = MongoClient(MONGO_URI, connect=False, serverSelectionTimeoutMS=3000)
+    return client["finance_chatbot"]["goals"]
+
+goals_collection = lifecycle.register("goals_collection", _connect_goals_collection, required=False)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Start accepting connections immediately; warm components behind the scenes
+    if WARM_ON_STARTUP:
+        lifecycle.warm_in_background()
+    yield
+
+
+app = FastAPI(title="Personalized Finance Chatbot", lifespan=lifespan)
 
 # -----------------------------
 # Request / Response Models
@@ -61,6 +106,14 @@ class SaveRequest(BaseModel):
 # -----------------------------
 # Simple rule-based routing to realtime fetcher
 # -----------------------------
+OTHER_PRODUCTS_RE = re.compile(r"\b(fds?|fixed deposits?|mutual funds?|navs?)\b")
+# Scheme names share words with bank stocks ("axis bluechip fund", "hdfc flexi cap direct growth")
+SCHEME_NAME_RE = re.compile(
+    r"\b(funds?|schemes?|(?:large|mid|small|multi|flexi)\s?caps?|caps?|flexi|bluechip|index|etfs?"
+    r"|direct|regular|growth|idcw|elss)\b"
+)
+
+
 def try_realtime(query: str):
     """Detect if query requires realtime info and fetch it."""
     q_lower = query.lower()
@@ -68,7 +121,11 @@ def try_realtime(query: str):
     # -----------------------------
     # Stocks
     # -----------------------------
-    if "stock" in q_lower or "share" in q_lower or any(sym in q_lower for sym in ["nse", "bse", ".ns", ".bo"]):
+    # "compare SBI and HDFC" is a stock question unless it is about their FDs / funds
+    asks_quote = any(w in q_lower for w in ["stock", "share", "quote", "price", "compare", "portfolio"])
+    asks_scheme = bool(SCHEME_NAME_RE.search(q_lower))
+    if (asks_quote and not asks_scheme and not OTHER_PRODUCTS_RE.search(q_lower)) \
+            or any(sym in q_lower for sym in ["nse", "bse", ".ns", ".bo"]):
         ticker_map = {
             "sbi": "SBIN",
             "reliance": "RELIANCE",
@@ -91,20 +148,27 @@ def try_realtime(query: str):
             "reliance industries limited": "RELIANCE",
         }
 
-        ticker = None
+        # Every company named in the query, in order of appearance
+        # ("compare TCS, Infosys and Wipro" -> TCS, INFY, WIPRO)
+        found = []
+        remaining = q_lower
         for name in sorted(ticker_map.keys(), key=lambda x: -len(x)):
-            if name in q_lower:
-                ticker = ticker_map[name]
-                break
+            pos = remaining.find(name)
+            if pos != -1:
+                found.append((pos, ticker_map[name]))
+                remaining = remaining.replace(name, " " * len(name))
 
+        symbols = set(ticker_map.values())
+        offset = 0
         for token in q_lower.replace(",", " ").split():
-            tok = token.strip().upper()
-            if len(tok) >= 2 and tok.isalnum() and tok in set(ticker_map.values()):
-                ticker = tok
-                break
+            offset = q_lower.find(token, offset)
+            tok = token.strip("?.!").upper()
+            if len(tok) >= 2 and tok.isalnum() and tok in symbols:
+                found.append((offset, tok))
 
-        if ticker:
-            return [fetcher.fetch_stock_price(ticker)]
+        tickers = list(dict.fromkeys(t for _, t in sorted(found)))
+        if tickers:
+            return fetcher.get().fetch_quotes(tickers)
 
     # -----------------------------
     # Fixed Deposits
@@ -115,7 +179,7 @@ def try_realtime(query: str):
             if bank in q_lower:
                 banks.append(bank)
         if banks:
-            return fetcher.fetch_fd_rates(tuple(banks))
+            return fetcher.get().fetch_fd_rates(tuple(banks))
 
     # -----------------------------
     # Mutual Funds
@@ -126,44 +190,127 @@ def try_realtime(query: str):
         # -----------------------------
     # Mutual Funds
     # -----------------------------
-    if "mutual fund" in q_lower or "nav" in q_lower:
+    # "price of hdfc flexi cap" asks for a NAV even without saying so
+    if "mutual fund" in q_lower or "nav" in q_lower or (asks_quote and asks_scheme):
         # Try to detect scheme code (numeric)
         tokens = q_lower.replace("?", "").replace(",", "").split()
         scheme_identifier = None
 
         for tok in tokens:
-            if tok.isdigit():  # e.g., "120503"
+            if tok.isdigit() or ISIN_RE.match(tok):  # e.g., "120503" or "INF846K01DP8"
                 scheme_identifier = tok
                 break
 
-        # If no scheme code, use the whole query as scheme name
-        if not scheme_identifier:
-            # strip extra words like "what", "is", etc.
-            # just pass query as-is for partial name matching
-            scheme_identifier = query  
+        # If no scheme code, search by name with the question words stripped
+        # ("what is the nav of axis bluechip fund" -> "axis bluechip fund")
+        by_name = not scheme_identifier
+        if by_name:
+            scheme_identifier = clean_query(query)
+            if not scheme_identifier:
+                return None
 
-        return [fetcher.fetch_mf_nav(scheme_identifier)]
+        result = fetcher.get().fetch_mf_nav(scheme_identifier)
+        if by_name and result.get("scheme_code") is None and "error" not in result:
+            return None  # no scheme named ("what is a mutual fund?"): let the RAG pipeline answer
+        return [result]
 
 
 
 # -----------------------------
-# Chat Endpoint
+# Health Endpoints
 # -----------------------------
-@app.post("/chat", response_model=ChatResponse)
-def chat_endpoint(request: ChatRequest):
+@app.get("/healthz")
+def liveness():
+    """Liveness: the process is up and serving requests."""
+    return {"status": "alive", "uptime_seconds": lifecycle.uptime_seconds()}
+
+
+@app.get("/readyz")
+def readiness():
+    """Readiness: all required components are loaded (503 while warming up)."""
+    body = lifecycle.readiness()
+    return JSONResponse(body, status_code=200 if body["ready"] else 503)
+
+
+@app.get("/metrics")
+def metrics():
+    """Cache and component counters for dashboards."""
+    body = {
+        "response_cache": response_cache.stats(),
+        "llm_singleflight": llm_flight.stats(),
+        "llm_scheduler": llm_scheduler.stats(),
+        "llm_hedging": llm_hedger.stats(),
+        "speculative_fallback": {"enabled": SPECULATIVE_FALLBACK, **speculation.stats()},
+    }
+    if retriever.ready:
+        body["embedding_cache"] = retriever.get().embedding_cache.stats()
+    if fetcher.ready:
+        body["realtime_cache"] = {
+            "quotes": fetcher.get().quote_cache.stats(),
+            "fd_rates": fetcher.get().fd_cache.stats(),
+        }
+        if REALTIME_CACHE == "sqlite":
+            body["realtime_cache"]["store"] = shared_db().stats()
+        body["amfi_nav"] = fetcher.get().nav_store.stats()
+    return body
+
+
+@app.get("/metrics/llm")
+def llm_metrics(recent: int = 0):
+    """Per-caller LLM latency / token / outcome summary, plus the last `recent` raw call records."""
+    body = llm_telemetry.stats()
+    if recent:
+        body["recent"] = llm_telemetry.recent(min(recent, 200))
+    return body
+
+
+# -----------------------------
+# Chat pipeline
+# -----------------------------
+# Shared by /chat and /chat/stream: everything before the main LLM call is
+# planned in _plan_turn() (blocking work: retrieval, realtime APIs; run in the
+# thread pool), the answer is awaited or streamed on the event loop, and
+# _finish_turn() records it.
+
+FALLBACK_PATTERNS = [
+    "does not directly cover your query",
+    "please consult a financial advisor",
+    "information not available",
+]
+
+
+class ChatTurn:
+    """State of one /chat request between planning and the final answer."""
+
+    def __init__(self, query: str, profile: dict, state):
+        self.query = query
+        self.profile = profile
+        self.state = state
+        self.intent = None
+        self.docs = []
+        self.sources = []
+        self.messages = None
+        self.cacheable = False
+        self.query_emb = None
+        self.response: Optional[ChatResponse] = None  # set when no LLM call is needed
+
+
+def _plan_turn(request: ChatRequest) -> ChatTurn:
     query = request.query
     profile = request.profile
     session_id = request.session_id
     
     # Get conversation state
     state = get_or_create_state(session_id)
+    turn = ChatTurn(query, profile, state)
 
     # 1. Safety check
     safe, msg = check_safety(query)
     if not safe:
-        return ChatResponse(
+        turn.response = ChatResponse(
             answer=msg, sources=[], profile_used=profile, blocked=True
         )
+        return turn
     
     # 1.5 Reply binding - bind short/numeric responses to context
     original_query = query
@@ -171,35 +318,40 @@ def chat_endpoint(request: ChatRequest):
         query = bind_response(query, state)
         # Clear waiting_for after binding
         state.waiting_for = None
+    turn.query = query
 
     # 2. Calculation check (before RAG)
     calc_result = calculate(query)
     if calc_result and "error" not in calc_result:
-        # Return calculated result with explanation from LLM
-        calc_explanation = calc_result.get("explanation", "")
         calc_math = calc_result.get("calculation", "")
+
+        if CALC_EXPLANATION_MODE == "llm":
+            # Ask LLM to explain the result in context
+            messages = [
+                {"role": "system", "content": "Explain the calculation result to the user."},
+                {"role": "user", "content": f"User asked: {query}\n\nCalculation: {calc_math}\n\nExplain this result briefly and provide any relevant financial advice."}
+            ]
+            answer = call_llm(messages, caller="calc_explanation")
+        else:
+            # Deterministic template explanation - no LLM round trip
+            answer = render_explanation(calc_result, profile) or calc_result.get("explanation", "")
         
-        # Ask LLM to explain the result in context
-        messages = [
-            {"role": "system", "content": "You are a financial assistant. Explain the calculation result to the user."},
-            {"role": "user", "content": f"User asked: {query}\n\nCalculation: {calc_math}\n\nExplain this result briefly and provide any relevant financial advice."}
-        ]
-        answer = call_llm(messages)
-        
-        return ChatResponse(
+        turn.response = ChatResponse(
             answer=f"{calc_math}\n\n{answer}",
             sources=["code_calculation"],
             profile_used=profile
         )
+        return turn
     
     # 3. Realtime fetch
     realtime_data = try_realtime(query)
     if realtime_data:
-        return ChatResponse(
+        turn.response = ChatResponse(
             answer=f"Here’s the latest data I found: {realtime_data}",
             sources=["realtime_api"],
             profile_used=profile,
         )
+        return turn
 
     # 2.5 Compute Risk Profile (ONLY if profile data exists and is needed)
     # Profile is now optional and silent - only used internally if provided
@@ -215,6 +367,7 @@ def chat_endpoint(request: ChatRequest):
             profile.update(computed_profile)
     else:
         profile = {}  # Empty profile for generic queries
+    turn.profile = profile
     
     
     # 4. Intent classification with persistence
@@ -224,10 +377,9 @@ def chat_endpoint(request: ChatRequest):
     else:
         intent = classify_intent(query)
         state.update(intent=intent)
+    turn.intent = intent
     
     # RAG LOGIC CHECK (Issue 2)
-    from .intent_classifier import requires_rag
-    
     if not requires_rag(query, intent):
         docs = [] # Skip RAG for simple definitions/small talk
         sources = ["internal_knowledge"]
@@ -239,38 +391,88 @@ def chat_endpoint(request: ChatRequest):
             if "emergency_fund.txt" not in allowed_docs:
                 allowed_docs.append("emergency_fund.txt")
 
-        docs = retriever.retrieve(query, top_k=3, allowed_docs=allowed_docs)
+        docs = retriever.get().retrieve(query, top_k=3, allowed_docs=allowed_docs)
         sources = [doc["source"] for doc in docs]
+    turn.docs = docs
+    turn.sources = sources
+
+    # 4.5 Semantic answer cache (profile-dependent answers never use it)
+    if RESPONSE_CACHE_ENABLED and not profile:
+        turn.query_emb = retriever.get().embed([normalize_query(query)])[0]
+        turn.cacheable = True
+        cached = response_cache.get(turn.query_emb, intent, sources, state.context)
+        if cached:
+            turn.response = _finish_turn(turn, cached["answer"], cached["sources"], store=False)
+            return turn
+    else:
+        response_cache.bypass()
 
     # 4. Personalized prompt
-    messages = make_chat_messages(query, docs, profile, context=state.context)
+    turn.messages = make_chat_messages(query, docs, profile, context=state.context, intent=intent)
+    return turn
 
-    # 5. Call LLM with KB context
-    answer = call_llm(messages)
-    answer = shorten_answer(answer, max_sentences=3)
-    
-    # 6. Detect fallback/irrelevant answers → retry directly with Gemini
+
+def _needs_fallback(turn: ChatTurn, answer: str) -> bool:
     # Issue 4: Disable generic fallback during active planning flows
-    FALLBACK_PATTERNS = [
-        "does not directly cover your query",
-        "please consult a financial advisor",
-        "information not available",
+    # Only allow fallback if intent is education (generic queries)
+    return turn.intent == "education" and any(pat.lower() in answer.lower() for pat in FALLBACK_PATTERNS)
+
+
+def _direct_messages(turn: ChatTurn) -> list:
+    # Retry with direct LLM call, no KB context (persona comes from SYSTEM_PROMPT)
+    return [
+        {"role": "user", "content": turn.query},
     ]
 
-    # Only allow fallback if intent is education (generic queries)
-    if intent == "education" and any(pat.lower() in answer.lower() for pat in FALLBACK_PATTERNS):
-        # Retry with direct Gemini call, no KB context
-        direct_messages = [
-            {"role": "system", "content": "You are a helpful financial assistant."},
-            {"role": "user", "content": query},
-        ]
-        answer = call_llm(direct_messages)
-        sources = ["gemini_fallback"]
-    
-    # If sources wasn't set by fallback logic (and not set by skipping RAG)
-    if "sources" not in locals():
-         sources = [doc["source"] for doc in docs]
-    
+
+# -----------------------------
+# Speculative fallback
+# -----------------------------
+speculation = DecisionStats()
+
+
+def _weak_coverage(docs: list) -> bool:
+    """True when no retrieved chunk is close to the query (hybrid BM25-only hits carry no distance)."""
+    distances = [d["score"] for d in docs if d.get("score") is not None]
+    return not distances or min(distances) > WEAK_COVERAGE_DISTANCE
+
+
+async def _timed(coro):
+    start = time.perf_counter()
+    result = await coro
+    return result, (time.perf_counter() - start) * 1000
+
+
+async def _speculative_answer(turn: ChatTurn):
+    """
+    Run the RAG answer and the direct (no-KB) answer concurrently. The RAG
+    answer wins unless it is a fallback pattern; the loser is cancelled.
+    Sequentially the direct call would start after the RAG call, so using it
+    here saves min(rag_ms, direct_ms).
+    """
+    rag = asyncio.ensure_future(_timed(acall_llm(turn.messages)))
+    direct = asyncio.ensure_future(_timed(acall_llm(_direct_messages(turn), caller="fallback")))
+    try:
+        answer, rag_ms = await rag
+        answer = shorten_answer(answer, max_sentences=3)
+        if not _needs_fallback(turn, answer):
+            speculation.record("rag_used_direct_cancelled", extra_calls=1)
+            return answer, turn.sources
+
+        answer, direct_ms = await direct
+        speculation.record("direct_used", saved_ms=min(rag_ms, direct_ms))
+        return shorten_answer(answer, max_sentences=3), ["gemini_fallback"]
+    finally:
+        for task in (rag, direct):
+            if not task.done():
+                task.cancel()
+
+
+def _finish_turn(turn: ChatTurn, answer: str, sources: list, store: bool = True) -> ChatResponse:
+    # Never cache upstream failures
+    if store and turn.cacheable and FALLBACK_RESPONSE not in answer:
+        response_cache.put(turn.query_emb, turn.intent, answer, sources, turn.sources, turn.state.context)
+
     # 6. Update conversation state if bot asked a question
     if is_asking_question(answer):
         waiting_for = detect_question_type(answer)
@@ -279,9 +481,106 @@ def chat_endpoint(request: ChatRequest):
             # Fallback for intent persistence even if type extraction failed
             waiting_for = "details"
             
-        state.update(question=answer, waiting_for=waiting_for)
+        turn.state.update(question=answer, waiting_for=waiting_for)
+
+    return ChatResponse(answer=answer, sources=sources, profile_used=turn.profile)
 
-    return ChatResponse(answer=answer, sources=sources, profile_used=profile)
+
+# -----------------------------
+# Chat Endpoint
+# -----------------------------
+@app.post("/chat", response_model=ChatResponse)
+async def chat_endpoint(request: ChatRequest):
+    turn = await run_in_threadpool(_plan_turn, request)
+    if turn.response:
+        return turn.response
+
+    # 5. Weak KB coverage: race the direct answer against the RAG answer
+    if SPECULATIVE_FALLBACK and turn.intent == "education" and _weak_coverage(turn.docs):
+        answer, sources = await _speculative_answer(turn)
+        return _finish_turn(turn, answer, sources)
+
+    # 5. Call LLM with KB context
+    answer = await acall_llm(turn.messages)
+    answer = shorten_answer(answer, max_sentences=3)
+    sources = turn.sources
+    
+    # 6. Detect fallback/irrelevant answers → retry directly with Gemini
+    if _needs_fallback(turn, answer):
+        answer = shorten_answer(await acall_llm(_direct_messages(turn), caller="fallback"), max_sentences=3)
+        sources = ["gemini_fallback"]
+        if SPECULATIVE_FALLBACK and turn.intent == "education":
+            speculation.record("sequential_retry_not_predicted")
+
+    return _finish_turn(turn, answer, sources)
+
+
+# -----------------------------
+# Streaming Chat Endpoint (Server-Sent Events)
+# -----------------------------
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _dump(model: BaseModel) -> dict:
+    """model_dump() on pydantic 2, .dict() on pydantic 1 (requirements.txt does not pin it)."""
+    return model.model_dump() if hasattr(model, "model_dump") else model.dict()
+
+
+async def _limited_tokens(stream, limiter: SentenceLimiter):
+    """Yield the text of an LLM stream that survives the sentence limit; stops the upstream request at the limit."""
+    try:
+        async for chunk in stream:
+            text = limiter.feed(chunk)
+            if text:
+                yield text
+            if limiter.done:
+                break
+    finally:
+        await stream.aclose()
+    tail = limiter.finish()
+    if tail:
+        yield tail
+
+
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """
+    Same pipeline as /chat, streamed as SSE events:
+      token   {"text": ...}   next piece of the answer, in order
+      reset   {}              discard the text so far (education fallback retry)
+      final   {answer, sources, profile_used, blocked}
+    """
+    async def events():
+        turn = await run_in_threadpool(_plan_turn, request)
+        if turn.response:
+            yield _sse("token", {"text": turn.response.answer})
+            yield _sse("final", _dump(turn.response))
+            return
+
+        # 5. Stream LLM answer, applying the sentence limit as text arrives
+        limiter = SentenceLimiter(max_sentences=3)
+        async for text in _limited_tokens(astream_llm(turn.messages), limiter):
+            yield _sse("token", {"text": text})
+        answer = limiter.text
+        sources = turn.sources
+
+        # 6. Fallback retry replaces the streamed answer (same sentence limit)
+        if _needs_fallback(turn, answer):
+            yield _sse("reset", {})
+            limiter = SentenceLimiter(max_sentences=3)
+            async for text in _limited_tokens(astream_llm(_direct_messages(turn), caller="fallback"), limiter):
+                yield _sse("token", {"text": text})
+            answer = limiter.text
+            sources = ["gemini_fallback"]
+
+        yield _sse("final", _dump(_finish_turn(turn, answer, sources)))
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 ## -----------------------------
 # Create Goal
@@ -302,7 +601,7 @@ def create_goal(goal: GoalRequest):
         "created_at": datetime.datetime.utcnow(),
     }
 
-    res = goals_collection.insert_one(goal_doc)
+    res = goals_collection.get().insert_one(goal_doc)
     goal_doc["_id"] = str(res.inserted_id)
 
     return {"message": "Goal created successfully", "goal": goal_doc}
@@ -312,7 +611,7 @@ def create_goal(goal: GoalRequest):
 # -----------------------------
 @app.post("/goal/save")
 def save_progress(data: SaveRequest):
-    goal = goals_collection.find_one(
+    goal = goals_collection.get().find_one(
         {"_id": ObjectId(data.goal_id), "user": data.user}
     )
 
@@ -321,7 +620,7 @@ def save_progress(data: SaveRequest):
 
     new_saved = goal["saved_amount"] + data.amount_saved
 
-    goals_collection.update_one(
+    goals_collection.get().update_one(
         {"_id": ObjectId(data.goal_id)},
         {
             "$set": {"saved_amount": new_saved},
@@ -347,7 +646,7 @@ def save_progress(data: SaveRequest):
 # -----------------------------
 @app.get("/goal/{user}")
 def get_goals(user: str):
-    goals = list(goals_collection.find({"user": user}))
+    goals = list(goals_collection.get().find({"user": user}))
     for g in goals:
         g["_id"] = str(g["_id"])
     return goals
@@ -0,0 +1,158 @@
+"""
+Throughput and tail-latency benchmark of the full /chat pipeline.
+
+Replays the golden retrieval queries against the app at a fixed concurrency
+and reports requests/second plus p50/p95/p99 latency. With --stream and
+--url it also reports time to first token (the in-process transport buffers
+responses, so it cannot observe the first token). By default the app runs
+in-process with the offline stub LLM backend and a canned realtime fetcher
+(no NSE, yfinance or AMFI calls), so results need no API key or network
+and are reproducible:
+
+    python -m src.bench_chat --requests 500 --concurrency 64
+    python -m src.bench_chat --backend gemini --requests 50
+    python -m src.bench_chat --url http://localhost:8000 --stream
+
+Stub latency is configured with the STUB_* variables (see llm_backends.py).
+"""
+
+import os
+import json
+import time
+import uuid
+import asyncio
+import argparse
+import platform
+from datetime import datetime, timezone
+
+from src.bench_retrieval import load_golden, latency_summary, GOLDEN_PATH
+
+RESULTS_PATH = "./benchmarks/results/chat.json"
+
+
+class OfflineFetcher:
+    """Stands in for RealtimeFetcher in-process: canned rows, no network."""
+
+    def fetch_quotes(self, symbols):
+        return [{"ticker": s, "price": 100.0, "currency": "INR", "source": "bench"} for s in symbols]
+
+    def fetch_fd_rates(self, bank_keys):
+        return [{"bank": b, "1yr": 6.8, "2yr": 7.0, "5yr": 6.5, "source": "bench"} for b in bank_keys]
+
+    def fetch_mf_nav(self, scheme_identifier):
+        return {"scheme_code": "000000", "scheme_name": scheme_identifier, "nav": 10.0,
+                "currency": "INR", "date": None, "source": "bench"}
+
+
+async def _one_request(client, path, query, stream, measure_first_token=False):
+    """Return (total_ms, first_token_ms, ok) for one request."""
+    payload = {"query": query, "profile": {}, "session_id": str(uuid.uuid4())}
+    start = time.perf_counter()
+    first_token_ms = None
+    if not stream:
+        res = await client.post(path, json=payload)
+        return (time.perf_counter() - start) * 1000, None, res.status_code == 200
+
+    async with client.stream("POST", path, json=payload) as res:
+        async for line in res.aiter_lines():
+            if measure_first_token and first_token_ms is None and line.startswith("event: token"):
+                first_token_ms = (time.perf_counter() - start) * 1000
+        ok = res.status_code == 200
+    return (time.perf_counter() - start) * 1000, first_token_ms, ok
+
+
+async def run_load(client, queries, n_requests, concurrency, stream=False, measure_first_token=False, warmup=3):
+    path = "/chat/stream" if stream else "/chat"
+    for q in queries[:warmup]:
+        await _one_request(client, path, q, stream)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    results = []
+
+    async def worker(i):
+        async with semaphore:
+            results.append(await _one_request(client, path, queries[i % len(queries)], stream, measure_first_token))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(n_requests)))
+    elapsed = time.perf_counter() - start
+
+    report = {
+        "requests": n_requests,
+        "concurrency": concurrency,
+        "errors": sum(1 for _, _, ok in results if not ok),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(n_requests / elapsed, 2) if elapsed else None,
+        "latency": latency_summary([total for total, _, _ in results]),
+    }
+    if any(ft is not None for _, ft, _ in results):
+        report["first_token"] = latency_summary([ft for _, ft, _ in results if ft is not None])
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /chat throughput and tail latency.")
+    parser.add_argument("--url", default=None, help="running server; default runs the app in-process")
+    parser.add_argument("--backend", default="stub", help="LLM backend for the in-process app")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--stream", action="store_true", help="use /chat/stream and measure time to first token")
+    parser.add_argument("--response-cache", action="store_true", help="keep the semantic response cache enabled")
+    parser.add_argument("--golden", default=GOLDEN_PATH)
+    parser.add_argument("--out", default=RESULTS_PATH)
+    args = parser.parse_args()
+
+    queries = [q["query"] for q in load_golden(args.golden)]
+
+    import httpx
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=None)
+    else:
+        # Configure before the app (and its LLM backend) is imported
+        os.environ["LLM_BACKEND"] = args.backend
+        os.environ.setdefault("WARM_ON_STARTUP", "0")
+        os.environ["AMFI_BACKGROUND_REFRESH"] = "0"
+        if not args.response_cache:
+            os.environ["RESPONSE_CACHE_ENABLED"] = "0"
+        import src.app as app_module
+        from src.app import app
+
+        # Realtime lookups would hit NSE/yfinance/AMFI; keep the run offline
+        app_module.fetcher = app_module.lifecycle.register("realtime_fetcher", OfflineFetcher)
+
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None)
+
+    async def run():
+        async with client:
+            return await run_load(client, queries, args.requests, args.concurrency,
+                                  stream=args.stream, measure_first_token=bool(args.url))
+
+    report = asyncio.run(run())
+    report["config"] = {
+        "target": args.url or "in-process",
+        "backend": None if args.url else args.backend,
+        "stream": args.stream,
+        "response_cache": args.response_cache,
+        "realtime": "live" if args.url else "offline",
+        "stub": {k: v for k, v in os.environ.items() if k.startswith("STUB_")},
+        "python": platform.python_version(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }
+
+    lat = report["latency"]
+    print(f"{report['requests']} requests @ concurrency {report['concurrency']}: "
+          f"{report['throughput_rps']} req/s, {report['errors']} errors")
+    print(f"latency ms    p50 {lat['p50_ms']:.1f}  p95 {lat['p95_ms']:.1f}  p99 {lat['p99_ms']:.1f}")
+    if "first_token" in report:
+        ft = report["first_token"]
+        print(f"first token   p50 {ft['p50_ms']:.1f}  p95 {ft['p95_ms']:.1f}  p99 {ft['p99_ms']:.1f}")
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
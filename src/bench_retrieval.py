@@ -0,0 +1,165 @@
+"""
+Retrieval benchmark over the knowledge base in data/.
+
+Runs every query in benchmarks/retrieval_golden.json through Retriever.retrieve
+with the allowed_docs filter of its intent (as chat_endpoint does) and reports:
+
+- recall@k: fraction of the expected (filename, chunk_id) hits found in the top k
+- MRR: reciprocal rank of the first expected hit
+- p50/p95/p99 latency of retrieve(), per intent and overall
+
+Results are printed and written as JSON, so index, chunking or embedding
+changes can be gated on both quality and speed:
+
+    python -m src.bench_retrieval --mode hybrid --out benchmarks/results/hybrid.json
+"""
+
+import os
+import json
+import time
+import argparse
+import platform
+from datetime import datetime, timezone
+import numpy as np
+
+from src.retriever import Retriever, INDEX_DIR
+from src.intent_classifier import get_allowed_docs
+
+GOLDEN_PATH = "./benchmarks/retrieval_golden.json"
+RESULTS_PATH = "./benchmarks/results/retrieval.json"
+RECALL_KS = (1, 3, 5)
+LATENCY_PERCENTILES = (50, 95, 99)
+
+
+def load_golden(path=GOLDEN_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        golden = json.load(f)
+    for q in golden["queries"]:
+        q["expected"] = [tuple(hit) for hit in q["expected"]]
+    return golden["queries"]
+
+
+def score_ranking(ranked, expected, ks=RECALL_KS):
+    """Return ({k: recall@k}, reciprocal rank) for one ranked list of (filename, chunk_id)."""
+    expected = set(expected)
+    recall = {k: len(expected & set(ranked[:k])) / len(expected) for k in ks}
+    rr = 0.0
+    for rank, hit in enumerate(ranked, start=1):
+        if hit in expected:
+            rr = 1.0 / rank
+            break
+    return recall, rr
+
+
+def latency_summary(latencies_ms):
+    if not latencies_ms:
+        return {}
+    values = np.asarray(latencies_ms)
+    summary = {f"p{p}_ms": round(float(np.percentile(values, p)), 3) for p in LATENCY_PERCENTILES}
+    summary["mean_ms"] = round(float(values.mean()), 3)
+    return summary
+
+
+def summarize(rows, ks=RECALL_KS):
+    return {
+        "queries": len(rows),
+        **{f"recall@{k}": round(float(np.mean([r["recall"][k] for r in rows])), 4) for k in ks},
+        "mrr": round(float(np.mean([r["rr"] for r in rows])), 4),
+        **latency_summary([ms for r in rows for ms in r["latencies_ms"]]),
+    }
+
+
+def run_benchmark(retriever, queries, mode=None, repeat=5, warm_cache=False, ks=RECALL_KS):
+    """
+    Evaluate every golden query. Unless warm_cache is set, the embedding cache
+    is cleared before each timed call so latency includes the encoder.
+    """
+    top_k = max(ks)
+    rows = []
+
+    # Warm-up: first calls pay one-off costs (lazy allocations, selector builds)
+    for q in queries[:3]:
+        retriever.retrieve(q["query"], top_k=top_k, allowed_docs=get_allowed_docs(q["intent"]), mode=mode)
+
+    for q in queries:
+        allowed_docs = get_allowed_docs(q["intent"])
+        latencies_ms = []
+        for _ in range(repeat):
+            if not warm_cache:
+                retriever.embedding_cache.clear()
+            start = time.perf_counter()
+            results = retriever.retrieve(q["query"], top_k=top_k, allowed_docs=allowed_docs, mode=mode)
+            latencies_ms.append((time.perf_counter() - start) * 1000)
+
+        ranked = [(r["source"], r["chunk_id"]) for r in results]
+        recall, rr = score_ranking(ranked, q["expected"], ks)
+        rows.append({
+            "query": q["query"],
+            "intent": q["intent"],
+            "expected": q["expected"],
+            "retrieved": ranked,
+            "recall": recall,
+            "rr": rr,
+            "latencies_ms": latencies_ms,
+        })
+
+    by_intent = {}
+    for row in rows:
+        by_intent.setdefault(row["intent"], []).append(row)
+
+    return {
+        "overall": summarize(rows, ks),
+        "by_intent": {intent: summarize(r, ks) for intent, r in sorted(by_intent.items())},
+        "queries": [
+            {
+                "query": r["query"],
+                "intent": r["intent"],
+                "expected": r["expected"],
+                "retrieved": r["retrieved"],
+                "rr": r["rr"],
+                **{f"recall@{k}": r["recall"][k] for k in ks},
+                **latency_summary(r["latencies_ms"]),
+            }
+            for r in rows
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark retrieval recall and latency.")
+    parser.add_argument("--index-dir", default=INDEX_DIR)
+    parser.add_argument("--golden", default=GOLDEN_PATH)
+    parser.add_argument("--out", default=RESULTS_PATH)
+    parser.add_argument("--mode", choices=["vector", "hybrid"], default=None)
+    parser.add_argument("--repeat", type=int, default=5, help="timed calls per query")
+    parser.add_argument("--warm-cache", action="store_true", help="keep the query-embedding cache between calls")
+    args = parser.parse_args()
+
+    queries = load_golden(args.golden)
+    retriever = Retriever(index_dir=args.index_dir)
+    report = run_benchmark(retriever, queries, mode=args.mode, repeat=args.repeat, warm_cache=args.warm_cache)
+    report["config"] = {
+        "index_dir": args.index_dir,
+        "mode": args.mode or retriever.mode,
+        "model": retriever.model_name,
+        "chunks": len(retriever.chunks),
+        "repeat": args.repeat,
+        "warm_cache": args.warm_cache,
+        "python": platform.python_version(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }
+
+    print(f"{'intent':<24}{'n':>4}" + "".join(f"{'R@' + str(k):>8}" for k in RECALL_KS)
+          + f"{'MRR':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for name, s in list(report["by_intent"].items()) + [("OVERALL", report["overall"])]:
+        print(f"{name:<24}{s['queries']:>4}" + "".join(f"{s[f'recall@{k}']:>8.3f}" for k in RECALL_KS)
+              + f"{s['mrr']:>8.3f}{s['p50_ms']:>9.2f}{s['p95_ms']:>9.2f}{s['p99_ms']:>9.2f}")
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
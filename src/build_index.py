@@ -1,9 +1,16 @@
 import os
 import json
+import hashlib
+import argparse
 import faiss
 import numpy as np
 from sentence_transformers import SentenceTransformer
 
+from src.index_store import resolve_index_dir, current_generation, new_generation, publish_generation
+from src.chunk_store import open_chunk_store, write_chunk_store
+from src.lexical import BM25Index
+from src.ann import build_ann_index, save_index_config, parse_param_overrides
+
 # -----------------------------
 # CONFIG
 # -----------------------------
@@ -11,17 +18,24 @@ DATA_DIR = "./data"
 INDEX_DIR = "./index"
 MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 CHUNK_SIZE = 300  # approx characters, not strict words
+EMBED_BATCH_SIZE = 128  # chunks per SentenceTransformer forward pass
+INDEX_TYPE = "flat"  # see ann.py: flat | ivf | hnsw | ivfpq | sq
+
+
+def sha256_text(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
 
 def load_documents(data_dir):
     """Load all .txt files from data/ directory."""
     docs = []
-    for fname in os.listdir(data_dir):
+    # Sorted so each file's chunks get one contiguous ID range
+    for fname in sorted(os.listdir(data_dir)):
         if fname.endswith(".txt"):
             path = os.path.join(data_dir, fname)
             with open(path, "r", encoding="utf-8") as f:
                 text = f.read().strip()
-                docs.append({"filename": fname, "content": text})
+                docs.append({"filename": fname, "content": text, "sha256": sha256_text(text)})
     return docs
 
 
@@ -42,57 +56,180 @@ def chunk_text(text, chunk_size=CHUNK_SIZE):
     return chunks
 
 
-def build_index(docs, model):
-    """Create FAISS index and metadata list."""
-    embeddings = []
-    metadata = []
-
+def load_previous_build(index_dir, model_name, chunk_size):
+    """
+    Load the live generation's manifest, chunks and raw embeddings so
+    unchanged chunks can be reused. Returns None when a full rebuild is needed
+    (no previous generation, flat legacy layout, or different model/chunking).
+    """
+    if current_generation(index_dir) is None:
+        return None
+    live_dir = resolve_index_dir(index_dir)
+    try:
+        with open(os.path.join(live_dir, "manifest.json"), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        chunks = open_chunk_store(live_dir)
+        metadata = [chunks.get(i) for i in range(len(chunks))]
+        embeddings = np.load(os.path.join(live_dir, "embeddings.npy"))
+    except (OSError, ValueError):
+        return None
+
+    if manifest.get("model") != model_name or manifest.get("chunk_size") != chunk_size:
+        return None
+    return {"manifest": manifest, "metadata": metadata, "embeddings": embeddings}
+
+
+def plan_chunks(docs, previous=None):
+    """
+    Chunk documents and work out which chunks need embedding.
+
+    Files whose content hash is unchanged reuse their previous chunks as-is;
+    changed or new files are re-chunked and only chunks whose hash is unknown
+    are queued for embedding. Deleted files simply drop out.
+
+    Returns:
+        (metadata, chunk_hashes, reuse_rows, to_embed) where reuse_rows[i] is
+        the row in the previous embeddings matrix (or None) and to_embed lists
+        the positions that still need a vector.
+    """
+    prev_files, prev_rows_by_file, prev_row_by_hash = {}, {}, {}
+    if previous:
+        prev_files = previous["manifest"]["files"]
+        for row, meta in enumerate(previous["metadata"]):
+            prev_rows_by_file.setdefault(meta["filename"], []).append(row)
+        for fname, entry in prev_files.items():
+            for row, chunk_hash in zip(prev_rows_by_file.get(fname, []), entry["chunks"]):
+                prev_row_by_hash.setdefault(chunk_hash, row)
+
+    metadata, chunk_hashes, reuse_rows, to_embed = [], [], [], []
     for doc in docs:
-        chunks = chunk_text(doc["content"], CHUNK_SIZE)
-        for idx, chunk in enumerate(chunks):
-            emb = model.encode(chunk)
-            embeddings.append(emb)
+        fname = doc["filename"]
+        prev_entry = prev_files.get(fname)
+        if prev_entry and prev_entry["sha256"] == doc["sha256"]:
+            # Unchanged file: reuse chunks and vectors wholesale
+            for row, chunk_hash in zip(prev_rows_by_file[fname], prev_entry["chunks"]):
+                metadata.append(previous["metadata"][row])
+                chunk_hashes.append(chunk_hash)
+                reuse_rows.append(row)
+            continue
+
+        for idx, chunk in enumerate(chunk_text(doc["content"], CHUNK_SIZE)):
+            chunk_hash = sha256_text(chunk)
             metadata.append({
-                "filename": doc["filename"],
+                "filename": fname,
                 "chunk_id": idx,
                 "content": chunk
             })
+            chunk_hashes.append(chunk_hash)
+            row = prev_row_by_hash.get(chunk_hash)
+            reuse_rows.append(row)
+            if row is None:
+                to_embed.append(len(metadata) - 1)
+
+    return metadata, chunk_hashes, reuse_rows, to_embed
+
+
+def build_index(docs, model_loader, previous=None, index_type=INDEX_TYPE, index_params=None):
+    """
+    Create FAISS index, metadata list, raw embeddings and the build manifest.
+    model_loader is only called if at least one chunk needs embedding.
+    """
+    metadata, chunk_hashes, reuse_rows, to_embed = plan_chunks(docs, previous)
+    if not metadata:
+        raise ValueError("No chunks to index. Is the data directory empty?")
+
+    new_embs = None
+    if to_embed:
+        model = model_loader()
+        new_embs = model.encode(
+            [metadata[i]["content"] for i in to_embed],
+            batch_size=EMBED_BATCH_SIZE,
+        ).astype("float32")
+
+    dim = new_embs.shape[1] if new_embs is not None else previous["embeddings"].shape[1]
+    embeddings = np.empty((len(metadata), dim), dtype="float32")
+    for i, row in enumerate(reuse_rows):
+        if row is not None:
+            embeddings[i] = previous["embeddings"][row]
+    if new_embs is not None:
+        embeddings[to_embed] = new_embs
+
+    # FAISS index (always rebuilt from the full embeddings matrix)
+    index, index_params = build_ann_index(embeddings, index_type, index_params)
+
+    manifest = {
+        "model": MODEL_NAME,
+        "chunk_size": CHUNK_SIZE,
+        "index": {"kind": index_type, "params": index_params},
+        "files": {},
+    }
+    for meta, chunk_hash in zip(metadata, chunk_hashes):
+        entry = manifest["files"].setdefault(meta["filename"], {"chunks": []})
+        entry["chunks"].append(chunk_hash)
+    for doc in docs:
+        if doc["filename"] in manifest["files"]:
+            manifest["files"][doc["filename"]]["sha256"] = doc["sha256"]
 
-    embeddings = np.array(embeddings).astype("float32")
+    stats = {"chunks": len(metadata), "embedded": len(to_embed), "reused": len(metadata) - len(to_embed)}
+    return index, metadata, embeddings, manifest, stats
 
-    # FAISS index
-    dim = embeddings.shape[1]
-    index = faiss.IndexFlatL2(dim)
-    index.add(embeddings)
 
-    return index, metadata
+def save_index(index, metadata, embeddings, manifest, out_dir=INDEX_DIR):
+    """
+    Write a new index generation (FAISS index, BM25 index, binary chunk
+    store, raw embeddings and manifest) and atomically make it live.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    name, staging_dir = new_generation(out_dir)
 
+    faiss.write_index(index, os.path.join(staging_dir, "faiss.index"))
+    save_index_config(staging_dir, manifest["index"]["kind"], manifest["index"]["params"])
+    np.save(os.path.join(staging_dir, "embeddings.npy"), embeddings)
 
-def save_index(index, metadata, out_dir=INDEX_DIR):
-    """Save FAISS index and metadata JSON."""
-    os.makedirs(out_dir, exist_ok=True)
-    faiss.write_index(index, os.path.join(out_dir, "faiss.index"))
+    write_chunk_store(staging_dir, metadata)
 
-    with open(os.path.join(out_dir, "metadata.json"), "w", encoding="utf-8") as f:
-        json.dump(metadata, f, indent=2, ensure_ascii=False)
+    # Lexical index is cheap to rebuild in full, even on incremental builds
+    BM25Index.build([meta["content"] for meta in metadata]).save(staging_dir)
+
+    with open(os.path.join(staging_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    return publish_generation(out_dir, name, staging_dir)
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Build the FAISS knowledge-base index.")
+    parser.add_argument("--full", action="store_true", help="ignore the previous build and re-embed everything")
+    parser.add_argument("--index-type", default=INDEX_TYPE, choices=["flat", "ivf", "hnsw", "ivfpq", "sq"])
+    parser.add_argument("--index-param", action="append", metavar="KEY=VALUE",
+                        help="index parameter override, e.g. nlist=128, nprobe=16, M=48, ef_search=128")
+    args = parser.parse_args()
+
     print("📂 Loading documents...")
     docs = load_documents(DATA_DIR)
     print(f"Loaded {len(docs)} documents.")
 
-    print("🔎 Initializing model...")
-    model = SentenceTransformer(MODEL_NAME)
+    previous = None if args.full else load_previous_build(INDEX_DIR, MODEL_NAME, CHUNK_SIZE)
+    print("♻️  Incremental build" if previous else "🧱 Full build")
 
-    print("⚡ Building index...")
-    index, metadata = build_index(docs, model)
-
-    print("💾 Saving index & metadata...")
-    save_index(index, metadata)
+    def load_model():
+        print("🔎 Initializing model...")
+        return SentenceTransformer(MODEL_NAME)
 
-    print(f"✅ Done! {len(metadata)} chunks indexed.")
-    print("Files created: index/faiss.index and index/metadata.json")
+    print("⚡ Building index...")
+    index, metadata, embeddings, manifest, stats = build_index(
+        docs, load_model, previous,
+        index_type=args.index_type,
+        index_params=parse_param_overrides(args.index_param),
+    )
+
+    print("💾 Saving index generation...")
+    live_dir = save_index(index, metadata, embeddings, manifest)
+
+    print(f"✅ Done! {stats['chunks']} chunks indexed "
+          f"({stats['embedded']} embedded, {stats['reused']} reused).")
+    print(f"Index: {manifest['index']['kind']} {manifest['index']['params']}")
+    print(f"Live generation: {live_dir}")
 
 
 if __name__ == "__main__":
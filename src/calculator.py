@@ -45,6 +45,8 @@ def time_to_save(target_amount: float, monthly_saving: float) -> Dict[str, Any]:
     years = months / 12
     
     return {
+        "target_amount": target_amount,
+        "monthly_saving": monthly_saving,
         "months": round(months, 1),
         "years": round(years, 1),
         "calculation": f"₹{target_amount:,.0f} ÷ ₹{monthly_saving:,.0f} = {months:.1f} months",
@@ -72,6 +74,8 @@ def monthly_required(target_amount: float, months: int) -> Dict[str, Any]:
     monthly = target_amount / months
     
     return {
+        "target_amount": target_amount,
+        "months": months,
         "monthly": round(monthly, 2),
         "calculation": f"₹{target_amount:,.0f} ÷ {months} months = ₹{monthly:,.2f} per month",
         "explanation": f"To save ₹{target_amount:,.0f} in {months} months, you need to save ₹{monthly:,.2f} per month."
@@ -101,6 +105,8 @@ def emi_affordability(monthly_income: float, emi_amount: float) -> Dict[str, Any
     status = "affordable" if affordable else "risky"
     
     return {
+        "monthly_income": monthly_income,
+        "emi_amount": emi_amount,
         "affordable": affordable,
         "percentage": round(percentage, 1),
         "calculation": f"₹{emi_amount:,.0f} ÷ ₹{monthly_income:,.0f} = {percentage:.1f}%",
@@ -149,14 +155,21 @@ def calculate(query: str) -> Optional[Dict[str, Any]]:
         query: User query
         
     Returns:
-        Calculation result dict or None if no calculation needed
+        Calculation result dict (with "type" set to the calculation name)
+        or None if no calculation needed
     """
     calc_type = detect_calculation_intent(query)
     if not calc_type:
         return None
     
     numbers = extract_numbers(query)
-    
+    result = _run_calculation(calc_type, query, numbers)
+    if result is not None:
+        result["type"] = calc_type
+    return result
+
+
+def _run_calculation(calc_type: str, query: str, numbers: list) -> Optional[Dict[str, Any]]:
     if calc_type == "time_to_save":
         if len(numbers) >= 2:
             # Assume larger number is target, smaller is monthly
@@ -0,0 +1,141 @@
+"""
+Compact, memory-mapped store for knowledge-base chunks.
+
+build_index.py writes one contiguous UTF-8 blob plus small NumPy arrays
+instead of a pretty-printed metadata.json:
+
+    chunks.bin          all chunk texts back to back (UTF-8)
+    chunk_offsets.npy   int64[n + 1] byte offsets into chunks.bin
+    chunk_file_ids.npy  int32[n] index into chunk_files.json
+    chunk_ids.npy       int32[n] chunk number within its source file
+    chunk_files.json    list of source filenames
+
+Retriever memory-maps these files and only decodes the rows it returns, so
+start-up does no JSON parsing and worker processes share the same pages.
+"""
+
+import os
+import json
+import mmap
+import numpy as np
+
+BLOB_FILE = "chunks.bin"
+OFFSETS_FILE = "chunk_offsets.npy"
+FILE_IDS_FILE = "chunk_file_ids.npy"
+CHUNK_IDS_FILE = "chunk_ids.npy"
+FILENAMES_FILE = "chunk_files.json"
+
+
+def write_chunk_store(out_dir, metadata):
+    """Write metadata rows ({filename, chunk_id, content}) as a binary chunk store."""
+    filenames = []
+    file_index = {}
+    offsets = np.zeros(len(metadata) + 1, dtype="int64")
+    file_ids = np.zeros(len(metadata), dtype="int32")
+    chunk_ids = np.zeros(len(metadata), dtype="int32")
+
+    with open(os.path.join(out_dir, BLOB_FILE), "wb") as blob:
+        for i, meta in enumerate(metadata):
+            data = meta["content"].encode("utf-8")
+            blob.write(data)
+            offsets[i + 1] = offsets[i] + len(data)
+            if meta["filename"] not in file_index:
+                file_index[meta["filename"]] = len(filenames)
+                filenames.append(meta["filename"])
+            file_ids[i] = file_index[meta["filename"]]
+            chunk_ids[i] = meta["chunk_id"]
+
+    np.save(os.path.join(out_dir, OFFSETS_FILE), offsets)
+    np.save(os.path.join(out_dir, FILE_IDS_FILE), file_ids)
+    np.save(os.path.join(out_dir, CHUNK_IDS_FILE), chunk_ids)
+    with open(os.path.join(out_dir, FILENAMES_FILE), "w", encoding="utf-8") as f:
+        json.dump(filenames, f, ensure_ascii=False)
+
+
+class ChunkStore:
+    """Read-only, memory-mapped view over a chunk store directory."""
+
+    def __init__(self, store_dir):
+        with open(os.path.join(store_dir, FILENAMES_FILE), "r", encoding="utf-8") as f:
+            self.filenames = json.load(f)
+        self.offsets = np.load(os.path.join(store_dir, OFFSETS_FILE), mmap_mode="r")
+        self.file_ids = np.load(os.path.join(store_dir, FILE_IDS_FILE), mmap_mode="r")
+        self.chunk_ids = np.load(os.path.join(store_dir, CHUNK_IDS_FILE), mmap_mode="r")
+
+        blob_path = os.path.join(store_dir, BLOB_FILE)
+        if os.path.getsize(blob_path) == 0:
+            self._blob = b""  # mmap cannot map an empty file
+        else:
+            with open(blob_path, "rb") as f:
+                self._blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self):
+        return len(self.file_ids)
+
+    def filename(self, i):
+        return self.filenames[self.file_ids[i]]
+
+    def chunk_id(self, i):
+        return int(self.chunk_ids[i])
+
+    def content(self, i):
+        return self._blob[self.offsets[i]:self.offsets[i + 1]].decode("utf-8")
+
+    def get(self, i):
+        """Decode one row as {filename, chunk_id, content}."""
+        return {
+            "filename": self.filename(i),
+            "chunk_id": self.chunk_id(i),
+            "content": self.content(i),
+        }
+
+    def doc_ranges(self):
+        """Map each filename to the [start, end) row ranges holding its chunks."""
+        ids = np.asarray(self.file_ids)
+        if not len(ids):
+            return {}
+        bounds = np.flatnonzero(np.diff(ids)) + 1
+        starts = np.concatenate([[0], bounds])
+        ends = np.concatenate([bounds, [len(ids)]])
+        ranges = {}
+        for start, end in zip(starts, ends):
+            ranges.setdefault(self.filenames[ids[start]], []).append([int(start), int(end)])
+        return ranges
+
+
+class JsonChunkStore:
+    """Same interface over a legacy metadata.json + doc_ranges.json index."""
+
+    def __init__(self, store_dir):
+        with open(os.path.join(store_dir, "metadata.json"), "r", encoding="utf-8") as f:
+            self.metadata = json.load(f)
+        ranges_path = os.path.join(store_dir, "doc_ranges.json")
+        if not os.path.exists(ranges_path):
+            raise FileNotFoundError("doc_ranges.json not found. Re-run build_index.py.")
+        with open(ranges_path, "r", encoding="utf-8") as f:
+            self._doc_ranges = json.load(f)
+
+    def __len__(self):
+        return len(self.metadata)
+
+    def filename(self, i):
+        return self.metadata[i]["filename"]
+
+    def chunk_id(self, i):
+        return self.metadata[i]["chunk_id"]
+
+    def content(self, i):
+        return self.metadata[i]["content"]
+
+    def get(self, i):
+        return self.metadata[i]
+
+    def doc_ranges(self):
+        return self._doc_ranges
+
+
+def open_chunk_store(store_dir):
+    """Open the binary store if present, falling back to legacy metadata.json."""
+    if os.path.exists(os.path.join(store_dir, BLOB_FILE)):
+        return ChunkStore(store_dir)
+    return JsonChunkStore(store_dir)
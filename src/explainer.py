@@ -0,0 +1,137 @@
+"""
+Deterministic explanations for calculator results.
+
+calculate() already does the math; this module turns its result into the
+chat answer with per-calculation templates instead of an LLM round trip:
+
+    calculation line        (from calculate())
+    explanation             (template for the calculation type)
+    guidance                (variant by risk level / horizon / outcome)
+    follow-up suggestions   (questions the user can ask next)
+
+Risk variants only apply when the profile carries a risk level; following
+SYSTEM_PROMPT, the text never names the user's risk level or assumes one.
+"""
+
+from typing import Any, Dict, Optional
+
+# -----------------------------
+# Templates
+# -----------------------------
+EXPLANATIONS = {
+    "time_to_save": (
+        "Saving ₹{monthly_saving:,.0f} every month, you will reach ₹{target_amount:,.0f} "
+        "in about {months:.1f} months ({years:.1f} years), before any interest or returns."
+    ),
+    "monthly_required": (
+        "To build ₹{target_amount:,.0f} in {months} months you need to set aside "
+        "₹{monthly:,.0f} every month, before any interest or returns."
+    ),
+    "emi_affordability": (
+        "An EMI of ₹{emi_amount:,.0f} takes {percentage:.1f}% of your ₹{monthly_income:,.0f} monthly income. "
+        "Lenders and planners generally treat up to 40% as the upper limit."
+    ),
+}
+
+# Guidance by horizon bucket, then risk level ("default" when no profile risk is known)
+SAVING_GUIDANCE = {
+    "short": {
+        "default": "For goals under 3 years, keep the money in a savings account, recurring deposit or liquid fund so it is there when you need it.",
+        "low": "For goals under 3 years, a recurring deposit or fixed deposit keeps the money safe and available on time.",
+        "medium": "For goals under 3 years, a recurring deposit or liquid fund keeps the money available; avoid equity for this goal.",
+        "high": "Goals under 3 years are best kept out of equity, whatever the expected returns: use a liquid fund or recurring deposit.",
+    },
+    "medium": {
+        "default": "For a 3-5 year goal, a mix of fixed deposits and debt funds is a common choice; interest will shorten the timeline.",
+        "low": "For a 3-5 year goal, fixed deposits and short-duration debt funds keep the risk low while earning interest.",
+        "medium": "For a 3-5 year goal, a mix of debt funds with a small hybrid or equity allocation can shorten the timeline.",
+        "high": "For a 3-5 year goal, a balanced mix of equity and debt funds can shorten the timeline; move to safer options as the date approaches.",
+    },
+    "long": {
+        "default": "For goals 5+ years away, investing the monthly amount (for example through an SIP) can shorten the timeline considerably.",
+        "low": "For goals 5+ years away, a conservative hybrid fund or PPF can grow the money with limited ups and downs.",
+        "medium": "For goals 5+ years away, an SIP in a diversified equity or hybrid fund can shorten the timeline considerably.",
+        "high": "For goals 5+ years away, an SIP in diversified equity funds can shorten the timeline considerably; expect short-term swings.",
+    },
+}
+
+EMI_GUIDANCE = {
+    "affordable": {
+        "default": "This is within the recommended limit. Keep an emergency fund of 3-6 months of expenses including the EMI.",
+        "low": "This is within the recommended limit. Make sure 3-6 months of expenses, including the EMI, stay in an emergency fund.",
+        "medium": "This is within the recommended limit, leaving room for savings alongside the loan.",
+        "high": "This is within the recommended limit; prepaying when you have surplus cash cuts the total interest paid.",
+    },
+    "risky": {
+        "default": "This is above the recommended 40%. Consider a longer tenure, a bigger down payment or a smaller loan.",
+        "low": "This is above the recommended 40% and would strain your budget. Consider a smaller loan or a bigger down payment.",
+        "medium": "This is above the recommended 40%. A longer tenure or bigger down payment would bring it into a safer range.",
+        "high": "This is above the recommended 40%, which leaves little room for surprises. Consider a smaller loan or longer tenure.",
+    },
+}
+
+FOLLOW_UPS = {
+    "time_to_save": [
+        "How much should I save per month to reach it faster?",
+        "Where should I keep this money while I save?",
+    ],
+    "monthly_required": [
+        "Where should I invest this monthly amount?",
+        "How long will it take if I save a different amount?",
+    ],
+    "emi_affordability": [
+        "How much emergency fund do I need with this loan?",
+        "How does the 50-30-20 budget rule work?",
+    ],
+}
+
+
+def _risk_level(profile: Optional[dict]) -> str:
+    profile = profile or {}
+    level = str(profile.get("risk_level") or profile.get("risk") or "").lower()
+    return level if level in ("low", "medium", "high") else "default"
+
+
+def _horizon(months: float) -> str:
+    if months < 36:
+        return "short"
+    if months < 60:
+        return "medium"
+    return "long"
+
+
+def render_explanation(result: Dict[str, Any], profile: Optional[dict] = None,
+                       follow_ups: bool = True) -> Optional[str]:
+    """
+    Explanation text for a calculate() result, or None for unknown types
+    (callers then fall back to result["explanation"]).
+    """
+    calc_type = result.get("type")
+    if calc_type not in EXPLANATIONS:
+        return None
+
+    risk = _risk_level(profile)
+    parts = [EXPLANATIONS[calc_type].format(**result)]
+
+    if calc_type == "emi_affordability":
+        parts.append(EMI_GUIDANCE["affordable" if result["affordable"] else "risky"][risk])
+    else:
+        parts.append(SAVING_GUIDANCE[_horizon(result["months"])][risk])
+
+    text = " ".join(parts)
+    if follow_ups:
+        text += "\n\nYou could also ask:\n" + "\n".join(f"- {q}" for q in FOLLOW_UPS[calc_type])
+    return text
+
+
+# --- Quick test ---
+if __name__ == "__main__":
+    from src.calculator import calculate
+
+    for query, profile in [
+        ("I want to save 5,00,000. I can save 25,000 monthly. How long?", {}),
+        ("How much should I save per month to reach 1000000 in 6 years?", {"risk": "high"}),
+        ("Can I afford 30000 EMI on 60000 salary?", {"risk_level": "Low"}),
+    ]:
+        result = calculate(query)
+        print(f"Query: {query}\n{result['calculation']}\n\n{render_explanation(result, profile)}\n")
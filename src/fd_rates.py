@@ -0,0 +1,138 @@
+"""
+FD (fixed deposit) rate table: batched LLM prompt and answer parsing.
+
+Rates are cached per bank, so any combination of banks is served from the
+entries already fetched; only banks that are missing or expired go to the
+LLM, all in one request. Each row of the table is a plain dict:
+
+    {"bank": "sbi", "1yr": 6.8, "2yr": 7.0, "5yr": 6.5,   # % p.a., None if unknown
+     "source": "llm", "timestamp": "2025-..."}
+
+When the answer cannot be parsed for a bank, its row carries the answer as
+"rates_raw" instead of rates; when the lookup fails it carries "error". Such
+rows are cached for FD_RATES_NEGATIVE_TTL only, so a failing LLM is not asked
+again on every request.
+
+Rows are cached by RealtimeFetcher's fd_rates SWRCache (FD_RATES_TTL plus
+the FD_RATES_GRACE stale window) in the persistent realtime cache.
+"""
+
+import os
+import re
+import json
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from dateutil import tz
+
+FD_RATES_TTL = int(os.getenv("FD_RATES_TTL", str(24 * 3600)))
+FD_RATES_GRACE = int(os.getenv("FD_RATES_GRACE", str(3 * 24 * 3600)))  # serve older rows while refreshing
+FD_RATES_NEGATIVE_TTL = int(os.getenv("FD_RATES_NEGATIVE_TTL", "300"))  # failed / unparsed rows
+
+TENURES = ("1yr", "2yr", "5yr")
+MAX_RATE = 20.0  # anything above this is a parsing error, not an FD rate
+
+FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL | re.IGNORECASE)
+NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
+
+
+# -----------------------------
+# Prompt + parsing
+# -----------------------------
+def build_batch_prompt(banks: List[str]) -> str:
+    example = ", ".join(f'{{"bank": "{b}", "1yr": 6.8, "2yr": 7.0, "5yr": 6.5}}' for b in banks[:1])
+    return (
+        "Provide the latest Fixed Deposit (FD) interest rates for general (non-senior) customers "
+        f"of these banks in India: {', '.join(banks)}.\n"
+        "Return a JSON array with one object per bank, using the bank names exactly as given "
+        "and rates as numbers in percent per annum, like this:\n"
+        f"[{example}]\n"
+        "Use null for a rate you do not know. No explanation, only valid JSON."
+    )
+
+
+def extract_json(text: str):
+    """Parse JSON from an LLM answer, tolerating ```json fences and surrounding prose."""
+    if not text:
+        return None
+    fenced = FENCE_RE.search(text)
+    if fenced:
+        text = fenced.group(1)
+    text = text.strip()
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    # Fall back to the outermost array / object in the text
+    for open_ch, close_ch in (("[", "]"), ("{", "}")):
+        start, end = text.find(open_ch), text.rfind(close_ch)
+        if start != -1 and end > start:
+            try:
+                return json.loads(text[start:end + 1])
+            except ValueError:
+                continue
+    return None
+
+
+def parse_rate(value) -> Optional[float]:
+    """6.8, "6.8%", "6.50 % p.a." -> float percent; None when missing or implausible."""
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        rate = float(value)
+    else:
+        match = NUMBER_RE.search(str(value))
+        if not match:
+            return None
+        rate = float(match.group())
+    return rate if 0 < rate <= MAX_RATE else None
+
+
+def parse_rate_table(text: str, banks: List[str]) -> Dict[str, dict]:
+    """
+    Turn an LLM answer into {bank: row} for the requested banks. Banks the
+    answer does not cover (or covers with no usable rate) are left out.
+    """
+    data = extract_json(text)
+    if isinstance(data, dict):
+        # {"banks": [...]}, a single row, or {"sbi": {...}, "hdfc": {...}}
+        if isinstance(data.get("banks"), list):
+            data = data["banks"]
+        elif "bank" in data:
+            data = [data]
+        else:
+            data = [dict(v, bank=k) for k, v in data.items() if isinstance(v, dict)]
+    if not isinstance(data, list):
+        return {}
+
+    wanted = {b.lower(): b for b in banks}
+    timestamp = datetime.now(tz=tz.tzlocal()).isoformat()
+    table = {}
+    for item in data:
+        if not isinstance(item, dict):
+            continue
+        bank = wanted.get(str(item.get("bank", "")).strip().lower())
+        if bank is None:
+            continue
+        row = {"bank": bank}
+        for tenure in TENURES:
+            row[tenure] = parse_rate(item.get(tenure))
+        if all(row[t] is None for t in TENURES):
+            continue
+        row.update(source="llm", timestamp=timestamp)
+        table[bank] = row
+    return table
+
+
+def unparsed_row(bank: str, answer: str) -> dict:
+    """Row for a bank the answer gave no usable rates for: the raw answer, as before batching."""
+    return {"bank": bank, "rates_raw": answer, "source": "llm",
+            "timestamp": datetime.now(tz=tz.tzlocal()).isoformat()}
+
+
+def error_row(bank: str, error: str) -> dict:
+    return {"bank": bank, "error": error, "timestamp": datetime.now(tz=tz.tzlocal()).isoformat()}
+
+
+def is_failed_row(row: dict) -> bool:
+    return "error" in row or "rates_raw" in row
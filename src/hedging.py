@@ -0,0 +1,153 @@
+"""
+Tail-latency tools for upstream LLM calls.
+
+- LatencyTracker keeps recent upstream latencies and reports a percentile.
+- Hedger runs an async call and, if it has not finished after the tracked
+  p95 (LLM_HEDGE_PERCENTILE), starts one duplicate ("hedge") and keeps
+  whichever finishes first, cancelling the other. Hedges are only sent when
+  the scheduler has idle capacity, so they never queue behind real work.
+- DecisionStats counts speculative / hedging decisions with the latency
+  they saved and the extra calls they cost, for /metrics.
+
+Hedging is async-only (acall_llm) and off unless LLM_HEDGE=1.
+"""
+
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict
+
+import numpy as np
+
+LLM_HEDGE = os.getenv("LLM_HEDGE", "0") == "1"
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LATENCY_SAMPLES = 512
+
+
+class LatencyTracker:
+    def __init__(self, maxlen=LATENCY_SAMPLES):
+        self._samples = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q: float, min_samples: int = 1):
+        """q-th percentile in seconds, or None with fewer than min_samples observations."""
+        with self._lock:
+            if len(self._samples) < max(min_samples, 1):
+                return None
+            return float(np.percentile(np.asarray(self._samples), q))
+
+    def expected_excess(self, seconds: float) -> float:
+        """Mean remaining time of past calls that ran longer than `seconds` (0 if none did)."""
+        with self._lock:
+            samples = np.asarray(self._samples)
+        tail = samples[samples > seconds]
+        return float(tail.mean() - seconds) if len(tail) else 0.0
+
+    def __len__(self):
+        return len(self._samples)
+
+
+class DecisionStats:
+    """Thread-safe counters: decision -> {count, saved_ms, extra_calls}."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._decisions: Dict[str, Dict[str, float]] = {}
+
+    def record(self, decision: str, saved_ms: float = 0.0, extra_calls: int = 0):
+        with self._lock:
+            d = self._decisions.setdefault(decision, {"count": 0, "saved_ms": 0.0, "extra_calls": 0})
+            d["count"] += 1
+            d["saved_ms"] += saved_ms
+            d["extra_calls"] += extra_calls
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            decisions = {k: {**v, "saved_ms": round(v["saved_ms"], 1)} for k, v in self._decisions.items()}
+        return {
+            "decisions": decisions,
+            "saved_ms_total": round(sum(d["saved_ms"] for d in decisions.values()), 1),
+            "extra_calls_total": sum(d["extra_calls"] for d in decisions.values()),
+        }
+
+
+class Hedger:
+    def __init__(self, enabled=LLM_HEDGE, percentile=LLM_HEDGE_PERCENTILE,
+                 min_samples=LLM_HEDGE_MIN_SAMPLES, can_hedge: Callable[[], bool] = lambda: True):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.can_hedge = can_hedge
+        self.latency = LatencyTracker()
+        self.decisions = DecisionStats()
+
+    def threshold(self):
+        """Seconds after which a call is hedged (None until enough samples)."""
+        return self.latency.percentile(self.percentile, self.min_samples)
+
+    async def run(self, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Await factory(), hedging it with a second factory() call when it runs past the threshold."""
+        start = time.perf_counter()
+        delay = self.threshold() if self.enabled else None
+        primary = asyncio.ensure_future(factory())
+        tasks = {primary}
+        try:
+            if delay is None:
+                result = await primary
+                self.latency.record(time.perf_counter() - start)
+                return result
+
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                self.latency.record(time.perf_counter() - start)
+                return primary.result()
+
+            if not self.can_hedge():
+                self.decisions.record("hedge_skipped_no_capacity")
+                result = await primary
+                self.latency.record(time.perf_counter() - start)
+                return result
+
+            hedge = asyncio.ensure_future(factory())
+            tasks.add(hedge)
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((t for t in done if t.exception() is None), None)
+                if winner is not None:
+                    break
+            else:
+                return primary.result()  # both failed: surface the primary's error
+
+            elapsed = time.perf_counter() - start
+            if winner is hedge:
+                # The primary is cut off unfinished: estimate what it had left from the
+                # latency tail, and record the elapsed time as a lower bound for it
+                # (recording the hedge's latency would drag the threshold down)
+                saved = self.latency.expected_excess(elapsed)
+                self.decisions.record("hedge_won", saved_ms=saved * 1000, extra_calls=1)
+                self.latency.record(elapsed)
+            else:
+                self.decisions.record("primary_won_after_hedge", extra_calls=1)
+                self.latency.record(elapsed)
+            return winner.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        threshold = self.threshold()
+        return {
+            "enabled": self.enabled,
+            "percentile": self.percentile,
+            "threshold_ms": round(threshold * 1000, 1) if threshold is not None else None,
+            "samples": len(self.latency),
+            **self.decisions.stats(),
+        }
@@ -0,0 +1,94 @@
+"""
+On-disk layout of the retrieval index.
+
+build_index.py writes every build into its own generation directory and then
+atomically repoints CURRENT at it, so a running Retriever never reads a
+half-written index:
+
+    index/
+      CURRENT                    # name of the live generation, e.g. "gen-000003"
+      generations/
+        gen-000003/              # faiss.index, chunks.bin, manifest.json, ...
+
+Index directories without a CURRENT file (the original flat layout) are still
+read as-is.
+"""
+
+import os
+import shutil
+
+CURRENT_FILE = "CURRENT"
+GENERATIONS_DIR = "generations"
+KEEP_GENERATIONS = 3  # live generation + rollback candidates
+
+
+def current_generation(index_dir):
+    """Return the name of the live generation, or None for a flat index dir."""
+    pointer = os.path.join(index_dir, CURRENT_FILE)
+    if not os.path.exists(pointer):
+        return None
+    with open(pointer, "r", encoding="utf-8") as f:
+        return f.read().strip() or None
+
+
+def resolve_index_dir(index_dir):
+    """Return the directory holding the live index files."""
+    name = current_generation(index_dir)
+    if name is None:
+        return index_dir
+    return os.path.join(index_dir, GENERATIONS_DIR, name)
+
+
+def _generation_numbers(index_dir):
+    gen_root = os.path.join(index_dir, GENERATIONS_DIR)
+    if not os.path.isdir(gen_root):
+        return []
+    numbers = []
+    for name in os.listdir(gen_root):
+        if name.startswith("gen-") and name[4:].isdigit():
+            numbers.append(int(name[4:]))
+    return sorted(numbers)
+
+
+def new_generation(index_dir):
+    """
+    Reserve the next generation name and an empty staging directory for it.
+
+    Returns:
+        (name, staging_dir) - write all files into staging_dir, then call
+        publish_generation(index_dir, name, staging_dir).
+    """
+    numbers = _generation_numbers(index_dir)
+    name = f"gen-{(numbers[-1] + 1 if numbers else 1):06d}"
+    staging_dir = os.path.join(index_dir, GENERATIONS_DIR, f".staging-{name}")
+    if os.path.exists(staging_dir):
+        shutil.rmtree(staging_dir)
+    os.makedirs(staging_dir)
+    return name, staging_dir
+
+
+def publish_generation(index_dir, name, staging_dir, keep=KEEP_GENERATIONS):
+    """Move a staged generation into place and atomically make it live."""
+    final_dir = os.path.join(index_dir, GENERATIONS_DIR, name)
+    os.replace(staging_dir, final_dir)
+
+    pointer = os.path.join(index_dir, CURRENT_FILE)
+    tmp_pointer = pointer + ".tmp"
+    with open(tmp_pointer, "w", encoding="utf-8") as f:
+        f.write(name)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_pointer, pointer)
+
+    prune_generations(index_dir, keep)
+    return final_dir
+
+
+def prune_generations(index_dir, keep=KEEP_GENERATIONS):
+    """Delete all but the newest `keep` generations (never the live one)."""
+    live = current_generation(index_dir)
+    gen_root = os.path.join(index_dir, GENERATIONS_DIR)
+    for number in _generation_numbers(index_dir)[:-keep]:
+        name = f"gen-{number:06d}"
+        if name != live:
+            shutil.rmtree(os.path.join(gen_root, name), ignore_errors=True)
@@ -0,0 +1,146 @@
+"""
+Sparse BM25 index over knowledge-base chunks.
+
+Finance queries lean on exact tokens ("80C", "RD", "EMI", "50-30-20") that
+MiniLM embeddings rank poorly, so build_index.py also stores a BM25 inverted
+index next to the FAISS index. Postings are kept as term-major CSR arrays with
+the full BM25 weight precomputed per (term, chunk), which makes query scoring
+a single gather + np.bincount:
+
+    bm25_vocab.json   list of terms; position = term id
+    bm25.npz          indptr int64[V + 1], doc_ids int32[nnz], weights float32[nnz]
+"""
+
+import os
+import re
+import json
+from collections import Counter
+import numpy as np
+
+VOCAB_FILE = "bm25_vocab.json"
+POSTINGS_FILE = "bm25.npz"
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Keeps "80c", "50-30-20", "7.5" and "long-term" together as single tokens
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-/.][a-z0-9]+)*")
+
+
+def tokenize(text):
+    """Lowercase word tokens; compound tokens also emit their parts."""
+    tokens = []
+    for tok in TOKEN_RE.findall(text.lower()):
+        tokens.append(tok)
+        if "-" in tok or "/" in tok:
+            tokens.extend(p for p in re.split(r"[-/]", tok) if p)
+    return tokens
+
+
+class BM25Index:
+    def __init__(self, vocab, indptr, doc_ids, weights, n_docs):
+        self.vocab = {term: i for i, term in enumerate(vocab)}
+        self.terms = list(vocab)
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.n_docs = n_docs
+
+    @classmethod
+    def build(cls, texts, k1=BM25_K1, b=BM25_B):
+        """Build the index from chunk texts (row i = FAISS vector id i)."""
+        doc_terms = [Counter(tokenize(t)) for t in texts]
+        n_docs = len(texts)
+        doc_len = np.array([sum(c.values()) for c in doc_terms], dtype="float32")
+        avgdl = float(doc_len.mean()) if n_docs and doc_len.mean() > 0 else 1.0
+
+        postings = {}
+        for doc_id, counts in enumerate(doc_terms):
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append((doc_id, tf))
+
+        vocab = sorted(postings)
+        indptr = np.zeros(len(vocab) + 1, dtype="int64")
+        doc_ids, weights = [], []
+        for i, term in enumerate(vocab):
+            plist = postings[term]
+            df = len(plist)
+            idf = np.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+            ids = np.array([d for d, _ in plist], dtype="int32")
+            tf = np.array([f for _, f in plist], dtype="float32")
+            norm = k1 * (1.0 - b + b * doc_len[ids] / avgdl)
+            doc_ids.append(ids)
+            weights.append((idf * tf * (k1 + 1.0) / (tf + norm)).astype("float32"))
+            indptr[i + 1] = indptr[i] + df
+
+        return cls(
+            vocab,
+            indptr,
+            np.concatenate(doc_ids) if doc_ids else np.zeros(0, dtype="int32"),
+            np.concatenate(weights) if weights else np.zeros(0, dtype="float32"),
+            n_docs,
+        )
+
+    def save(self, out_dir):
+        with open(os.path.join(out_dir, VOCAB_FILE), "w", encoding="utf-8") as f:
+            json.dump(self.terms, f, ensure_ascii=False)
+        np.savez(
+            os.path.join(out_dir, POSTINGS_FILE),
+            indptr=self.indptr,
+            doc_ids=self.doc_ids,
+            weights=self.weights,
+            n_docs=np.array([self.n_docs]),
+        )
+
+    @classmethod
+    def load(cls, index_dir):
+        with open(os.path.join(index_dir, VOCAB_FILE), "r", encoding="utf-8") as f:
+            vocab = json.load(f)
+        data = np.load(os.path.join(index_dir, POSTINGS_FILE))
+        return cls(vocab, data["indptr"], data["doc_ids"], data["weights"], int(data["n_docs"][0]))
+
+    @staticmethod
+    def exists(index_dir):
+        return os.path.exists(os.path.join(index_dir, POSTINGS_FILE))
+
+    def scores(self, query):
+        """BM25 score of every chunk for query, as a dense float32 vector."""
+        term_ids = np.array(sorted({self.vocab[t] for t in tokenize(query) if t in self.vocab}), dtype="int64")
+        if not len(term_ids):
+            return np.zeros(self.n_docs, dtype="float32")
+
+        # Gather all posting slices in one shot
+        starts = self.indptr[term_ids]
+        lens = self.indptr[term_ids + 1] - starts
+        offsets = np.repeat(starts - np.concatenate([[0], np.cumsum(lens)[:-1]]), lens)
+        positions = offsets + np.arange(lens.sum())
+        return np.bincount(
+            self.doc_ids[positions], weights=self.weights[positions], minlength=self.n_docs
+        ).astype("float32")
+
+    def top(self, query, k, mask=None):
+        """
+        Return (doc_ids, scores) of the k best-scoring chunks with a non-zero
+        score, optionally restricted to rows where mask is True.
+        """
+        scores = self.scores(query)
+        if mask is not None:
+            scores = np.where(mask, scores, 0.0)
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        order = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return order, scores[order]
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """
+    Fuse several ranked lists of ids with RRF: score(id) = sum 1 / (k + rank).
+
+    Returns a list of (id, fused_score) sorted best first.
+    """
+    fused = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: -item[1])
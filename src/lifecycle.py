@@ -0,0 +1,123 @@
+"""
+Application start-up lifecycle.
+
+Heavy components (FAISS index + embedding model, realtime fetcher, MongoDB
+client) are registered as lazy components instead of being built at import
+time. They are warmed in a background thread once the server is accepting
+connections, and a request that needs one before warm-up finishes simply
+waits for that single in-progress load.
+
+Readiness only depends on components marked `required`; liveness is
+unconditional.
+"""
+
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+log = logging.getLogger(__name__)
+
+
+class LazyComponent:
+    """Builds its value on first use (or warm-up) exactly once, thread-safely."""
+
+    def __init__(self, name: str, factory: Callable[[], Any], required: bool = True):
+        self.name = name
+        self.factory = factory
+        self.required = required
+        self._value = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.load_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._loaded
+
+    def get(self):
+        if self._loaded:
+            return self._value
+        with self._lock:
+            if not self._loaded:
+                start = time.perf_counter()
+                try:
+                    self._value = self.factory()
+                except Exception as e:
+                    self.error = f"{type(e).__name__}: {e}"
+                    raise
+                self.load_seconds = round(time.perf_counter() - start, 3)
+                self.error = None
+                self._loaded = True
+                log.info("component %s loaded in %.3fs", self.name, self.load_seconds)
+        return self._value
+
+    def warm(self) -> bool:
+        """Load the component, logging instead of raising on failure."""
+        try:
+            self.get()
+            return True
+        except Exception as e:
+            log.warning("component %s failed to load: %s", self.name, e)
+            return False
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "ready": self._loaded,
+            "required": self.required,
+            "load_seconds": self.load_seconds,
+            "error": self.error,
+        }
+
+
+class Lifecycle:
+    """Registry of lazy components plus cold-start bookkeeping."""
+
+    def __init__(self):
+        self.created_at = time.perf_counter()
+        self.components: Dict[str, LazyComponent] = {}
+        self.cold_start_seconds: Optional[float] = None
+        self._warm_thread: Optional[threading.Thread] = None
+
+    def register(self, name: str, factory: Callable[[], Any], required: bool = True) -> LazyComponent:
+        component = LazyComponent(name, factory, required=required)
+        self.components[name] = component
+        return component
+
+    @property
+    def ready(self) -> bool:
+        return all(c.ready for c in self.components.values() if c.required)
+
+    def warm_in_background(self) -> threading.Thread:
+        """Warm every component concurrently without blocking the caller."""
+        if self._warm_thread is not None:
+            return self._warm_thread
+
+        def _run():
+            workers = [
+                threading.Thread(target=c.warm, name=f"warm-{c.name}", daemon=True)
+                for c in self.components.values()
+            ]
+            for w in workers:
+                w.start()
+            for w in workers:
+                w.join()
+            if self.ready:
+                self.cold_start_seconds = round(time.perf_counter() - self.created_at, 3)
+                log.info("cold start complete in %.3fs", self.cold_start_seconds)
+
+        self._warm_thread = threading.Thread(target=_run, name="lifecycle-warmup", daemon=True)
+        self._warm_thread.start()
+        return self._warm_thread
+
+    def uptime_seconds(self) -> float:
+        return round(time.perf_counter() - self.created_at, 3)
+
+    def readiness(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "uptime_seconds": self.uptime_seconds(),
+            "cold_start_seconds": self.cold_start_seconds,
+            "components": {name: c.status() for name, c in self.components.items()},
+        }
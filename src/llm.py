@@ -1,57 +1,295 @@
 import os
-import google.generativeai as genai
+import time
+import asyncio
+import logging
 from dotenv import load_dotenv
 from src.prompts import SYSTEM_PROMPT
 
 load_dotenv()
 
+# Imported after load_dotenv(): backend selection reads LLM_BACKEND / LLM_MODEL
+from src.llm_backends import get_backend, resolve_model
+from src.token_count import count_tokens, count_tokens_cached, tokenizer_name
+from src.singleflight import SingleFlight
+from src.llm_scheduler import LLMScheduler, LLMOverloaded, PRIORITY_INTERACTIVE
+from src.hedging import Hedger
+from src.llm_telemetry import LLMTelemetry, answer_kind
+
+log = logging.getLogger(__name__)
+
 # -----------------------------
 # CONFIG
 # -----------------------------
-DEFAULT_MODEL = "gemini-2.5-flash"
+# Backend and model are chosen by LLM_BACKEND / LLM_MODEL (see llm_backends.py)
 FALLBACK_RESPONSE = "I'm sorry, but I couldn't process your request at this time."
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))  # seconds per LLM request
+
+LLM_EXPECTED_OUTPUT_TOKENS = int(os.getenv("LLM_EXPECTED_OUTPUT_TOKENS", "300"))  # for the TPM budget
 
-# Load your API key from environment variable or replace with your actual key
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+# Identical concurrent completions (same backend, model and final prompt) share one upstream call
+llm_flight = SingleFlight()
+# Concurrency / tokens-per-minute governor with interactive-before-background queueing
+llm_scheduler = LLMScheduler()
+# Duplicate async calls that run past the p95 latency (LLM_HEDGE=1), when there is spare capacity
+llm_hedger = Hedger(can_hedge=llm_scheduler.has_idle_capacity)
+# One record per call: wall / queue time, tokens, model, caller tag, outcome (see llm_telemetry.py)
+llm_telemetry = LLMTelemetry()
 
 # -----------------------------
 # LLM WRAPPER
 # -----------------------------
-def call_llm(messages: list, model: str = DEFAULT_MODEL) -> str:
-    try:
-        model_instance = genai.GenerativeModel(model)
+def _build_messages(messages: list):
+    """Apply SYSTEM_PROMPT; returns (messages, prompt token count)."""
+    # If system message exists, append instruction, else insert it
+    # We use the detailed SYSTEM_PROMPT now
+    if messages and messages[0]["role"] == "system":
+        messages[0]["content"] = SYSTEM_PROMPT + "\n\n" + messages[0]["content"]
+    else:
+        messages.insert(0, {"role": "system", "content": SYSTEM_PROMPT})
+
+    # LOGGING (Internal): input tokens drive latency and cost
+    prompt_tokens = count_tokens_cached(SYSTEM_PROMPT) + sum(
+        count_tokens(m["content"][len(SYSTEM_PROMPT):] if i == 0 else m["content"])
+        for i, m in enumerate(messages)
+    )
+    return messages, prompt_tokens
+
+
+def _flight_key(backend, model: str, messages: list) -> str:
+    return SingleFlight.make_key(backend.name, model, messages)
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 1)
+
+
+def _outcome(error: BaseException) -> str:
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+        return "timeout"
+    if isinstance(error, LLMOverloaded):
+        return "overloaded"
+    if isinstance(error, GeneratorExit):
+        return "closed"  # the consumer stopped reading the stream
+    if isinstance(error, asyncio.CancelledError):
+        return "cancelled"
+    return "error"
+
 
-        # If system message exists, append instruction, else insert it
-        # We use the detailed SYSTEM_PROMPT now
-        if messages and messages[0]["role"] == "system":
-            messages[0]["content"] = SYSTEM_PROMPT + "\n\n" + messages[0]["content"]
+class _Trace:
+    """Collects the llm_telemetry entry for one call."""
+
+    def __init__(self, caller: str, mode: str):
+        self.start = time.perf_counter()
+        self.upstream = False  # False: the call shared another caller's in-flight request
+        self.fields = {"caller": caller, "mode": mode, "backend": None, "model": None,
+                       "prompt_tokens": None, "queue_ms": None, "first_token_ms": None}
+
+    def prepared(self, backend, model: str, prompt_tokens: int):
+        self.fields.update(backend=backend.name, model=model, prompt_tokens=prompt_tokens)
+
+    def admitted(self, queued_at: float):
+        """Called once a scheduler slot is granted (the first attempt counts when hedged)."""
+        self.upstream = True
+        if self.fields["queue_ms"] is None:
+            self.fields["queue_ms"] = _ms(time.perf_counter() - queued_at)
+
+    def first_token(self):
+        if self.fields["first_token_ms"] is None:
+            self.fields["first_token_ms"] = _ms(time.perf_counter() - self.start)
+
+    def finish(self, text: str = None, error: BaseException = None):
+        entry = llm_telemetry.record(
+            **self.fields,
+            outcome="ok" if error is None else _outcome(error),
+            error=type(error).__name__ if error is not None else None,
+            wall_ms=_ms(time.perf_counter() - self.start),
+            completion_tokens=count_tokens(text) if text else None,
+            coalesced=self.fields["backend"] is not None and not self.upstream,
+            answer_kind=answer_kind(text) if text else None,
+        )
+        if error is None:
+            log.info("LLM %s caller=%s model=%s wall=%sms queue=%sms tokens=%s+%s (%s)",
+                     entry["mode"], entry["caller"], entry["model"], entry["wall_ms"], entry["queue_ms"],
+                     entry["prompt_tokens"], entry["completion_tokens"], tokenizer_name())
         else:
-            messages.insert(0, {"role": "system", "content": SYSTEM_PROMPT})
-
-        # Convert structured messages into prompt
-        prompt = "\n".join([f"{m['role'].upper()}: {m['content']}" for m in messages])
-        
-        response = model_instance.generate_content(prompt)
-        response_text = response.text.strip()
-        
-        # LOGGING (Internal)
-        # In a real app, use a proper logger. Printing for now as requested.
-        print(f"\n[LLM Response Log] Length: {len(response_text)} chars")
-        if "I can calculate" in response_text or "once I know" in response_text:
-             print("[LLM Log] Partial/Conditional Answer detected.")
-        if "?" in response_text and len(response_text.split()) < 50:
-             print("[LLM Log] Asking clarifying question.")
+            log.warning("LLM %s caller=%s failed after %sms: %s: %s",
+                        entry["mode"], entry["caller"], entry["wall_ms"], entry["outcome"], error)
+
+
+def call_llm(messages: list, model: str = None, timeout: float = None, priority: int = PRIORITY_INTERACTIVE,
+             caller: str = "chat") -> str:
+    """caller tags the pipeline stage in llm_telemetry (chat, fallback, calc_explanation, fd_rates, ...)."""
+    timeout = LLM_TIMEOUT if timeout is None else timeout
+    deadline = time.monotonic() + timeout
+    trace = _Trace(caller, "call")
+    try:
+        backend = get_backend()
+        model = resolve_model(backend, model)
+        messages, prompt_tokens = _build_messages(messages)
+        trace.prepared(backend, model, prompt_tokens)
+
+        def upstream():
+            queued_at = time.perf_counter()
+            with llm_scheduler.slot(priority, prompt_tokens + LLM_EXPECTED_OUTPUT_TOKENS, deadline):
+                trace.admitted(queued_at)
+                return backend.generate(messages, model, max(deadline - time.monotonic(), 0.001))
+
+        response_text = llm_flight.do(_flight_key(backend, model, messages), upstream).strip()
+        trace.finish(response_text)
 
         return response_text
     except Exception as e:
-        print(f"[LLM ERROR] {e}")
+        trace.finish(error=e)
         return FALLBACK_RESPONSE
 
 
+async def acall_llm(messages: list, model: str = None, timeout: float = None,
+                    priority: int = PRIORITY_INTERACTIVE, caller: str = "chat") -> str:
+    """
+    Async call_llm(): awaits the model on the event loop instead of holding a
+    worker thread for the round trip. Cancelling the awaiting task cancels
+    the underlying request (once no other caller shares it); timeouts,
+    including time spent queued in llm_scheduler, return FALLBACK_RESPONSE.
+    """
+    timeout = LLM_TIMEOUT if timeout is None else timeout
+    deadline = time.monotonic() + timeout
+    trace = _Trace(caller, "acall")
+    try:
+        backend = get_backend()
+        model = resolve_model(backend, model)
+        messages, prompt_tokens = _build_messages(messages)
+        trace.prepared(backend, model, prompt_tokens)
+
+        async def attempt():
+            queued_at = time.perf_counter()
+            async with llm_scheduler.aslot(priority, prompt_tokens + LLM_EXPECTED_OUTPUT_TOKENS, deadline):
+                trace.admitted(queued_at)
+                return await backend.agenerate(messages, model, max(deadline - time.monotonic(), 0.001))
+
+        async def upstream():
+            return await llm_hedger.run(attempt)
+
+        response_text = await asyncio.wait_for(
+            llm_flight.ado(_flight_key(backend, model, messages), upstream),
+            timeout,
+        )
+        response_text = response_text.strip()
+        trace.finish(response_text)
+
+        return response_text
+    except asyncio.CancelledError as e:
+        trace.finish(error=e)
+        raise
+    except Exception as e:
+        trace.finish(error=e)
+        return FALLBACK_RESPONSE
+
+
+def stream_llm(messages: list, model: str = None, priority: int = PRIORITY_INTERACTIVE, caller: str = "chat"):
+    """
+    Streaming variant of call_llm(): yields text chunks as the model produces
+    them. Yields FALLBACK_RESPONSE if the call fails before any text arrived.
+    The scheduler slot is held until the stream ends or is closed.
+    """
+    produced = []
+    deadline = time.monotonic() + LLM_TIMEOUT
+    trace = _Trace(caller, "stream")
+    try:
+        backend = get_backend()
+        model = resolve_model(backend, model)
+        messages, prompt_tokens = _build_messages(messages)
+        trace.prepared(backend, model, prompt_tokens)
+        queued_at = time.perf_counter()
+        with llm_scheduler.slot(priority, prompt_tokens + LLM_EXPECTED_OUTPUT_TOKENS, deadline):
+            trace.admitted(queued_at)
+            for text in backend.stream(messages, model, LLM_TIMEOUT):
+                if text:
+                    trace.first_token()
+                    produced.append(text)
+                    yield text
+        trace.finish("".join(produced))
+    except GeneratorExit as e:
+        trace.finish("".join(produced), error=e)
+        raise
+    except Exception as e:
+        trace.finish("".join(produced), error=e)
+        if not produced:
+            yield FALLBACK_RESPONSE
+
+
+async def astream_llm(messages: list, model: str = None, priority: int = PRIORITY_INTERACTIVE,
+                      caller: str = "chat"):
+    """Async stream_llm(). Closing the generator (e.g. client disconnect) cancels the request."""
+    produced = []
+    deadline = time.monotonic() + LLM_TIMEOUT
+    trace = _Trace(caller, "astream")
+    try:
+        backend = get_backend()
+        model = resolve_model(backend, model)
+        messages, prompt_tokens = _build_messages(messages)
+        trace.prepared(backend, model, prompt_tokens)
+        queued_at = time.perf_counter()
+        async with llm_scheduler.aslot(priority, prompt_tokens + LLM_EXPECTED_OUTPUT_TOKENS, deadline):
+            trace.admitted(queued_at)
+            async for text in backend.astream(messages, model, LLM_TIMEOUT):
+                if text:
+                    trace.first_token()
+                    produced.append(text)
+                    yield text
+        trace.finish("".join(produced))
+    except (GeneratorExit, asyncio.CancelledError) as e:
+        trace.finish("".join(produced), error=e)
+        raise
+    except Exception as e:
+        trace.finish("".join(produced), error=e)
+        if not produced:
+            yield FALLBACK_RESPONSE
+
 
 def shorten_answer(answer: str, max_sentences: int = 3) -> str:
     sentences = answer.split(". ")
-    return ". ".join(sentences[:max_sentences]).strip() + "."
+    text = ". ".join(sentences[:max_sentences]).strip()
+    # Terminate the last sentence unless the answer already does ("...months." must not become "..")
+    return text if text.endswith((".", "!", "?")) else text + "."
+
+
+class SentenceLimiter:
+    """
+    Incremental shorten_answer() for streamed output.
+
+    feed() returns the next piece of text that is safe to show; once the
+    sentence limit is crossed, `done` is set and the caller can stop reading
+    the stream. The concatenation of everything returned by feed() and
+    finish() always equals shorten_answer(full_text, max_sentences).
+    """
+
+    def __init__(self, max_sentences: int = 3):
+        self.max_sentences = max_sentences
+        self.buffer = ""
+        self.emitted = 0
+        self.done = False
+        self.text = ""
+
+    def feed(self, chunk: str) -> str:
+        if self.done:
+            return ""
+        self.buffer += chunk
+        if len(self.buffer.split(". ")) > self.max_sentences:
+            return self.finish()
+        # Hold back trailing whitespace: it is stripped if the answer ends here
+        safe = self.buffer.strip()
+        out = safe[self.emitted:]
+        self.emitted = max(self.emitted, len(safe))
+        return out
+
+    def finish(self) -> str:
+        """Return whatever remains of the shortened answer and mark the stream complete."""
+        if not self.done:
+            self.text = shorten_answer(self.buffer, self.max_sentences)
+            self.done = True
+        out = self.text[self.emitted:]
+        self.emitted = len(self.text)
+        return out
 
 # -----------------------------
 # TEST RUN
@@ -0,0 +1,288 @@
+"""
+Pluggable LLM backends behind call_llm() / acall_llm() / stream_llm().
+
+A backend turns a list of chat messages into text, blocking or async, whole
+or streamed. The active one is chosen by LLM_BACKEND:
+
+- gemini: google.generativeai (default); GEMINI_API_KEY
+- openai: OpenAI chat completions; OPENAI_API_KEY
+- stub:   offline, deterministic responses with simulated latency, for
+          load tests and benchmarks of the full /chat pipeline
+
+Stub settings (environment):
+    STUB_RESPONSE        "canned" (default) or "echo"
+    STUB_RESPONSES_FILE  JSON list of canned answers (picked by prompt hash)
+    STUB_LATENCY_MS      mean latency of a completion (default 300)
+    STUB_JITTER_MS       spread around the mean (default 100)
+    STUB_LATENCY_DIST    fixed | uniform | normal | lognormal (default lognormal)
+    STUB_SEED            seed for the latency sampler (default 0)
+
+Other backends can be added with register_backend(name, cls).
+"""
+
+import os
+import json
+import math
+import time
+import random
+import asyncio
+import hashlib
+import threading
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+LLM_MODEL = os.getenv("LLM_MODEL")  # overrides the backend's default model
+
+
+class LLMBackend:
+    """Base class. Subclasses implement generate/agenerate; streaming defaults to one chunk."""
+
+    name = "base"
+    default_model = None
+
+    def generate(self, messages: List[dict], model: str, timeout: float) -> str:
+        raise NotImplementedError
+
+    async def agenerate(self, messages: List[dict], model: str, timeout: float) -> str:
+        raise NotImplementedError
+
+    def stream(self, messages: List[dict], model: str, timeout: float) -> Iterator[str]:
+        yield self.generate(messages, model, timeout)
+
+    async def astream(self, messages: List[dict], model: str, timeout: float) -> AsyncIterator[str]:
+        yield await self.agenerate(messages, model, timeout)
+
+
+def _join_messages(messages: List[dict]) -> str:
+    # Gemini takes a single prompt: "ROLE: content" lines
+    return "\n".join([f"{m['role'].upper()}: {m['content']}" for m in messages])
+
+
+# -----------------------------
+# Gemini
+# -----------------------------
+class GeminiBackend(LLMBackend):
+    name = "gemini"
+    default_model = "gemini-2.5-flash"
+
+    def __init__(self):
+        import google.generativeai as genai
+
+        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+        self._genai = genai
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def model(self, name: str):
+        """
+        Shared GenerativeModel handle per model name. Every handle uses the
+        library's process-wide gRPC clients (one HTTP/2 channel for sync and
+        one for async calls), so requests reuse pooled connections.
+        """
+        with self._lock:
+            if name not in self._models:
+                self._models[name] = self._genai.GenerativeModel(name)
+            return self._models[name]
+
+    def generate(self, messages, model, timeout):
+        response = self.model(model).generate_content(
+            _join_messages(messages), request_options={"timeout": timeout}
+        )
+        return response.text
+
+    async def agenerate(self, messages, model, timeout):
+        response = await self.model(model).generate_content_async(
+            _join_messages(messages), request_options={"timeout": timeout}
+        )
+        return response.text
+
+    def stream(self, messages, model, timeout):
+        for chunk in self.model(model).generate_content(
+            _join_messages(messages), stream=True, request_options={"timeout": timeout}
+        ):
+            yield chunk.text
+
+    async def astream(self, messages, model, timeout):
+        response = await self.model(model).generate_content_async(
+            _join_messages(messages), stream=True, request_options={"timeout": timeout}
+        )
+        async for chunk in response:
+            yield chunk.text
+
+
+# -----------------------------
+# OpenAI
+# -----------------------------
+class OpenAIBackend(LLMBackend):
+    name = "openai"
+    default_model = "gpt-4o-mini"
+
+    def __init__(self):
+        import openai
+
+        # One client each; both keep a pooled httpx connection pool
+        self._client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self._aclient = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+    def generate(self, messages, model, timeout):
+        response = self._client.chat.completions.create(model=model, messages=messages, timeout=timeout)
+        return response.choices[0].message.content or ""
+
+    async def agenerate(self, messages, model, timeout):
+        response = await self._aclient.chat.completions.create(model=model, messages=messages, timeout=timeout)
+        return response.choices[0].message.content or ""
+
+    def stream(self, messages, model, timeout):
+        for chunk in self._client.chat.completions.create(
+            model=model, messages=messages, timeout=timeout, stream=True
+        ):
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def astream(self, messages, model, timeout):
+        stream = await self._aclient.chat.completions.create(
+            model=model, messages=messages, timeout=timeout, stream=True
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+# -----------------------------
+# Offline stub
+# -----------------------------
+DEFAULT_CANNED = [
+    "A SIP lets you invest a fixed amount in a mutual fund every month, which averages out your purchase cost over time. "
+    "Start with an amount you can sustain and increase it as your income grows. "
+    "Keep an emergency fund of 3-6 months of expenses before investing in equity.",
+    "An emergency fund should cover 3-6 months of essential expenses. "
+    "Keep it in a savings account, liquid fund or short fixed deposit so it is available immediately. "
+    "Build it before taking on market-linked investments.",
+    "Equity can grow faster than inflation over long periods but can fall sharply in the short term. "
+    "Invest money you will not need for at least 5 years. "
+    "Diversified index or flexi-cap funds are a simple starting point.",
+]
+
+
+class StubBackend(LLMBackend):
+    """
+    Deterministic offline backend. The answer depends only on the prompt
+    (canned answer chosen by prompt hash, or an echo of the last user
+    message); latency is drawn from a seeded distribution, so runs are
+    reproducible.
+    """
+
+    name = "stub"
+    default_model = "stub"
+
+    def __init__(self, mode=None, responses=None, latency_ms=None, jitter_ms=None, dist=None, seed=None):
+        self.mode = mode or os.getenv("STUB_RESPONSE", "canned")
+        if responses is None:
+            path = os.getenv("STUB_RESPONSES_FILE")
+            if path:
+                with open(path, "r", encoding="utf-8") as f:
+                    responses = json.load(f)
+        self.responses = responses or DEFAULT_CANNED
+        self.latency_ms = float(os.getenv("STUB_LATENCY_MS", "300") if latency_ms is None else latency_ms)
+        self.jitter_ms = float(os.getenv("STUB_JITTER_MS", "100") if jitter_ms is None else jitter_ms)
+        self.dist = dist or os.getenv("STUB_LATENCY_DIST", "lognormal")
+        self._rng = random.Random(int(os.getenv("STUB_SEED", "0")) if seed is None else seed)
+        self._lock = threading.Lock()
+
+    def sample_latency(self) -> float:
+        """One simulated completion latency, in seconds."""
+        mean, spread = self.latency_ms, self.jitter_ms
+        with self._lock:
+            if self.dist == "fixed" or spread <= 0:
+                ms = mean
+            elif self.dist == "uniform":
+                ms = self._rng.uniform(mean - spread, mean + spread)
+            elif self.dist == "normal":
+                ms = self._rng.gauss(mean, spread)
+            elif self.dist == "lognormal":
+                # Parameterised so the distribution has the given mean and std (long right tail)
+                sigma2 = math.log(1 + (spread / mean) ** 2) if mean > 0 else 0.0
+                mu = math.log(mean) - sigma2 / 2 if mean > 0 else 0.0
+                ms = self._rng.lognormvariate(mu, sigma2 ** 0.5)
+            else:
+                raise ValueError(f"Unknown STUB_LATENCY_DIST: {self.dist}")
+        return max(ms, 0.0) / 1000
+
+    def respond(self, messages: List[dict]) -> str:
+        last_user = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+        if self.mode == "echo":
+            return f"ECHO: {last_user}"
+        digest = hashlib.sha256(_join_messages(messages).encode("utf-8")).digest()
+        return self.responses[int.from_bytes(digest[:4], "big") % len(self.responses)]
+
+    def generate(self, messages, model, timeout):
+        latency = self.sample_latency()
+        time.sleep(min(latency, timeout))
+        if latency > timeout:
+            raise TimeoutError(f"stub latency {latency:.3f}s exceeded timeout {timeout}s")
+        return self.respond(messages)
+
+    async def agenerate(self, messages, model, timeout):
+        latency = self.sample_latency()
+        await asyncio.sleep(min(latency, timeout))
+        if latency > timeout:
+            raise TimeoutError(f"stub latency {latency:.3f}s exceeded timeout {timeout}s")
+        return self.respond(messages)
+
+    def _chunks(self, text):
+        words = text.split(" ")
+        return [w + (" " if i < len(words) - 1 else "") for i, w in enumerate(words)]
+
+    def stream(self, messages, model, timeout):
+        chunks = self._chunks(self.respond(messages))
+        delay = min(self.sample_latency(), timeout) / len(chunks)
+        for chunk in chunks:
+            time.sleep(delay)
+            yield chunk
+
+    async def astream(self, messages, model, timeout):
+        chunks = self._chunks(self.respond(messages))
+        delay = min(self.sample_latency(), timeout) / len(chunks)
+        for chunk in chunks:
+            await asyncio.sleep(delay)
+            yield chunk
+
+
+# -----------------------------
+# Registry
+# -----------------------------
+BACKENDS: Dict[str, type] = {
+    "gemini": GeminiBackend,
+    "openai": OpenAIBackend,
+    "stub": StubBackend,
+}
+
+_instances: Dict[str, LLMBackend] = {}
+_instances_lock = threading.Lock()
+
+
+def register_backend(name: str, cls: type):
+    BACKENDS[name] = cls
+
+
+def get_backend(name: Optional[str] = None) -> LLMBackend:
+    """Shared backend instance by name (defaults to LLM_BACKEND)."""
+    name = name or LLM_BACKEND
+    with _instances_lock:
+        if name not in _instances:
+            if name not in BACKENDS:
+                raise ValueError(f"Unknown LLM backend: {name} (expected one of {sorted(BACKENDS)})")
+            _instances[name] = BACKENDS[name]()
+        return _instances[name]
+
+
+def set_backend(backend: LLMBackend):
+    """Install a backend instance as the default (e.g. a StubBackend configured in a test)."""
+    global LLM_BACKEND
+    with _instances_lock:
+        _instances[backend.name] = backend
+        LLM_BACKEND = backend.name
+
+
+def resolve_model(backend: LLMBackend, model: Optional[str]) -> str:
+    return model or LLM_MODEL or backend.default_model
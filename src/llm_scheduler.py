@@ -0,0 +1,279 @@
+"""
+Admission control for upstream LLM calls.
+
+Every completion (call_llm / acall_llm / stream_llm / astream_llm) takes a
+slot from the scheduler before it reaches the backend:
+
+- at most LLM_MAX_CONCURRENCY calls run at once
+- a token bucket caps estimated input + output tokens per minute
+  (LLM_TOKENS_PER_MINUTE; 0 disables it)
+- waiters queue by priority (interactive /chat answers before background
+  work such as FD-rate revalidation), FIFO within a priority
+- the queue is bounded (LLM_MAX_QUEUE); when it is full an interactive
+  request displaces the newest background one, otherwise the newcomer is
+  rejected immediately
+- a waiter whose deadline passes is dropped instead of being sent late
+
+Rejected and dropped calls raise LLMOverloaded, which call_llm turns into
+FALLBACK_RESPONSE, so overload costs one fast fallback instead of a pile of
+upstream 429s and timeouts. Sync callers block on a threading.Event, async
+callers await a future; both share the same queue.
+"""
+
+import os
+import time
+import heapq
+import asyncio
+import threading
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+PRIORITY_NAMES = {PRIORITY_INTERACTIVE: "interactive", PRIORITY_BACKGROUND: "background"}
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "0"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "256"))
+WAIT_SAMPLES = 2048  # recent queue waits kept per priority for percentiles
+
+
+class LLMOverloaded(Exception):
+    """The scheduler rejected or dropped a call (queue full or deadline passed)."""
+
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "tokens", "deadline", "enqueued", "state", "reason",
+                 "event", "loop", "future")
+
+    def __init__(self, priority, seq, tokens, deadline):
+        self.priority = priority
+        self.seq = seq
+        self.tokens = tokens
+        self.deadline = deadline
+        self.enqueued = time.monotonic()
+        self.state = "queued"  # queued -> granted | rejected | abandoned
+        self.reason = None
+        self.event = None
+        self.loop = None
+        self.future = None
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+    def notify(self):
+        if self.future is not None:
+            self.loop.call_soon_threadsafe(self._resolve_future)
+        else:
+            self.event.set()
+
+    def _resolve_future(self):
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class LLMScheduler:
+    def __init__(self, max_concurrency=LLM_MAX_CONCURRENCY, tokens_per_minute=LLM_TOKENS_PER_MINUTE,
+                 max_queue=LLM_MAX_QUEUE):
+        self.max_concurrency = max_concurrency
+        self.tokens_per_minute = tokens_per_minute
+        self.max_queue = max_queue
+
+        self._lock = threading.Lock()
+        self._heap = []
+        self._queued = 0
+        self._seq = 0
+        self._running = 0
+        self._tokens = float(tokens_per_minute)
+        self._refilled_at = time.monotonic()
+        self._timer = None
+
+        self._waits = {p: deque(maxlen=WAIT_SAMPLES) for p in PRIORITY_NAMES}
+        self.admitted = {p: 0 for p in PRIORITY_NAMES}
+        self.rejected = {p: 0 for p in PRIORITY_NAMES}
+        self.dropped = {p: 0 for p in PRIORITY_NAMES}
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    @contextmanager
+    def slot(self, priority=PRIORITY_INTERACTIVE, tokens=0, deadline: Optional[float] = None):
+        """Block until the call may run. deadline is a time.monotonic() value."""
+        waiter = self._enqueue(priority, tokens, deadline, asynchronous=False)
+        if waiter.state == "queued":
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            waiter.event.wait(timeout)
+        self._settle(waiter)
+        try:
+            yield
+        finally:
+            self._release()
+
+    @asynccontextmanager
+    async def aslot(self, priority=PRIORITY_INTERACTIVE, tokens=0, deadline: Optional[float] = None):
+        """Async slot(). Cancelling the waiting task removes it from the queue."""
+        waiter = self._enqueue(priority, tokens, deadline, asynchronous=True)
+        if waiter.state == "queued":
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+            except asyncio.TimeoutError:
+                pass
+            except asyncio.CancelledError:
+                self._abandon(waiter)
+                raise
+        self._settle(waiter)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def has_idle_capacity(self) -> bool:
+        """True when a new call would start immediately (used to gate optional work such as hedges)."""
+        with self._lock:
+            return self._queued == 0 and self._running < self.max_concurrency
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refill()
+            by_priority = {}
+            for p, name in PRIORITY_NAMES.items():
+                waits = np.asarray(self._waits[p]) * 1000
+                by_priority[name] = {
+                    "queued": sum(1 for w in self._heap if w.priority == p and w.state == "queued"),
+                    "admitted": self.admitted[p],
+                    "rejected": self.rejected[p],
+                    "dropped_deadline": self.dropped[p],
+                    "wait_p50_ms": round(float(np.percentile(waits, 50)), 2) if len(waits) else 0.0,
+                    "wait_p95_ms": round(float(np.percentile(waits, 95)), 2) if len(waits) else 0.0,
+                }
+            return {
+                "max_concurrency": self.max_concurrency,
+                "running": self._running,
+                "queue_depth": self._queued,
+                "max_queue": self.max_queue,
+                "tokens_per_minute": self.tokens_per_minute,
+                "tokens_available": round(self._tokens) if self.tokens_per_minute else None,
+                "by_priority": by_priority,
+            }
+
+    # -----------------------------
+    # Internals (_reject, _refill, _dispatch expect self._lock to be held)
+    # -----------------------------
+    def _enqueue(self, priority, tokens, deadline, asynchronous):
+        waiter = _Waiter(priority, 0, tokens, deadline)
+        if asynchronous:
+            waiter.loop = asyncio.get_running_loop()
+            waiter.future = waiter.loop.create_future()
+        else:
+            waiter.event = threading.Event()
+
+        with self._lock:
+            self._seq += 1
+            waiter.seq = self._seq
+            if self.tokens_per_minute and tokens > self.tokens_per_minute:
+                tokens = waiter.tokens = self.tokens_per_minute  # would never fit otherwise
+
+            if self._queued >= self.max_queue:
+                victim = max((w for w in self._heap if w.state == "queued"), default=None)
+                if victim is None or victim.priority <= priority:
+                    waiter.state = "rejected"
+                    waiter.reason = "LLM queue full"
+                    self.rejected[priority] += 1
+                    return waiter
+                self._reject(victim, "displaced by higher-priority request")
+
+            heapq.heappush(self._heap, waiter)
+            self._queued += 1
+            self._dispatch()
+        return waiter
+
+    def _settle(self, waiter):
+        """Turn the waiter's final state into a slot or an LLMOverloaded."""
+        with self._lock:
+            if waiter.state == "queued":
+                # Woken by its deadline, not by a grant
+                self._queued -= 1
+                waiter.state = "rejected"
+                waiter.reason = "deadline passed while queued"
+                self.dropped[waiter.priority] += 1
+            if waiter.state != "granted":
+                raise LLMOverloaded(waiter.reason)
+
+    def _abandon(self, waiter):
+        with self._lock:
+            if waiter.state == "queued":
+                self._queued -= 1
+                waiter.state = "abandoned"
+            elif waiter.state == "granted":
+                # Granted just as the caller went away: hand the slot back
+                waiter.state = "abandoned"
+                self._running -= 1
+                self._dispatch()
+
+    def _release(self):
+        with self._lock:
+            self._running -= 1
+            self._dispatch()
+
+    def _reject(self, waiter, reason):
+        waiter.state = "rejected"
+        waiter.reason = reason
+        self._queued -= 1
+        self.rejected[waiter.priority] += 1
+        waiter.notify()
+
+    def _refill(self):
+        if not self.tokens_per_minute:
+            return
+        now = time.monotonic()
+        self._tokens = min(
+            float(self.tokens_per_minute),
+            self._tokens + (now - self._refilled_at) * self.tokens_per_minute / 60.0,
+        )
+        self._refilled_at = now
+
+    def _dispatch(self):
+        self._refill()
+        now = time.monotonic()
+        while self._heap and self._running < self.max_concurrency:
+            head = self._heap[0]
+            if head.state != "queued":
+                heapq.heappop(self._heap)
+                continue
+            if head.deadline is not None and head.deadline <= now:
+                heapq.heappop(self._heap)
+                self._queued -= 1
+                head.state = "rejected"
+                head.reason = "deadline passed while queued"
+                self.dropped[head.priority] += 1
+                head.notify()
+                continue
+            if self.tokens_per_minute and head.tokens > self._tokens:
+                self._schedule_refill(head.tokens)
+                return
+            heapq.heappop(self._heap)
+            self._queued -= 1
+            self._tokens -= head.tokens if self.tokens_per_minute else 0
+            self._running += 1
+            head.state = "granted"
+            self._waits[head.priority].append(now - head.enqueued)
+            self.admitted[head.priority] += 1
+            head.notify()
+
+    def _schedule_refill(self, needed):
+        if self._timer is not None:
+            return
+        delay = (needed - self._tokens) * 60.0 / self.tokens_per_minute
+
+        def fire():
+            with self._lock:
+                self._timer = None
+                self._dispatch()
+
+        self._timer = threading.Timer(max(delay, 0.001), fire)
+        self._timer.daemon = True
+        self._timer.start()
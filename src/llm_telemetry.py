@@ -0,0 +1,127 @@
+"""
+Per-call telemetry for LLM invocations.
+
+call_llm / acall_llm / stream_llm / astream_llm record one entry per call:
+
+    {"ts": 1735689600.0, "caller": "chat", "mode": "acall", "backend": "gemini",
+     "model": "gemini-2.5-flash", "outcome": "ok", "error": None,
+     "wall_ms": 812.4, "queue_ms": 3.1, "first_token_ms": None,
+     "prompt_tokens": 642, "completion_tokens": 88, "coalesced": False,
+     "answer_kind": None}
+
+- caller: pipeline stage that made the call (chat, fallback, calc_explanation,
+  fd_rates, ...)
+- outcome: ok | timeout | overloaded | error | cancelled, or closed for a
+  stream the consumer stopped reading (e.g. once the answer was long enough)
+- queue_ms: time waiting for an llm_scheduler slot (None when the call
+  shared another caller's in-flight request)
+- answer_kind: "conditional" / "clarifying" heuristics on the answer text
+
+The last LLM_TELEMETRY_SAMPLES entries are kept in memory and summarised by
+stats() (per caller: outcomes, latency histogram and percentiles, tokens).
+Set LLM_TELEMETRY_JSONL to a file path to also append every entry there.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+LLM_TELEMETRY_SAMPLES = int(os.getenv("LLM_TELEMETRY_SAMPLES", "2048"))
+LLM_TELEMETRY_JSONL = os.getenv("LLM_TELEMETRY_JSONL", "")
+
+# Upper bounds (ms) of the wall-time histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+log = logging.getLogger(__name__)
+
+
+def answer_kind(text: str) -> Optional[str]:
+    """Rough shape of an answer: a conditional ("once I know...") or a clarifying question."""
+    if "I can calculate" in text or "once I know" in text:
+        return "conditional"
+    if "?" in text and len(text.split()) < 50:
+        return "clarifying"
+    return None
+
+
+def _percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"p50": None, "p95": None, "p99": None}
+    arr = np.asarray(values)
+    return {f"p{q}": round(float(np.percentile(arr, q)), 1) for q in (50, 95, 99)}
+
+
+def _histogram(values: List[float]) -> Dict[str, int]:
+    counts = np.bincount(np.searchsorted(LATENCY_BUCKETS_MS, values), minlength=len(LATENCY_BUCKETS_MS) + 1)
+    labels = [f"le_{b}" for b in LATENCY_BUCKETS_MS] + ["inf"]
+    return dict(zip(labels, (int(c) for c in counts)))
+
+
+class LLMTelemetry:
+    def __init__(self, maxlen=LLM_TELEMETRY_SAMPLES, jsonl_path=LLM_TELEMETRY_JSONL):
+        self._records = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self.jsonl_path = jsonl_path or None
+        self.total = 0
+
+    def record(self, **fields):
+        entry = {"ts": time.time(), **fields}
+        with self._lock:
+            self._records.append(entry)
+            self.total += 1
+            if self.jsonl_path:
+                try:
+                    with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(entry, default=str) + "\n")
+                except OSError as e:
+                    log.warning("LLM telemetry sink %s failed: %s", self.jsonl_path, e)
+        return entry
+
+    def recent(self, n: int = 20) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._records)[-n:] if n > 0 else []
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            records = list(self._records)
+        by_caller: Dict[str, list] = {}
+        for r in records:
+            by_caller.setdefault(r.get("caller") or "unknown", []).append(r)
+        return {
+            "recorded_total": self.total,
+            "window": len(records),
+            "jsonl_sink": self.jsonl_path,
+            "overall": self._summarize(records),
+            "by_caller": {caller: self._summarize(rs) for caller, rs in sorted(by_caller.items())},
+        }
+
+    @staticmethod
+    def _summarize(records: List[dict]) -> Dict[str, Any]:
+        outcomes: Dict[str, int] = {}
+        models: Dict[str, int] = {}
+        for r in records:
+            outcomes[r["outcome"]] = outcomes.get(r["outcome"], 0) + 1
+            models[r.get("model") or "unknown"] = models.get(r.get("model") or "unknown", 0) + 1
+        wall = [r["wall_ms"] for r in records]
+        queue = [r["queue_ms"] for r in records if r.get("queue_ms") is not None]
+        first = [r["first_token_ms"] for r in records if r.get("first_token_ms") is not None]
+        prompt = [r["prompt_tokens"] for r in records if r.get("prompt_tokens") is not None]
+        completion = [r["completion_tokens"] for r in records if r.get("completion_tokens") is not None]
+        return {
+            "calls": len(records),
+            "outcomes": outcomes,
+            "models": models,
+            "coalesced": sum(1 for r in records if r.get("coalesced")),
+            "wall_ms": _percentiles(wall),
+            "wall_ms_histogram": _histogram(wall),
+            "queue_ms": _percentiles(queue),
+            "first_token_ms": _percentiles(first),
+            "prompt_tokens_mean": round(float(np.mean(prompt)), 1) if prompt else None,
+            "completion_tokens_mean": round(float(np.mean(completion)), 1) if completion else None,
+        }
@@ -0,0 +1,137 @@
+"""
+Persistent store for realtime data, shared by all worker processes.
+
+One SQLite database (REALTIME_CACHE_DIR/realtime.sqlite3) in WAL mode:
+readers never block each other or the writer, so every uvicorn worker
+reads and writes the same entries, and they survive restarts and redeploys.
+
+    kv(namespace, key, value JSON, fetched_at, expires_at)
+
+Each namespace has its own retention (how long an entry is kept at all);
+freshness within that is decided by the caller (SWRCache's ttl / grace, the
+AMFI publication cycle). Expired rows are ignored on read and purged
+periodically.
+
+open_store(namespace, retention) returns a store with the SWRCache store
+interface, get(key) -> (value, fetched_at) | None and
+put(key, value, fetched_at). REALTIME_CACHE=memory swaps in a per-process
+MemoryStore instead (e.g. for tests or read-only file systems).
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from functools import lru_cache
+from typing import Any, Optional, Tuple
+
+from src.swr_cache import MemoryStore
+
+REALTIME_CACHE = os.getenv("REALTIME_CACHE", "sqlite")  # "sqlite" or "memory"
+REALTIME_CACHE_DIR = os.getenv("REALTIME_CACHE_DIR", "cache")
+DB_FILE = "realtime.sqlite3"
+PURGE_EVERY = 500  # writes between purges of expired rows
+
+log = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS kv (
+    namespace  TEXT NOT NULL,
+    key        TEXT NOT NULL,
+    value      TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+)
+"""
+
+
+class SQLiteCache:
+    """One database file; each thread gets its own connection."""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._writes = 0
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(SCHEMA)
+        self.purge()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")  # durable enough for a cache, and much faster in WAL
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+
+    def get(self, namespace: str, key: str) -> Optional[Tuple[Any, float]]:
+        row = self._connect().execute(
+            "SELECT value, fetched_at FROM kv WHERE namespace = ? AND key = ? AND expires_at > ?",
+            (namespace, key, time.time()),
+        ).fetchone()
+        return (json.loads(row[0]), row[1]) if row is not None else None
+
+    def put(self, namespace: str, key: str, value: Any, fetched_at: float, retention: float):
+        self._connect().execute(
+            "INSERT INTO kv (namespace, key, value, fetched_at, expires_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (namespace, key) DO UPDATE SET "
+            "value = excluded.value, fetched_at = excluded.fetched_at, expires_at = excluded.expires_at",
+            (namespace, key, json.dumps(value, ensure_ascii=False), fetched_at, fetched_at + retention),
+        )
+        self._writes += 1
+        if self._writes % PURGE_EVERY == 0:
+            self.purge()
+
+    def purge(self):
+        self._connect().execute("DELETE FROM kv WHERE expires_at <= ?", (time.time(),))
+
+    def stats(self) -> dict:
+        rows = self._connect().execute(
+            "SELECT namespace, COUNT(*) FROM kv WHERE expires_at > ? GROUP BY namespace", (time.time(),)
+        ).fetchall()
+        return {"path": self.path, "entries": dict(rows)}
+
+
+class SQLiteStore:
+    """One namespace of a SQLiteCache, with its retention."""
+
+    def __init__(self, db: SQLiteCache, namespace: str, retention: float):
+        self.db = db
+        self.namespace = namespace
+        self.retention = retention
+
+    def get(self, key) -> Optional[Tuple[Any, float]]:
+        try:
+            return self.db.get(self.namespace, str(key))
+        except sqlite3.Error as e:
+            log.warning("realtime cache read failed (%s/%s): %s", self.namespace, key, e)
+            return None
+
+    def put(self, key, value, fetched_at: float):
+        try:
+            self.db.put(self.namespace, str(key), value, fetched_at, self.retention)
+        except sqlite3.Error as e:
+            log.warning("realtime cache write failed (%s/%s): %s", self.namespace, key, e)
+
+
+@lru_cache(maxsize=None)
+def shared_db(directory: str = None) -> SQLiteCache:
+    return SQLiteCache(os.path.join(directory or REALTIME_CACHE_DIR, DB_FILE))
+
+
+def open_store(namespace: str, retention: float, maxsize: int = 1024):
+    """Persistent store for namespace, or a MemoryStore when REALTIME_CACHE=memory / the DB cannot be opened."""
+    if REALTIME_CACHE == "sqlite":
+        try:
+            return SQLiteStore(shared_db(), namespace, retention)
+        except (OSError, sqlite3.Error) as e:
+            log.warning("realtime cache unavailable, using memory: %s", e)
+    return MemoryStore(maxsize=maxsize)
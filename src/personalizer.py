@@ -1,4 +1,6 @@
+import re
 import textwrap
+from src.token_count import count_tokens, split_sentences
 
 RISK_TONE_MAP = {
     "low": "conservative",
@@ -6,24 +8,93 @@ RISK_TONE_MAP = {
     "high": "growth-oriented"
 }
 
-def make_prompt(query, docs, profile, context=None, max_docs=3, max_chars=1500):
+# Token budget for the whole user prompt (query, context, excerpts, instructions).
+# SYSTEM_PROMPT is added on top by call_llm.
+PROMPT_TOKEN_BUDGETS = {
+    "education": 450,
+    "short_term_goal": 600,
+    "long_term_investing": 600,
+    "affordability_planning": 600,
+}
+DEFAULT_PROMPT_TOKEN_BUDGET = 550
+
+
+def _normalize_sentence(sentence):
+    return re.sub(r"\W+", " ", sentence.lower()).strip()
+
+
+def _truncate_sentence(sentence, tag, budget):
+    """Cut sentence at the last word boundary whose rendered line fits in budget; returns (kept, cost)."""
+    words = sentence.split()
+    line = lambda n: f"  - {' '.join(words[:n])}...{tag}\n"
+    lo, hi = 0, len(words)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if count_tokens(line(mid)) <= budget:
+            lo = mid
+        else:
+            hi = mid - 1
+    if not lo:
+        return [], 0
+    return [" ".join(words[:lo]) + "..."], count_tokens(line(lo))
+
+
+def select_excerpts(docs, budget, max_docs=3):
+    """
+    Fit retrieved chunks into `budget` tokens.
+
+    docs arrive ranked best-first from Retriever.retrieve, so lower-ranked
+    chunks are trimmed first. Duplicate chunks and sentences already taken
+    from a higher-ranked chunk are dropped, and each chunk is cut at a
+    sentence boundary once the budget runs out. If even the top chunk's first
+    sentence does not fit, that sentence is cut at a word boundary instead.
+    """
+    excerpts = []
+    seen_chunks = set()
+    seen_sentences = set()
+    used = 0
+
+    for d in docs[:max_docs]:
+        chunk_key = (d.get("source"), d.get("chunk_id"))
+        if d.get("chunk_id") is not None and chunk_key in seen_chunks:
+            continue
+        seen_chunks.add(chunk_key)
+
+        tag = f" [source: {d['source']}]"
+        kept = []
+        line_cost = 0
+        for sentence in split_sentences(d["content"]):
+            norm = _normalize_sentence(sentence)
+            if not norm or norm in seen_sentences:
+                continue
+            # Cost of the whole rendered line, so joins and the source tag are counted
+            cost = count_tokens(f"  - {' '.join(kept + [sentence])}{tag}\n")
+            if used + cost > budget:
+                if not kept and not excerpts:
+                    # Never let a lower-ranked chunk stand in for the best one
+                    kept, line_cost = _truncate_sentence(sentence, tag, budget)
+                break
+            kept.append(sentence)
+            seen_sentences.add(norm)
+            line_cost = cost
+
+        if kept:
+            excerpts.append(f"- {' '.join(kept)}{tag}")
+            used += line_cost
+    return excerpts
+
+
+def make_prompt(query, docs, profile, context=None, intent=None, max_docs=3, budget=None):
     """
     Build a personalized prompt for the LLM.
     - query: str
-    - docs: list of {content, source, score}
+    - docs: list of {content, source, score}, ranked best-first
     - profile: dict (INTERNAL USE ONLY - never surfaced to user)
     - context: dict of accumulated conversation state
+    - intent: selects the token budget (PROMPT_TOKEN_BUDGETS) unless budget is given
     """
-    # Truncate docs to avoid token blowup
-    selected_docs = docs[:max_docs]
-    excerpts = []
-    char_count = 0
-    for d in selected_docs:
-        snippet = d["content"][:400]  # limit each excerpt
-        if char_count + len(snippet) > max_chars:
-            break
-        excerpts.append(f"- {snippet.strip()} [source: {d['source']}]")
-        char_count += len(snippet)
+    if budget is None:
+        budget = PROMPT_TOKEN_BUDGETS.get(intent, DEFAULT_PROMPT_TOKEN_BUDGET)
 
     # Format context if available
     context_str = ""
@@ -31,8 +102,9 @@ def make_prompt(query, docs, profile, context=None, max_docs=3, max_chars=1500):
         entries = [f"{k.replace('_', ' ').title()}: {v}" for k, v in context.items()]
         context_str = "KNOWN CONTEXT (Use this to avoid asking repeat questions):\n" + "\n".join(entries) + "\n\n"
 
-    prompt = f"""
-You are a financial assistant. Answer the query based on the retrieved documents and known context.
+    def render(excerpts):
+        prompt = f"""
+Answer the query based on the retrieved documents and known context.
 
 User query: "{query}"
 
@@ -45,14 +117,19 @@ Instructions:
 3. Add one actionable suggestion as a bullet point if appropriate.
 4. If the documents don't cover the topic, respond: 
    "The available information does not directly cover your query. Please consult a financial advisor."
-    """
-    return textwrap.dedent(prompt).strip()
+        """
+        return textwrap.dedent(prompt).strip()
+
+    # Whatever the template, query and context leave is available for excerpts
+    remaining = budget - count_tokens(render([]))
+    return render(select_excerpts(docs, max(remaining, 0), max_docs))
 
 
-def make_chat_messages(query, docs, profile, context=None, live_data=None):
+def make_chat_messages(query, docs, profile, context=None, live_data=None, intent=None, budget=None):
     """
     Convert into chat messages format (for OpenAI/Anthropic API).
     Optionally prepend a Live Data block if live_data is provided.
+    The role/persona comes from SYSTEM_PROMPT, which call_llm adds.
     """
     live_block = ""
     if live_data:
@@ -64,16 +141,18 @@ def make_chat_messages(query, docs, profile, context=None, live_data=None):
                 entries.append(f"[LIVE: {item['source']}] {item['bank']} rates (raw): {item.get('rates_raw')}")
             else:
                 entries.append(str(item))
-        live_block = "Live Data:\n" + "\n".join(entries) + "\n\n"
+        live_block = (
+            "Live Data:\n" + "\n".join(entries) + "\n\n"
+            "Use the LIVE DATA section first (trusted, current). Cite live items as [live:source].\n"
+            "If live data conflicts with KB documents, prefer live data for numeric values but still reference KB for context.\n\n"
+        )
 
-    prompt = (
-        live_block +
-        "Use the LIVE DATA section first (trusted, current). Cite live items as [live:source].\n"
-        "If live data conflicts with KB documents, prefer live data for numeric values but still reference KB for context.\n\n" +
-        make_prompt(query, docs, profile, context)
+    if budget is None:
+        budget = PROMPT_TOKEN_BUDGETS.get(intent, DEFAULT_PROMPT_TOKEN_BUDGET)
+    prompt = live_block + make_prompt(
+        query, docs, profile, context, intent=intent, budget=budget - count_tokens(live_block)
     )
     return [
-        {"role": "system", "content": "You are a helpful financial assistant."},
         {"role": "user", "content": prompt}
     ]
 
@@ -87,4 +166,4 @@ if __name__ == "__main__":
     profile = {"age": 28, "income_range": "6–10 LPA", "risk": "medium", "goal": "retirement"}
     query = "Should I invest in SIPs?"
 
-    print(make_prompt(query, dummy_docs, profile))
+    print(make_prompt(query, dummy_docs, profile, intent="long_term_investing"))
@@ -1,23 +1,33 @@
+import os
 import time
-import json
 import logging
 import requests
 import yfinance as yf
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from dateutil import tz
-from cachetools import TTLCache, cached
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
-from .llm import call_llm  # reuse Gemini wrapper
+from src.llm import call_llm, FALLBACK_RESPONSE  # reuse Gemini wrapper
+from src.llm_scheduler import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
+from src.fd_rates import (build_batch_prompt, parse_rate_table, unparsed_row, error_row, is_failed_row,
+                       FD_RATES_TTL, FD_RATES_GRACE, FD_RATES_NEGATIVE_TTL)
+from src.amfi import NAVStore, ISIN_RE, AMFI_BACKGROUND_REFRESH, AMFI_RETENTION
+from src.swr_cache import SWRCache
+from src.persistent_cache import open_store
 
 log = logging.getLogger(__name__)
 log.setLevel(logging.INFO)
 
-# caching
-STOCK_CACHE = TTLCache(maxsize=1024, ttl=30)      # 30 seconds for stock data
-FD_CACHE = TTLCache(maxsize=128, ttl=3600)        # 1 hour for FD rates
-MF_CACHE = TTLCache(maxsize=128, ttl=12 * 3600)   # 12 hours for MF NAV (updates daily after 9PM IST)
+# caching (stale-while-revalidate over the persistent realtime cache, see swr_cache.py / persistent_cache.py)
+STOCK_CACHE_TTL = int(os.getenv("STOCK_CACHE_TTL", "30"))       # seconds a quote is fresh
+STOCK_CACHE_GRACE = int(os.getenv("STOCK_CACHE_GRACE", "300"))  # then served stale while it is refreshed
+STOCK_CACHE_NEGATIVE_TTL = int(os.getenv("STOCK_CACHE_NEGATIVE_TTL", "10"))  # "no data" rows
+
+QUOTE_WORKERS = 8  # concurrent NSE requests in fetch_quotes (also the session's pool size)
+
+MF_ALTERNATIVES = 3  # other ranked scheme matches returned with a name-based NAV lookup
 
 class RealtimeFetcher:
     def __init__(self):
@@ -29,7 +39,20 @@ class RealtimeFetcher:
             "Referer": "https://www.nseindia.com/"
         })
         retries = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
-        self.session.mount("https://", HTTPAdapter(max_retries=retries))
+        self.session.mount("https://", HTTPAdapter(max_retries=retries, pool_maxsize=QUOTE_WORKERS))
+        self._quote_pool = ThreadPoolExecutor(max_workers=QUOTE_WORKERS, thread_name_prefix="nse-quote")
+        # Per-symbol quotes and per-bank FD rates; expired entries are served stale while refreshing.
+        # Entries are shared by all workers and survive restarts.
+        self.quote_cache = SWRCache("quotes", self._load_quotes, STOCK_CACHE_TTL, STOCK_CACHE_GRACE,
+                                    store=open_store("quotes", STOCK_CACHE_TTL + STOCK_CACHE_GRACE),
+                                    negative_ttl=STOCK_CACHE_NEGATIVE_TTL, is_failure=lambda q: q.get("price") is None)
+        self.fd_cache = SWRCache("fd_rates", self._load_fd_rates, FD_RATES_TTL, FD_RATES_GRACE,
+                                 store=open_store("fd_rates", FD_RATES_TTL + FD_RATES_GRACE),
+                                 negative_ttl=FD_RATES_NEGATIVE_TTL, is_failure=is_failed_row)
+        # AMFI NAVs, refreshed after the daily publication
+        self.nav_store = NAVStore(self.session, store=open_store("amfi_nav", AMFI_RETENTION))
+        if AMFI_BACKGROUND_REFRESH:
+            self.nav_store.start()
         self._bootstrap_session()
 
     def _bootstrap_session(self):
@@ -43,12 +66,38 @@ class RealtimeFetcher:
     # -------------------------
     # Stocks
     # -------------------------
-    @cached(STOCK_CACHE)
     def fetch_stock_price(self, symbol: str):
-        symbol = symbol.strip().upper()
-        timestamp = datetime.now(tz=tz.tzlocal()).isoformat()
+        return self.fetch_quotes([symbol])[0]
+
+    def fetch_quotes(self, symbols):
+        """
+        Quotes for several symbols, in the order given, each with "freshness"
+        metadata. Served from quote_cache; symbols that are missing are loaded
+        with _load_quotes() in one batch.
+        """
+        symbols = list(dict.fromkeys(s.strip().upper() for s in symbols if s and s.strip()))
+        quotes = self.quote_cache.get_many(symbols)
+        return [quotes.get(s) or self._no_quote(s) for s in symbols]
+
+    def _load_quotes(self, symbols, background=False):
+        """NSE requests run concurrently; NSE misses go to yfinance in one batched download."""
+        fetched = dict(zip(symbols, self._quote_pool.map(self._nse_quote, symbols)))
+        fallback = [s for s in symbols if fetched[s] is None]
+        if fallback:
+            fetched.update(self._yf_quotes(fallback))
+        return {s: fetched.get(s) or self._no_quote(s) for s in symbols}
+
+    @staticmethod
+    def _quote(symbol, price, source):
+        return {
+            "ticker": symbol,
+            "price": price,
+            "currency": "INR",
+            "timestamp": datetime.now(tz=tz.tzlocal()).isoformat(),
+            "source": source
+        }
 
-        # 1) NSE API
+    def _nse_quote(self, symbol):
         try:
             url = f"https://www.nseindia.com/api/quote-equity?symbol={symbol}"
             resp = self.session.get(url, timeout=8)
@@ -58,136 +107,96 @@ class RealtimeFetcher:
                     price_info = data.get("priceInfo") or {}
                     ltp = price_info.get("lastPrice")
                     if ltp is not None:
-                        return {
-                            "ticker": symbol,
-                            "price": float(ltp),
-                            "currency": "INR",
-                            "timestamp": timestamp,
-                            "source": "nseindia"
-                        }
+                        return self._quote(symbol, float(ltp), "nseindia")
                 except ValueError:
                     log.debug("NSE returned non-JSON for %s", symbol)
         except Exception as e:
             log.debug("NSE request failed for %s: %s", symbol, e)
+        return None
 
-        # 2) yfinance fallback
+    def _yf_quotes(self, symbols):
+        """Last close for several symbols from one yf.download() call."""
+        tickers = [s + ".NS" for s in symbols]
         try:
-            yf_ticker = symbol + ".NS"
-            t = yf.Ticker(yf_ticker)
-            hist = t.history(period="1d")
-            if hist is not None and not hist.empty:
-                price = hist["Close"].iloc[-1]
-                return {
-                    "ticker": symbol,
-                    "price": round(float(price), 2),
-                    "currency": "INR",
-                    "timestamp": timestamp,
-                    "source": "yfinance"
-                }
-            info = getattr(t, "info", {})
-            reg = info.get("regularMarketPrice") or info.get("previousClose")
-            if reg:
-                return {
-                    "ticker": symbol,
-                    "price": round(float(reg), 2),
-                    "currency": "INR",
-                    "timestamp": timestamp,
-                    "source": "yfinance"
-                }
+            data = yf.download(tickers, period="5d", group_by="ticker", progress=False, threads=True)
         except Exception as e:
-            log.debug("yfinance fallback failed for %s: %s", symbol, e)
+            log.debug("yfinance batch download failed for %s: %s", symbols, e)
+            return {}
+        if data is None or data.empty:
+            return {}
 
-        # 3) failure
+        quotes = {}
+        for symbol, ticker in zip(symbols, tickers):
+            try:
+                closes = data[ticker]["Close"] if data.columns.nlevels > 1 else data["Close"]
+                closes = closes.dropna()
+                if len(closes):
+                    quotes[symbol] = self._quote(symbol, round(float(closes.iloc[-1]), 2), "yfinance")
+            except KeyError:
+                continue
+        return quotes
+
+    @staticmethod
+    def _no_quote(symbol):
         return {
             "ticker": symbol,
             "price": None,
             "currency": "INR",
-            "timestamp": timestamp,
+            "timestamp": datetime.now(tz=tz.tzlocal()).isoformat(),
             "source": "none",
             "note": "No data from NSE or yfinance"
         }
 
     # -------------------------
-    # FD rates (Gemini)
+    # FD rates (LLM, batched)
     # -------------------------
-    @cached(FD_CACHE)
     def fetch_fd_rates(self, bank_keys: tuple):
-        results = []
-        for bank in bank_keys:
-            prompt = (
-                f"Provide the latest Fixed Deposit (FD) interest rates for {bank} bank in India. "
-                f"Return a JSON object exactly like this:\n"
-                f'{{"bank": "{bank}", "1yr": "x%", "2yr": "y%", "5yr": "z%"}}\n'
-                f"No explanation, only valid JSON."
-            )
-            try:
-                answer = call_llm([{"role": "user", "content": prompt}])
-                try:
-                    parsed = json.loads(answer)
-                except Exception:
-                    parsed = {"bank": bank, "rates_raw": answer}
+        """
+        FD rate rows for the given banks, in the order asked. Served from
+        fd_cache; all missing banks are fetched in one LLM request.
+        """
+        banks = list(dict.fromkeys(b.strip().lower() for b in bank_keys))
+        rows = self.fd_cache.get_many(banks)
+        return [rows.get(bank) or {"bank": bank, "error": "FD rates unavailable"} for bank in banks]
 
-                parsed["source"] = "gemini"
-                parsed["timestamp"] = datetime.now(tz=tz.tzlocal()).isoformat()
-                results.append(parsed)
-            except Exception as e:
-                results.append({"bank": bank, "error": str(e)})
-        return results
+    def _load_fd_rates(self, banks, background=False):
+        """
+        One LLM request for all banks. A request waiting on the answer gets
+        interactive priority; revalidation of cached rows runs as background work.
+        """
+        prompt = build_batch_prompt(sorted(banks))
+        priority = PRIORITY_BACKGROUND if background else PRIORITY_INTERACTIVE
+        try:
+            answer = call_llm([{"role": "user", "content": prompt}], priority=priority, caller="fd_rates")
+            if answer == FALLBACK_RESPONSE:
+                return {bank: error_row(bank, "FD rates unavailable") for bank in banks}
+            table = parse_rate_table(answer, banks)
+        except Exception as e:
+            log.debug("FD rate lookup failed for %s: %s", banks, e)
+            return {bank: error_row(bank, str(e)) for bank in banks}
+        for bank in banks:
+            if bank not in table:
+                table[bank] = unparsed_row(bank, answer)
+        return table
 
     # -------------------------
     # Mutual fund NAV (via AMFI)
     # -------------------------
-    @cached(MF_CACHE)
     def fetch_mf_nav(self, scheme_identifier: str):
         """
         Fetch NAV for a given mutual fund using AMFI data.
-        scheme_identifier can be either scheme code (e.g., "120503") or scheme name (e.g., "Axis Bluechip Fund").
+        scheme_identifier can be a scheme code (e.g., "120503"), an ISIN, or a scheme name (e.g., "Axis Bluechip Fund").
+        Names are matched with the fuzzy scheme index; the best match is returned with close alternatives.
+        Served from the in-memory NAV table; only the first lookup after start-up may wait for the download.
         """
         scheme_identifier = scheme_identifier.strip().lower()
         timestamp = datetime.now(tz=tz.tzlocal()).isoformat()
 
         try:
-            url = "https://www.amfiindia.com/spages/NAVAll.txt"
-            resp = self.session.get(url, timeout=15)
-            resp.raise_for_status()
-
-            lines = resp.text.splitlines()
-            found = None
-
-            for line in lines:
-                parts = line.split(";")
-                if len(parts) < 6:
-                    continue  # skip headers or malformed rows
-
-                scheme_code, isin_div_payout, isin_div_reinv, scheme_name, nav, nav_date = parts[:6]
-
-                # Match by scheme code
-                if scheme_identifier == scheme_code.strip().lower():
-                    found = {
-                        "scheme_code": scheme_code.strip(),
-                        "scheme_name": scheme_name.strip(),
-                        "nav": float(nav.replace(",", "")),
-                        "currency": "INR",
-                        "date": nav_date.strip(),
-                        "timestamp": timestamp,
-                        "source": "amfi"
-                    }
-                    break
-
-                # Match by scheme name (partial match allowed)
-                if scheme_identifier in scheme_name.strip().lower():
-                    found = {
-                        "scheme_code": scheme_code.strip(),
-                        "scheme_name": scheme_name.strip(),
-                        "nav": float(nav.replace(",", "")),
-                        "currency": "INR",
-                        "date": nav_date.strip(),
-                        "timestamp": timestamp,
-                        "source": "amfi"
-                    }
-                    break
-
-            if not found:
+            table = self.nav_store.get()
+            row = table.find(scheme_identifier)
+
+            if row is None:
                 return {
                     "scheme_code": None,
                     "scheme_name": scheme_identifier,
@@ -199,7 +208,27 @@ class RealtimeFetcher:
                     "note": "No match found"
                 }
 
-            return found
+            found = table.row(row)
+            result = {
+                "scheme_code": found["scheme_code"],
+                "scheme_name": found["scheme_name"],
+                "nav": found["nav"],
+                "currency": "INR",
+                "date": found["date"],
+                "timestamp": timestamp,
+                "source": "amfi",
+                "freshness": self.nav_store.freshness(table)
+            }
+            # Other close matches (plan / option variants) for name queries
+            if not scheme_identifier.isdigit() and not ISIN_RE.match(scheme_identifier):
+                alternatives = [
+                    {"scheme_code": c["scheme_code"], "scheme_name": c["scheme_name"], "nav": c["nav"]}
+                    for c in table.search(scheme_identifier, n=MF_ALTERNATIVES + 1)
+                    if c["scheme_code"] != found["scheme_code"]
+                ][:MF_ALTERNATIVES]
+                if alternatives:
+                    result["alternatives"] = alternatives
+            return result
 
         except Exception as e:
             return {
@@ -215,11 +244,12 @@ class RealtimeFetcher:
 
 
 # -------------------------
-# Quick test
+# Quick test (from the repository root: python -m src.realtime)
 # -------------------------
 if __name__ == "__main__":
     f = RealtimeFetcher()
     print("Stock example:", f.fetch_stock_price("SBIN"))  # SBI
+    print("Quotes example:", f.fetch_quotes(["TCS", "INFY", "WIPRO"]))
     print("FD example:", f.fetch_fd_rates(("sbi", "hdfc", "icici","axis","idfc","kotak")))
     print("MF example:", f.fetch_mf_nav("SBI Small Cap Fund"))
     print("MF example:", f.fetch_mf_nav("HDFC Top 100 Fund"))
@@ -0,0 +1,168 @@
+"""
+Semantic answer cache in front of the LLM call in /chat.
+
+Near-duplicate questions ("What is an SIP?", "what is sip", "explain SIP
+please") would otherwise pay a full LLM round trip each. Answers are bucketed
+by intent only and, within an intent, matched by cosine similarity of the
+normalised query's embedding (normalize_query drops question boilerplate and
+punctuation) against a configurable threshold. Only then is the match checked
+against the request: it must share at least one retrieved source document
+(in any order) and have the same session context, otherwise the next-closest
+compatible entry is used, if any. Entries expire after a TTL and the least
+recently used entry is evicted when the cache is full.
+
+Profile-dependent and calculator answers must never be stored here; the
+caller decides that and records it via bypass().
+"""
+
+import re
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import numpy as np
+
+DEFAULT_THRESHOLD = 0.92
+DEFAULT_TTL = 3600  # seconds
+DEFAULT_MAXSIZE = 2048
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+# Question boilerplate that does not change what is being asked
+FILLER_WORDS = {
+    "what", "whats", "is", "are", "a", "an", "the", "explain", "please", "pls", "tell", "me",
+    "about", "can", "could", "you", "define", "meaning", "mean", "means", "of",
+}
+
+
+class _Entry:
+    __slots__ = ("intent", "embedding", "answer", "sources", "retrieved", "context", "created_at")
+
+    def __init__(self, intent, embedding, answer, sources, retrieved, context):
+        self.intent = intent
+        self.embedding = embedding
+        self.answer = answer
+        self.sources = sources
+        self.retrieved = retrieved
+        self.context = context
+        self.created_at = time.monotonic()
+
+    def compatible(self, retrieved: frozenset, context: str) -> bool:
+        return self.context == context and (bool(self.retrieved & retrieved) or self.retrieved == retrieved)
+
+
+def normalize_query(query: str) -> str:
+    """"What is an SIP?" / "explain SIP please" -> "sip"; the text whose embedding is cached."""
+    words = WORD_RE.findall(query.lower())
+    return " ".join([w for w in words if w not in FILLER_WORDS] or words)
+
+
+def _context_key(context: Optional[dict]) -> str:
+    return json.dumps(context or {}, sort_keys=True, default=str)
+
+
+def _normalize(embedding):
+    emb = np.asarray(embedding, dtype="float32").ravel()
+    norm = float(np.linalg.norm(emb))
+    return emb / norm if norm else emb
+
+
+class SemanticResponseCache:
+    def __init__(self, threshold=DEFAULT_THRESHOLD, ttl=DEFAULT_TTL, maxsize=DEFAULT_MAXSIZE):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._buckets: Dict[str, list] = {}  # intent -> entry ids
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.source_mismatches = 0  # similar enough, but retrieved other documents / other context
+
+    def get(self, embedding, intent: str, retrieved: list, context: Optional[dict] = None) -> Optional[Dict[str, Any]]:
+        """
+        Return {"answer", "sources", "similarity"} for the closest live entry of
+        this intent above threshold that is compatible with the retrieved sources
+        and context.
+        """
+        query = _normalize(embedding)
+        retrieved, context = frozenset(retrieved), _context_key(context)
+        with self._lock:
+            self._expire(intent)
+            ids = self._buckets.get(intent)
+            if not ids:
+                self.misses += 1
+                return None
+
+            matrix = np.vstack([self._entries[i].embedding for i in ids])
+            sims = matrix @ query
+            for best in np.argsort(-sims, kind="stable"):
+                if sims[best] < self.threshold:
+                    break
+                entry = self._entries[ids[best]]
+                if entry.compatible(retrieved, context):
+                    self._entries.move_to_end(ids[best])
+                    self.hits += 1
+                    return {"answer": entry.answer, "sources": list(entry.sources), "similarity": float(sims[best])}
+                self.source_mismatches += 1
+            self.misses += 1
+            return None
+
+    def put(self, embedding, intent: str, answer: str, sources: list, retrieved: list,
+            context: Optional[dict] = None):
+        """sources are returned with the answer; retrieved (the request's retrieved sources) guard reuse."""
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = _Entry(intent, _normalize(embedding), answer, list(sources),
+                                             frozenset(retrieved), _context_key(context))
+            self._buckets.setdefault(intent, []).append(entry_id)
+            while len(self._entries) > self.maxsize:
+                old_id, _ = next(iter(self._entries.items()))
+                self._remove(old_id)
+                self.evictions += 1
+
+    def bypass(self):
+        """Record a request that was not eligible for caching."""
+        with self._lock:
+            self.bypasses += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def _remove(self, entry_id):
+        entry = self._entries.pop(entry_id)
+        ids = self._buckets[entry.intent]
+        ids.remove(entry_id)
+        if not ids:
+            del self._buckets[entry.intent]
+
+    def _expire(self, intent):
+        now = time.monotonic()
+        for entry_id in list(self._buckets.get(intent, [])):
+            if now - self._entries[entry_id].created_at > self.ttl:
+                self._remove(entry_id)
+                self.expirations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "threshold": self.threshold,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypasses": self.bypasses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "source_mismatches": self.source_mismatches,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -1,30 +1,119 @@
 import os
-import json
+import threading
+from collections import OrderedDict
 import faiss
 import numpy as np
 from sentence_transformers import SentenceTransformer
 
-INDEX_DIR = "C:/Users/Admin/Desktop/Finance_bot/index"
+from src.index_store import resolve_index_dir
+from src.chunk_store import open_chunk_store
+from src.lexical import BM25Index, reciprocal_rank_fusion
+from src.ann import load_index_config, apply_search_params, make_search_params
+
+INDEX_DIR = os.getenv("INDEX_DIR", "C:/Users/Admin/Desktop/Finance_bot/index")
 MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+ENCODE_BATCH_SIZE = 64  # queries per SentenceTransformer forward pass
+RETRIEVAL_MODE = "vector"  # "vector" (FAISS only) or "hybrid" (FAISS + BM25 fused with RRF)
+HYBRID_CANDIDATES = 4  # each side contributes top_k * HYBRID_CANDIDATES candidates to fusion
+RRF_K = 60
+EMBED_CACHE_SIZE = 4096  # query embeddings kept in memory (~1.5 KB each for MiniLM)
+
+
+class EmbeddingCache:
+    """
+    Bounded, thread-safe LRU cache of query embeddings.
+
+    Keys are (model_name, normalized query); MiniLM is uncased, so lowercasing
+    and collapsing whitespace never changes the embedding.
+    """
+
+    def __init__(self, maxsize=EMBED_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(model_name, query):
+        return (model_name, " ".join(query.lower().split()))
+
+    def get(self, key):
+        with self._lock:
+            emb = self._entries.get(key)
+            if emb is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return emb
+
+    def put(self, key, emb):
+        emb = np.array(emb, dtype="float32")
+        emb.setflags(write=False)
+        with self._lock:
+            self._entries[key] = emb
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
 
 
 class Retriever:
-    def __init__(self, index_dir=INDEX_DIR, model_name=MODEL_NAME):
-        # Load FAISS index
+    def __init__(self, index_dir=INDEX_DIR, model_name=MODEL_NAME, cache_size=EMBED_CACHE_SIZE,
+                 mode=RETRIEVAL_MODE, search_params=None):
+        # Load FAISS index (from the live generation, if build_index.py wrote one)
+        index_dir = resolve_index_dir(index_dir)
         index_path = os.path.join(index_dir, "faiss.index")
         if not os.path.exists(index_path):
             raise FileNotFoundError("FAISS index not found. Run build_index.py first.")
         self.index = faiss.read_index(index_path)
 
-        # Load metadata
-        meta_path = os.path.join(index_dir, "metadata.json")
-        with open(meta_path, "r", encoding="utf-8") as f:
-            self.metadata = json.load(f)
+        # Index type and query-time knobs (nprobe, ef_search) saved by build_index.py;
+        # search_params overrides them per deployment
+        config = load_index_config(index_dir)
+        self.index_kind = config["kind"]
+        self.index_params = {**config["params"], **(search_params or {})}
+        apply_search_params(self.index, self.index_kind, self.index_params)
+
+        # Memory-mapped chunk store; rows are decoded only when returned
+        self.chunks = open_chunk_store(index_dir)
+
+        # Per-document ID ranges, so filtered queries only score allowed chunks
+        self.doc_ranges = self.chunks.doc_ranges()
+        self._selector_cache = {}
+        self._mask_cache = {}
+
+        # Lexical side of hybrid mode (built in memory for indexes that predate bm25.npz)
+        if BM25Index.exists(index_dir):
+            self.bm25 = BM25Index.load(index_dir)
+        else:
+            self.bm25 = BM25Index.build([self.chunks.content(i) for i in range(len(self.chunks))])
+        self.mode = mode
 
         # Load embedding model
+        self.model_name = model_name
         self.model = SentenceTransformer(model_name)
+        self.embedding_cache = EmbeddingCache(cache_size)
 
-    def retrieve(self, query, top_k=3, intent=None, allowed_docs=None):
+    def retrieve(self, query, top_k=3, intent=None, allowed_docs=None, mode=None):
         """
         Return top_k results for query, optionally filtered by intent.
         
@@ -33,39 +122,187 @@ class Retriever:
             top_k: Number of results to return
             intent: Intent classification (optional)
             allowed_docs: List of allowed document filenames (optional)
+            mode: "vector" or "hybrid" (defaults to the retriever's mode)
+        """
+        return self.retrieve_many([query], top_k=top_k, allowed_docs_per_query=[allowed_docs], mode=mode)[0]
+
+    def retrieve_many(self, queries, top_k=3, allowed_docs_per_query=None, mode=None):
+        """
+        Batched retrieve(): encode all queries in one forward pass and run a
+        single matrix search over the FAISS index.
+
+        Args:
+            queries: List of search queries
+            top_k: Number of results to return per query
+            allowed_docs_per_query: Optional list (same length as queries) of
+                allowed document filenames; a None entry means no filter
+            mode: "vector" or "hybrid" (defaults to the retriever's mode)
+
+        Returns:
+            One result list per query, each shaped like retrieve()'s output.
+            In hybrid mode "score" is still the L2 distance (None for hits
+            found only lexically) and "rrf_score" gives the fused ranking.
+        """
+        mode = mode or self.mode
+        if mode not in ("vector", "hybrid"):
+            raise ValueError(f"Unknown retrieval mode: {mode}")
+        queries = list(queries)
+        if not queries:
+            return []
+        if allowed_docs_per_query is None:
+            allowed_docs_per_query = [None] * len(queries)
+        if len(allowed_docs_per_query) != len(queries):
+            raise ValueError("allowed_docs_per_query must have one entry per query")
+
+        query_embs = self.embed(queries)
+
+        # Group rows sharing the same filter so each group is one matrix search
+        groups = {}
+        for row, allowed_docs in enumerate(allowed_docs_per_query):
+            key = frozenset(allowed_docs) if allowed_docs else None
+            groups.setdefault(key, []).append(row)
+
+        results = [None] * len(queries)
+        for key, rows in groups.items():
+            params = None
+            if key is not None:
+                selector = self._selector_for(key)
+                if selector is None:
+                    # None of the allowed documents are in the index
+                    for row in rows:
+                        results[row] = []
+                    continue
+                params = make_search_params(self.index_kind, self.index_params, selector)
+
+            fetch_k = top_k if mode == "vector" else top_k * HYBRID_CANDIDATES
+            distances, indices = self.index.search(query_embs[rows], fetch_k, params=params)
+            if key is not None:
+                self._refill_filtered(key, query_embs[rows], fetch_k, distances, indices)
+
+            if mode == "vector":
+                for i, row in enumerate(rows):
+                    results[row] = self._collect(distances[i], indices[i])
+                continue
+
+            mask = self._mask_for(key) if key is not None else None
+            for i, row in enumerate(rows):
+                results[row] = self._collect_hybrid(queries[row], distances[i], indices[i], top_k, fetch_k, mask)
+
+        return results
+
+    def embed(self, queries):
+        """
+        Return a float32 matrix of query embeddings. Cached queries skip the
+        encoder; the remaining ones are encoded together in one batch.
+        """
+        keys = [EmbeddingCache.make_key(self.model_name, q) for q in queries]
+        embs = [self.embedding_cache.get(key) for key in keys]
+
+        # Encode each distinct missing query once
+        missing = {}
+        for key, query, emb in zip(keys, queries, embs):
+            if emb is None and key not in missing:
+                missing[key] = query
+        if missing:
+            encoded = self.model.encode(list(missing.values()), batch_size=ENCODE_BATCH_SIZE).astype("float32")
+            fresh = dict(zip(missing.keys(), encoded))
+            for key, emb in fresh.items():
+                self.embedding_cache.put(key, emb)
+            embs = [fresh[key] if emb is None else emb for key, emb in zip(keys, embs)]
+
+        return np.vstack(embs).astype("float32")
+
+    def _selector_for(self, allowed_docs):
+        """Build (and memoize) a FAISS ID selector covering the allowed documents."""
+        if allowed_docs in self._selector_cache:
+            return self._selector_cache[allowed_docs]
+
+        ranges = [r for name in sorted(allowed_docs) for r in self.doc_ranges.get(name, [])]
+        if not ranges:
+            selector = None
+        elif len(ranges) == 1:
+            selector = faiss.IDSelectorRange(ranges[0][0], ranges[0][1])
+        else:
+            ids = np.concatenate([np.arange(start, end, dtype="int64") for start, end in ranges])
+            selector = faiss.IDSelectorBatch(ids)
+
+        self._selector_cache[allowed_docs] = selector
+        return selector
+
+    def _refill_filtered(self, allowed_docs, query_embs, k, distances, indices):
+        """
+        IVF indexes only scan the nprobe nearest lists, which may hold none of
+        the allowed chunks; HNSW keeps efSearch candidates, which filtered-out
+        chunks use up. Re-run underfilled rows probing every IVF list, or with
+        a growing efSearch, so a filtered query still returns k hits whenever
+        k allowed chunks exist.
         """
-        query_emb = self.model.encode([query]).astype("float32")
+        if self.index_kind not in ("ivf", "ivfpq", "hnsw"):
+            return
+        wanted = min(k, int(self._mask_for(allowed_docs).sum()))
+        short = np.flatnonzero((indices != -1).sum(axis=1) < wanted)
+        selector = self._selector_for(allowed_docs)
+        if self.index_kind != "hnsw":
+            if len(short):
+                params = make_search_params(self.index_kind, self.index_params, selector, exhaustive=True)
+                distances[short], indices[short] = self.index.search(query_embs[short], k, params=params)
+            return
+
+        ef = max(self.index_params["ef_search"], k)
+        while len(short) and ef < self.index.ntotal:
+            ef = min(ef * 4, self.index.ntotal)
+            params = make_search_params(self.index_kind, self.index_params, selector, ef_search=ef)
+            distances[short], indices[short] = self.index.search(query_embs[short], k, params=params)
+            short = short[(indices[short] != -1).sum(axis=1) < wanted]
+
+    def _mask_for(self, allowed_docs):
+        """Boolean row mask over all chunks for the allowed documents (memoized)."""
+        if allowed_docs not in self._mask_cache:
+            mask = np.zeros(len(self.chunks), dtype=bool)
+            for name in allowed_docs:
+                for start, end in self.doc_ranges.get(name, []):
+                    mask[start:end] = True
+            self._mask_cache[allowed_docs] = mask
+        return self._mask_cache[allowed_docs]
+
+    def _collect_hybrid(self, query, distances, indices, top_k, fetch_k, mask):
+        """Fuse one row of FAISS output with BM25 candidates via reciprocal-rank fusion."""
+        vector_ids = [int(idx) for idx in indices if idx != -1]
+        vector_dist = {int(idx): float(d) for d, idx in zip(distances, indices) if idx != -1}
+        lexical_ids, lexical_scores = self.bm25.top(query, fetch_k, mask=mask)
+        lexical_score = dict(zip(lexical_ids.tolist(), lexical_scores.tolist()))
 
-        # Search FAISS index (get more results for filtering)
-        search_k = top_k * 3 if allowed_docs else top_k
-        distances, indices = self.index.search(query_emb, search_k)
+        results = []
+        for idx, fused in reciprocal_rank_fusion([vector_ids, lexical_ids.tolist()], k=RRF_K)[:top_k]:
+            results.append({
+                "content": self.chunks.content(idx),
+                "source": self.chunks.filename(idx),
+                "chunk_id": self.chunks.chunk_id(idx),
+                "score": vector_dist.get(idx),
+                "rrf_score": fused,
+                "lexical_score": lexical_score.get(idx, 0.0),
+            })
+        return results
 
+    def _collect(self, distances, indices):
+        """Turn one row of FAISS output into result dicts."""
         results = []
-        for score, idx in zip(distances[0], indices[0]):
+        for score, idx in zip(distances, indices):
             if idx == -1:
                 continue
-            meta = self.metadata[idx]
-            
-            # Filter by allowed docs if provided
-            if allowed_docs and meta["filename"] not in allowed_docs:
-                continue
-            
             results.append({
-                "content": meta["content"],
-                "source": meta["filename"],
+                "content": self.chunks.content(idx),
+                "source": self.chunks.filename(idx),
+                "chunk_id": self.chunks.chunk_id(idx),
                 "score": float(score)
             })
-            
-            # Stop when we have enough results
-            if len(results) >= top_k:
-                break
-
         return results
 
 
 # --------------------
 # Test runner
 # --------------------
+# Run from the repository root: python -m src.retriever
 if __name__ == "__main__":
     retriever = Retriever()
     while True:
@@ -76,5 +313,7 @@ if __name__ == "__main__":
         results = retriever.retrieve(query, top_k=3)
         print("\nTop results:")
         for r in results:
-            print(f"- [source: {r['source']}] (score={r['score']:.4f})")
+            score = "n/a" if r["score"] is None else f"{r['score']:.4f}"  # hybrid: lexical-only hit
+            rrf = f", rrf={r['rrf_score']:.4f}" if "rrf_score" in r else ""
+            print(f"- [source: {r['source']}] (score={score}{rrf})")
             print(f"  {r['content'][:200]}...\n")
@@ -0,0 +1,166 @@
+"""
+Fuzzy search over mutual fund scheme names.
+
+Each scheme name is turned into features: its word tokens, each pair of
+adjacent words joined ("mid cap" -> "midcap"), and the character trigrams
+of every word ("#bl", "blu", "lue", ..., "ip#"), so "axis bluechip",
+"axis blue chip" and slightly misspelt names still match.
+Features are TF-IDF weighted and L2-normalised per name; postings are kept
+as term-major CSR arrays (like lexical.BM25Index), so scoring a query is a
+single gather + np.bincount and the score is the cosine similarity.
+
+Features that occur in more than MAX_DF of all names ("fund", "plan",
+"fun", ...) carry almost no signal and are dropped at build time, which
+keeps the postings touched per query small.
+
+Plan (direct / regular) and option (growth / idcw) words are kept out of
+the scoring features and parsed out of every name instead: a query that names a
+plan or option boosts the matching variants, and otherwise ties go to the
+direct growth variant.
+"""
+
+import re
+from collections import Counter
+from typing import List, Optional
+
+import numpy as np
+
+MAX_DF = 0.3          # drop features present in more than this share of names
+TOKEN_WEIGHT = 2.0    # a whole-word match counts more than its trigrams
+MIN_SCORE = 0.4       # best match below this cosine score counts as no match
+VARIANT_BOOST = 0.05  # per plan / option word in the query that the variant matches
+TIE_BREAK = {"growth": 2e-3, "direct": 1e-3}
+
+PLAN_WORDS = {"direct": "direct", "regular": "regular"}
+OPTION_WORDS = {"growth": "growth", "idcw": "idcw", "dividend": "idcw", "div": "idcw",
+                "payout": "idcw", "reinvestment": "idcw", "bonus": "idcw"}
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Words in a NAV question that are not part of a scheme name
+QUERY_STOPWORDS = {
+    "what", "whats", "is", "the", "of", "for", "a", "an", "me", "tell", "show", "give", "get",
+    "current", "latest", "today", "todays", "now", "price", "value", "nav", "navs", "rate",
+    "mutual", "mf", "please", "check", "find", "how", "much", "was", "are", "in", "my",
+}
+
+
+def _words(text: str) -> List[str]:
+    return WORD_RE.findall(text.lower())
+
+
+def features(text: str) -> Counter:
+    """Scoring features of a name / query; plan and option words are matched separately."""
+    feats = Counter()
+    words = [w for w in _words(text) if w not in PLAN_WORDS and w not in OPTION_WORDS]
+    for a, b in zip(words, words[1:]):
+        feats["w:" + a + b] += TOKEN_WEIGHT
+    for word in words:
+        feats["w:" + word] += TOKEN_WEIGHT
+        padded = f"#{word}#"
+        for i in range(len(padded) - 2):
+            feats[padded[i:i + 3]] += 1.0
+    return feats
+
+
+def clean_query(query: str) -> str:
+    """Drop question words ("what is the nav of ...") so only the scheme name is left."""
+    return " ".join(w for w in _words(query) if w not in QUERY_STOPWORDS)
+
+
+def plan_and_option(text: str, default=True):
+    """(plan, option) named in text; for scheme names the defaults are regular / growth."""
+    words = _words(text)
+    plan = next((PLAN_WORDS[w] for w in words if w in PLAN_WORDS), "regular" if default else None)
+    option = next((OPTION_WORDS[w] for w in words if w in OPTION_WORDS), "growth" if default else None)
+    return plan, option
+
+
+class SchemeIndex:
+    def __init__(self, vocab, idf, indptr, doc_ids, weights, plans, options, n_docs):
+        self.vocab = vocab
+        self.idf = idf
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.plans = plans
+        self.options = options
+        self.prior = (np.where(plans == "direct", TIE_BREAK["direct"], 0.0)
+                      + np.where(options == "growth", TIE_BREAK["growth"], 0.0)).astype("float32")
+        self.n_docs = n_docs
+
+    @classmethod
+    def build(cls, names: List[str], max_df: float = MAX_DF):
+        n_docs = len(names)
+        doc_feats = [features(name) for name in names]
+        df = Counter()
+        for feats in doc_feats:
+            df.update(feats.keys())
+        limit = max(max_df * n_docs, 1)
+        vocab = {term: i for i, term in enumerate(sorted(t for t, d in df.items() if d <= limit))}
+        idf = np.zeros(len(vocab), dtype="float32")
+        for term, i in vocab.items():
+            idf[i] = np.log((1.0 + n_docs) / (1.0 + df[term])) + 1.0
+
+        postings = [[] for _ in vocab]
+        for doc_id, feats in enumerate(doc_feats):
+            kept = [(vocab[t], tf) for t, tf in feats.items() if t in vocab]
+            if not kept:
+                continue
+            ids = np.array([t for t, _ in kept])
+            w = np.array([tf for _, tf in kept], dtype="float32") * idf[ids]
+            w /= np.linalg.norm(w)
+            for term_id, weight in zip(ids, w):
+                postings[term_id].append((doc_id, weight))
+
+        indptr = np.zeros(len(vocab) + 1, dtype="int64")
+        indptr[1:] = np.cumsum([len(p) for p in postings])
+        doc_ids = np.array([d for p in postings for d, _ in p], dtype="int32")
+        weights = np.array([w for p in postings for _, w in p], dtype="float32")
+
+        variants = [plan_and_option(name) for name in names]
+        plans = np.array([p for p, _ in variants], dtype=object)
+        options = np.array([o for _, o in variants], dtype=object)
+        return cls(vocab, idf, indptr, doc_ids, weights, plans, options, n_docs)
+
+    def scores(self, query: str) -> np.ndarray:
+        """Cosine similarity of every name to query, as a dense float32 vector."""
+        feats = features(query)
+        terms = [(self.vocab[t], tf) for t, tf in feats.items() if t in self.vocab]
+        if not terms:
+            return np.zeros(self.n_docs, dtype="float32")
+        term_ids = np.array([t for t, _ in terms], dtype="int64")
+        q = np.array([tf for _, tf in terms], dtype="float32") * self.idf[term_ids]
+        q /= np.linalg.norm(q)
+
+        starts = self.indptr[term_ids]
+        lens = self.indptr[term_ids + 1] - starts
+        offsets = np.repeat(starts - np.concatenate([[0], np.cumsum(lens)[:-1]]), lens)
+        positions = offsets + np.arange(lens.sum())
+        return np.bincount(
+            self.doc_ids[positions],
+            weights=self.weights[positions] * np.repeat(q, lens),
+            minlength=self.n_docs,
+        ).astype("float32")
+
+    def top(self, query: str, n: int = 5, min_score: float = MIN_SCORE):
+        """Return (row ids, scores) of the n best names scoring at least min_score, best first."""
+        scores = self.scores(query)
+        candidates = np.flatnonzero(scores >= min_score)
+        if not len(candidates):
+            return candidates, scores[candidates]
+        ranked = scores[candidates] + self.prior[candidates]
+        plan, option = plan_and_option(query, default=False)
+        if plan:
+            ranked += VARIANT_BOOST * (self.plans[candidates] == plan)
+        if option:
+            ranked += VARIANT_BOOST * (self.options[candidates] == option)
+        if len(candidates) > n:
+            keep = np.argpartition(-ranked, n - 1)[:n]
+            candidates, ranked = candidates[keep], ranked[keep]
+        order = np.argsort(-ranked, kind="stable")
+        return candidates[order], scores[candidates[order]]
+
+    def best(self, query: str, min_score: float = MIN_SCORE) -> Optional[int]:
+        ids, _ = self.top(query, 1, min_score)
+        return int(ids[0]) if len(ids) else None
@@ -0,0 +1,115 @@
+"""
+Single-flight coalescing of identical in-flight calls.
+
+When the same key is requested while a call for it is already running, the
+later callers wait for that call and share its result (or exception)
+instead of starting their own. Nothing is cached once the call finishes;
+this only removes duplicate concurrent work, e.g. a burst of identical
+LLM prompts on market open.
+
+Used by call_llm / acall_llm with a key of backend + model + final prompt.
+"""
+
+import asyncio
+import hashlib
+import json
+import threading
+from typing import Any, Awaitable, Callable, Dict
+
+
+class _Call:
+    __slots__ = ("event", "result", "error", "waiters")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._tasks: Dict[str, list] = {}  # key -> [task, waiter count]
+        self.leaders = 0     # calls that went upstream
+        self.coalesced = 0   # callers that shared an in-flight call
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Run fn() once per key among concurrent callers (threads)."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Async do(): the upstream coroutine runs as its own task and every
+        caller awaits it through asyncio.shield, so one caller timing out or
+        disconnecting does not cancel the others. The task is cancelled only
+        when its last waiter is gone.
+        """
+        with self._lock:
+            entry = self._tasks.get(key)
+            if entry is not None:
+                entry[1] += 1
+                self.coalesced += 1
+            else:
+                task = asyncio.ensure_future(fn())
+                entry = self._tasks[key] = [task, 1]
+                self.leaders += 1
+                task.add_done_callback(lambda t, key=key: self._forget(key, t))
+
+        task = entry[0]
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0 and not task.done():
+                    task.cancel()
+            raise
+
+    def _forget(self, key, task):
+        with self._lock:
+            entry = self._tasks.get(key)
+            if entry is not None and entry[0] is task:
+                del self._tasks[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            requests = self.leaders + self.coalesced
+            return {
+                "in_flight": len(self._calls) + len(self._tasks),
+                "upstream_calls": self.leaders,
+                "coalesced": self.coalesced,
+                "coalesced_rate": self.coalesced / requests if requests else 0.0,
+            }
@@ -0,0 +1,284 @@
+"""
+Stale-while-revalidate cache for realtime data (quotes, FD rates).
+
+    age < ttl                   served from cache ("fresh")
+    ttl <= age < ttl + grace    served from cache immediately ("stale") while
+                                one background refresh of the key runs
+    older / missing             loaded in the request ("live"); a key
+                                already being loaded for another request is
+                                waited for, not loaded again, even when the
+                                two requests ask for different batches
+
+Keys requested at least SWR_POPULAR_HITS times in the last
+SWR_POPULAR_WINDOW seconds are also refreshed proactively by
+a daemon thread once they reach REFRESH_AHEAD of their TTL, so the hottest
+symbols rarely go stale at all.
+
+The cache is built around a batch loader, load(keys, background) -> {key: value},
+so one upstream round trip serves every missing key; background is True for
+refreshes that run off the request path, so the loader can deprioritise them.
+Values are dicts; each one returned gets a "freshness" entry:
+{"state", "age_seconds", "fetched_at"}.
+
+Values for which is_failure(value) is true (an upstream error the loader
+turned into a row) are cached for negative_ttl only, with no grace window, so
+a failing upstream is retried at most that often per key instead of on every
+request. A failed refresh never replaces a good value still within its grace
+window; that value keeps being served and is retried after negative_ttl.
+
+Entries live in a store with get(key) -> (value, fetched_at) | None and
+put(key, value, fetched_at); MemoryStore is an in-process LRU.
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from dateutil import tz
+
+SWR_POPULAR_HITS = int(os.getenv("SWR_POPULAR_HITS", "5"))        # 0 disables proactive refresh
+SWR_POPULAR_WINDOW = float(os.getenv("SWR_POPULAR_WINDOW", "300"))  # seconds
+REFRESH_AHEAD = 0.8  # proactive refresh once an entry is this far into its TTL
+
+log = logging.getLogger(__name__)
+
+# Shared by every cache: background and proactive refreshes never run on request threads
+_refresh_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="swr-refresh")
+
+
+class MemoryStore:
+    """In-process LRU store of (value, fetched_at) pairs."""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key) -> Optional[Tuple[Any, float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, value, fetched_at: float):
+        with self._lock:
+            self._entries[key] = (value, fetched_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+class SWRCache:
+    def __init__(self, name: str, load: Callable[[List[str]], Dict[str, Any]], ttl: float, grace: float,
+                 store=None, popular_hits=SWR_POPULAR_HITS, popular_window=SWR_POPULAR_WINDOW,
+                 negative_ttl: float = 0.0, is_failure: Callable[[Any], bool] = None):
+        self.name = name
+        self.load = load
+        self.ttl = ttl
+        self.grace = grace
+        self.store = store if store is not None else MemoryStore()
+        self.popular_hits = popular_hits
+        self.popular_window = popular_window
+        self.negative_ttl = negative_ttl
+        self.is_failure = is_failure or (lambda value: False)
+
+        self._lock = threading.Lock()
+        self._inflight: Dict[Any, Future] = {}  # key -> its pending live load
+        self._refreshing = set()
+        self._hits: Dict[Any, deque] = {}  # key -> times of its last popular_hits requests
+        self._failed_at: Dict[Any, float] = {}  # key -> time of its last failed load
+        self._thread = None
+        self._stop = threading.Event()
+        self.counters = {"fresh": 0, "stale": 0, "live": 0, "background_refreshes": 0,
+                         "proactive_refreshes": 0, "refresh_errors": 0, "negative_hits": 0,
+                         "coalesced": 0}
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def get_many(self, keys: List[str]) -> Dict[str, dict]:
+        """Records for keys (missing keys are absent if the loader returned nothing for them)."""
+        now = time.time()
+        out, stale, missing, negative = {}, [], [], 0
+        for key in dict.fromkeys(keys):
+            self._touch(key, now)
+            entry = self.store.get(key)
+            age = now - entry[1] if entry is not None else None
+            failed = entry is not None and self.is_failure(entry[0])
+            ttl, grace = (self.negative_ttl, 0.0) if failed else (self.ttl, self.grace)
+            if age is not None and age < ttl:
+                out[key] = self._annotate(entry, "fresh", now)
+                negative += failed
+            elif age is not None and age < ttl + grace:
+                out[key] = self._annotate(entry, "stale", now)
+                stale.append(key)
+            else:
+                missing.append(key)
+
+        with self._lock:
+            self.counters["fresh"] += len(out) - len(stale)
+            self.counters["stale"] += len(stale)
+            self.counters["live"] += len(missing)
+            self.counters["negative_hits"] += negative
+
+        # A stale key whose last refresh failed is retried after negative_ttl, not on every read
+        stale = [k for k in stale if now - self._failed_at.get(k, float("-inf")) >= self.negative_ttl]
+        if stale:
+            self._refresh_in_background(stale, "background_refreshes")
+        if missing:
+            loaded = self._load_live(missing)
+            for key in missing:
+                if key in loaded:
+                    out[key] = self._annotate(loaded[key], "live", time.time())
+        return out
+
+    def get(self, key: str) -> Optional[dict]:
+        return self.get_many([key]).get(key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            served = self.counters["fresh"] + self.counters["stale"] + self.counters["live"]
+            popular = sum(1 for k in self._hits if self._is_popular(k, time.time()))
+            return {
+                "ttl_seconds": self.ttl,
+                "grace_seconds": self.grace,
+                **self.counters,
+                "cache_served_rate": (self.counters["fresh"] + self.counters["stale"]) / served if served else 0.0,
+                "refreshing": len(self._refreshing),
+                "popular_keys": popular,
+            }
+
+    def stop(self):
+        self._stop.set()
+
+    # -----------------------------
+    # Internals
+    # -----------------------------
+    @staticmethod
+    def _annotate(entry, state: str, now: float) -> dict:
+        value, fetched_at = entry
+        return {
+            **value,
+            "freshness": {
+                "state": state,
+                "age_seconds": round(max(now - fetched_at, 0.0), 1),
+                "fetched_at": datetime.fromtimestamp(fetched_at, tz=tz.tzlocal()).isoformat(),
+            },
+        }
+
+    def _load_live(self, keys) -> Dict[str, Tuple[Any, float]]:
+        """
+        Load keys in the request. Keys another request is already loading are
+        waited for; only the rest go to the loader, in one batch.
+        """
+        own, waiting = [], {}
+        with self._lock:
+            for key in keys:
+                future = self._inflight.get(key)
+                if future is None:
+                    self._inflight[key] = Future()
+                    own.append(key)
+                else:
+                    waiting[key] = future
+            self.counters["coalesced"] += len(waiting)
+
+        entries = {}
+        if own:
+            try:
+                entries = self._load_and_store(own)
+            except BaseException as e:
+                for future in self._release(own):
+                    future.set_exception(e)
+                raise
+            for key, future in zip(own, self._release(own)):
+                future.set_result(entries.get(key))
+        for key, future in waiting.items():
+            entry = future.result()
+            if entry is not None:
+                entries[key] = entry
+        return entries
+
+    def _release(self, keys) -> List[Future]:
+        with self._lock:
+            return [self._inflight.pop(key) for key in keys]
+
+    def _load_and_store(self, keys, background=False) -> Dict[str, Tuple[Any, float]]:
+        values = self.load(list(keys), background) or {}
+        fetched_at = time.time()
+        entries = {}
+        for key, value in values.items():
+            if value is None:
+                continue
+            if self.is_failure(value):
+                self._failed_at[key] = fetched_at
+                current = self.store.get(key)
+                if (current is not None and not self.is_failure(current[0])
+                        and fetched_at - current[1] < self.ttl + self.grace):
+                    entries[key] = current  # keep serving the last good value
+                    continue
+            else:
+                self._failed_at.pop(key, None)
+            self.store.put(key, value, fetched_at)
+            entries[key] = (value, fetched_at)
+        return entries
+
+    def _refresh_in_background(self, keys, counter):
+        with self._lock:
+            keys = [k for k in keys if k not in self._refreshing]
+            if not keys:
+                return
+            self._refreshing.update(keys)
+            self.counters[counter] += 1
+
+        def refresh():
+            try:
+                self._load_and_store(keys, background=True)
+            except Exception as e:
+                with self._lock:
+                    self.counters["refresh_errors"] += 1
+                log.warning("%s cache refresh failed for %s: %s", self.name, keys, e)
+            finally:
+                with self._lock:
+                    self._refreshing.difference_update(keys)
+
+        _refresh_pool.submit(refresh)
+
+    def _touch(self, key, now):
+        if self.popular_hits <= 0:
+            return
+        with self._lock:
+            hits = self._hits.get(key)
+            if hits is None:
+                hits = self._hits[key] = deque(maxlen=self.popular_hits)
+            hits.append(now)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._proactive_loop, name=f"swr-{self.name}",
+                                                daemon=True)
+                self._thread.start()
+
+    def _is_popular(self, key, now) -> bool:
+        hits = self._hits[key]
+        return len(hits) == hits.maxlen and now - hits[0] <= self.popular_window
+
+    def _proactive_loop(self):
+        interval = max(self.ttl * (1 - REFRESH_AHEAD) / 2, 1.0)
+        while not self._stop.wait(interval):
+            now = time.time()
+            with self._lock:
+                # Forget keys not requested within the window
+                for key in [k for k, hits in self._hits.items() if now - hits[-1] > self.popular_window]:
+                    del self._hits[key]
+                popular = [k for k in self._hits if self._is_popular(k, now)]
+            due = []
+            for key in popular:
+                entry = self.store.get(key)
+                if entry is not None and now - entry[1] >= self.ttl * REFRESH_AHEAD:
+                    due.append(key)
+            if due:
+                self._refresh_in_background(due, "proactive_refreshes")
@@ -0,0 +1,43 @@
+"""AMFI NAVAll.txt fixture and a fake HTTP session shared by the NAV tests."""
+
+from datetime import datetime
+
+from src.amfi import IST, expected_nav_date
+
+NAV_ALL = """Scheme Code;ISIN Div Payout/ ISIN Growth;ISIN Div Reinvestment;Scheme Name;Net Asset Value;Date
+
+Open Ended Schemes(Equity Scheme - Large Cap Fund)
+
+Axis Mutual Fund
+
+120465;INF846K01DP8;-;Axis Bluechip Fund - Direct Plan - Growth;58.12;16-Oct-2026
+120466;INF846K01DQ6;INF846K01DR4;Axis Bluechip Fund - Direct Plan - IDCW;20.5;16-Oct-2026
+
+SBI Mutual Fund
+
+125497;INF200K01T51;-;SBI Small Cap Fund - Direct Plan - Growth;N.A.;16-Oct-2026
+"""
+
+
+def nav_file(day):
+    return NAV_ALL.replace("16-Oct-2026", day.strftime("%d-%b-%Y"))
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeSession:
+    """Serves a NAV file dated `day` (default: the NAV date AMFI should have published by now)."""
+
+    def __init__(self, day=None):
+        self.calls = 0
+        self.day = day or expected_nav_date(datetime.now(tz=IST))
+
+    def get(self, url, timeout=None):
+        self.calls += 1
+        return FakeResponse(nav_file(self.day))
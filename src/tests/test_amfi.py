@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+from src.amfi import IST, NAVStore, expected_nav_date, parse_nav_file
+from src.tests.nav_fixtures import NAV_ALL, FakeSession
+
+
+def test_parse_builds_code_and_isin_indexes():
+    table = parse_nav_file(NAV_ALL)
+
+    assert len(table) == 3
+    assert table.row(table.find("120465"))["nav"] == 58.12
+    assert table.row(table.find("inf846k01dr4"))["scheme_code"] == "120466"
+    row = table.row(table.find("sbi small cap"))
+    assert (row["nav"], row["fund_house"]) == (None, "SBI Mutual Fund")
+    assert row["category"] == "Open Ended Schemes(Equity Scheme - Large Cap Fund)"
+    assert table.find("no such fund") is None
+    assert table.nav_date.isoformat() == "2026-10-16"
+
+
+def test_store_downloads_once_per_publication_cycle():
+    session = FakeSession()
+    store = NAVStore(session)
+
+    store.get()
+    store.get()
+    assert session.calls == 1
+
+    store.table.nav_date -= timedelta(days=1)
+    store.get()
+    assert session.calls == 2
+
+
+def test_download_before_publication_is_stale_and_retried_later(monkeypatch):
+    expected = expected_nav_date(datetime.now(tz=IST))
+    session = FakeSession(day=expected - timedelta(days=1))  # AMFI has not published yet
+    store = NAVStore(session)
+
+    table = store.get()
+    assert store.freshness(table)["state"] == "stale"
+    store.get()
+    assert session.calls == 1  # not re-downloaded on every lookup
+
+    monkeypatch.setattr("src.amfi.AMFI_RETRY_SECONDS", 0)
+    session.day = expected
+    assert store.freshness(store.get())["state"] == "fresh"
+    assert session.calls == 2
+
+
+def test_retries_stop_for_the_cycle_after_max_attempts(monkeypatch):
+    monkeypatch.setattr("src.amfi.AMFI_RETRY_SECONDS", 0)
+    monkeypatch.setattr("src.amfi.AMFI_MAX_ATTEMPTS", 3)
+    expected = expected_nav_date(datetime.now(tz=IST))
+    session = FakeSession(day=expected - timedelta(days=1))  # e.g. a weekday market holiday
+    store = NAVStore(session)
+
+    for _ in range(5):
+        table = store.get()
+    assert session.calls == 3
+    assert store.freshness(table)["state"] == "stale"
+    assert store.stats()["attempts_this_cycle"] == 3
+
+    store._cycle -= timedelta(days=1)  # the next publication starts a new cycle
+    store.get()
+    assert session.calls == 4
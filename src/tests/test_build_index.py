@@ -0,0 +1,99 @@
+import hashlib
+
+import numpy as np
+
+from src.build_index import (
+    CHUNK_SIZE, MODEL_NAME, build_index, load_documents, load_previous_build, save_index,
+)
+
+
+class CountingModel:
+    """Deterministic stand-in for SentenceTransformer that counts encoded texts."""
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, batch_size=None):
+        self.encoded.extend(texts)
+        return np.array([
+            np.frombuffer(hashlib.sha256(t.encode("utf-8")).digest(), dtype=np.uint8)[:8]
+            for t in texts
+        ], dtype="float32")
+
+
+def write_docs(data_dir, docs):
+    data_dir.mkdir(exist_ok=True)
+    for path in data_dir.iterdir():
+        path.unlink()
+    for fname, text in docs.items():
+        (data_dir / fname).write_text(text, encoding="utf-8")
+    return load_documents(str(data_dir))
+
+
+def build(tmp_path, docs, previous=None):
+    model = CountingModel()
+    index, metadata, embeddings, manifest, stats = build_index(
+        write_docs(tmp_path / "data", docs), lambda: model, previous,
+    )
+    save_index(index, metadata, embeddings, manifest, out_dir=str(tmp_path / "index"))
+    return model, metadata, embeddings, stats
+
+
+def previous_build(tmp_path):
+    return load_previous_build(str(tmp_path / "index"), MODEL_NAME, CHUNK_SIZE)
+
+
+DOCS = {
+    "a.txt": " ".join(f"alpha{i}" for i in range(200)),
+    "b.txt": " ".join(f"beta{i}" for i in range(200)),
+    "c.txt": " ".join(f"gamma{i}" for i in range(200)),
+}
+
+
+def test_first_build_embeds_everything_then_rebuild_reuses_all(tmp_path):
+    model, metadata, embeddings, stats = build(tmp_path, DOCS)
+    assert stats["embedded"] == stats["chunks"] == len(model.encoded) > 3
+    assert stats["reused"] == 0
+
+    model, metadata2, embeddings2, stats = build(tmp_path, DOCS, previous_build(tmp_path))
+    assert model.encoded == []
+    assert stats["embedded"] == 0 and stats["reused"] == len(metadata)
+    assert metadata2 == metadata
+    np.testing.assert_array_equal(embeddings2, embeddings)
+
+
+def test_only_edited_chunks_are_re_embedded(tmp_path):
+    _, metadata, embeddings, _ = build(tmp_path, DOCS)
+
+    edited = dict(DOCS, **{"b.txt": DOCS["b.txt"].replace("beta199", "edited")})
+    model, metadata2, embeddings2, stats = build(tmp_path, edited, previous_build(tmp_path))
+
+    assert stats["embedded"] == 1 and stats["reused"] == len(metadata) - 1
+    assert len(model.encoded) == 1 and "edited" in model.encoded[0]
+    changed = [i for i in range(len(metadata2)) if metadata2[i] != metadata[i]]
+    assert len(changed) == 1 and metadata2[changed[0]]["filename"] == "b.txt"
+    unchanged = [i for i in range(len(metadata2)) if i not in changed]
+    np.testing.assert_array_equal(embeddings2[unchanged], embeddings[unchanged])
+
+
+def test_deleted_files_drop_out(tmp_path):
+    _, metadata, embeddings, _ = build(tmp_path, DOCS)
+
+    remaining = {k: v for k, v in DOCS.items() if k != "b.txt"}
+    model, metadata2, embeddings2, stats = build(tmp_path, remaining, previous_build(tmp_path))
+
+    assert model.encoded == [] and stats["embedded"] == 0
+    assert {m["filename"] for m in metadata2} == {"a.txt", "c.txt"}
+    kept = [i for i, m in enumerate(metadata) if m["filename"] != "b.txt"]
+    assert metadata2 == [metadata[i] for i in kept]
+    np.testing.assert_array_equal(embeddings2, embeddings[kept])
+    assert "b.txt" not in previous_build(tmp_path)["manifest"]["files"]
+
+
+def test_model_or_chunk_size_change_forces_full_rebuild(tmp_path):
+    build(tmp_path, DOCS)
+    index_dir = str(tmp_path / "index")
+
+    assert load_previous_build(index_dir, MODEL_NAME, CHUNK_SIZE) is not None
+    assert load_previous_build(index_dir, "another-model", CHUNK_SIZE) is None
+    assert load_previous_build(index_dir, MODEL_NAME, CHUNK_SIZE + 1) is None
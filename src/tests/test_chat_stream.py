@@ -0,0 +1,70 @@
+import asyncio
+import json
+
+import src.app as app
+from src.context_manager import get_or_create_state
+from src.llm import SentenceLimiter, shorten_answer
+from src.llm_backends import StubBackend, set_backend
+
+ANSWER = ("An emergency fund should cover 3-6 months of expenses. "
+          "Keep it in a liquid fund. Build it first. Then invest.")
+NOT_COVERED = "The documents do not directly cover your query. Please consult a financial advisor."
+
+
+def stream_events(monkeypatch, query):
+    def plan(request):
+        turn = app.ChatTurn(request.query, {}, get_or_create_state("stream-test"))
+        turn.intent = "education"
+        turn.sources = ["emergency_fund.txt"]
+        turn.messages = [{"role": "user", "content": request.query}]
+        return turn
+
+    monkeypatch.setattr(app, "_plan_turn", plan)
+
+    async def collect():
+        response = await app.chat_stream_endpoint(app.ChatRequest(query=query))
+        return "".join([part async for part in response.body_iterator])
+
+    events = []
+    for block in asyncio.run(collect()).strip().split("\n\n"):
+        event, data = block.split("\n")
+        events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+def streamed_answer(events):
+    text = ""
+    for event, data in events:
+        if event == "reset":
+            text = ""
+        elif event == "token":
+            text += data["text"]
+    return text
+
+
+def test_limiter_never_doubles_the_final_period():
+    for text in (ANSWER, "Short answer.", "No period at the end", "Is it safe?"):
+        limiter = SentenceLimiter(max_sentences=3)
+        out = "".join(limiter.feed(c) for c in text.split(" ")[:1] + [" " + w for w in text.split(" ")[1:]])
+        out += limiter.finish()
+        assert out == limiter.text == shorten_answer(text)
+        assert not out.endswith("..")
+
+
+def test_streamed_tokens_join_to_the_final_answer(monkeypatch):
+    set_backend(StubBackend(responses=[ANSWER], latency_ms=0, jitter_ms=0))
+    events = stream_events(monkeypatch, "what is an emergency fund")
+
+    final = events[-1][1]
+    assert streamed_answer(events) == final["answer"]
+    assert final["answer"] == "An emergency fund should cover 3-6 months of expenses. Keep it in a liquid fund. Build it first."
+
+
+def test_fallback_stream_is_sentence_limited(monkeypatch):
+    set_backend(StubBackend(responses=[NOT_COVERED + " One. Two. Three."], latency_ms=0, jitter_ms=0))
+    events = stream_events(monkeypatch, "what is an emergency fund")
+
+    final = events[-1][1]
+    assert ("reset", {}) in events
+    assert final["sources"] == ["gemini_fallback"]
+    assert streamed_answer(events) == final["answer"] == shorten_answer(NOT_COVERED + " One. Two. Three.")
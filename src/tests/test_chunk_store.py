@@ -0,0 +1,47 @@
+import json
+
+from src.chunk_store import ChunkStore, JsonChunkStore, open_chunk_store, write_chunk_store
+
+METADATA = [
+    {"filename": "tax.txt", "chunk_id": 0, "content": "Section 80C allows deductions up to ₹1.5 lakh."},
+    {"filename": "tax.txt", "chunk_id": 1, "content": ""},
+    {"filename": "sip.txt", "chunk_id": 0, "content": "A SIP invests a fixed amount every month."},
+    {"filename": "tax.txt", "chunk_id": 2, "content": "Section 80D covers health insurance premiums."},
+]
+
+
+def test_binary_store_roundtrip(tmp_path):
+    write_chunk_store(str(tmp_path), METADATA)
+    store = open_chunk_store(str(tmp_path))
+
+    assert isinstance(store, ChunkStore)
+    assert len(store) == len(METADATA)
+    assert [store.get(i) for i in range(len(store))] == METADATA
+    assert store.content(0) == METADATA[0]["content"]  # multi-byte UTF-8 survives
+    assert store.filename(2) == "sip.txt" and store.chunk_id(3) == 2
+    assert store.doc_ranges() == {"tax.txt": [[0, 2], [3, 4]], "sip.txt": [[2, 3]]}
+
+
+def test_empty_contents_do_not_need_mmap(tmp_path):
+    rows = [{"filename": "empty.txt", "chunk_id": 0, "content": ""}]
+    write_chunk_store(str(tmp_path), rows)
+    store = open_chunk_store(str(tmp_path))
+    assert store.get(0) == rows[0]
+    assert store.doc_ranges() == {"empty.txt": [[0, 1]]}
+
+    write_chunk_store(str(tmp_path), [])
+    store = open_chunk_store(str(tmp_path))
+    assert len(store) == 0 and store.doc_ranges() == {}
+
+
+def test_falls_back_to_legacy_json(tmp_path):
+    ranges = {"tax.txt": [[0, 2], [3, 4]], "sip.txt": [[2, 3]]}
+    (tmp_path / "metadata.json").write_text(json.dumps(METADATA), encoding="utf-8")
+    (tmp_path / "doc_ranges.json").write_text(json.dumps(ranges), encoding="utf-8")
+
+    store = open_chunk_store(str(tmp_path))
+    assert isinstance(store, JsonChunkStore)
+    assert len(store) == len(METADATA)
+    assert [store.get(i) for i in range(len(store))] == METADATA
+    assert store.filename(2) == "sip.txt" and store.content(3) == METADATA[3]["content"]
+    assert store.doc_ranges() == ranges
@@ -15,6 +15,7 @@ queries = [
     "How much should I save monthly?",
     "Best way to plan retirement?"
 ]
+import asyncio
 import pytest
 from src.app import chat_endpoint
 from pydantic import BaseModel
@@ -34,7 +35,7 @@ def test_chat_pipeline(query, persona):
     request = BaseModel.parse_obj({"query": query, "profile": persona})
     
     # Call the chatbot endpoint directly
-    response = chat_endpoint(request)
+    response = asyncio.run(chat_endpoint(request))
 
     # 1️⃣ Basic response exists
     assert "answer" in response.__dict__
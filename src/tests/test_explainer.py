@@ -0,0 +1,25 @@
+from src.calculator import calculate
+from src.explainer import render_explanation
+
+
+def test_short_horizon_goal_avoids_equity():
+    result = calculate("I want to save 5,00,000. I can save 25,000 monthly. How long?")
+    text = render_explanation(result, {"risk": "high"})
+
+    assert result["type"] == "time_to_save"
+    assert "20.0 months" in text
+    assert "out of equity" in text
+    assert "risk" not in text.lower()
+
+
+def test_emi_variant_follows_affordability():
+    risky = render_explanation(calculate("Can I afford 30000 EMI on 60000 salary?"))
+    fine = render_explanation(calculate("Can I afford 15000 EMI on 60000 salary?"))
+
+    assert "above the recommended 40%" in risky
+    assert "within the recommended limit" in fine
+    assert "You could also ask:" in fine
+
+
+def test_unknown_type_returns_none():
+    assert render_explanation({"type": "unknown"}) is None
@@ -0,0 +1,49 @@
+import src.realtime as realtime
+from src.fd_rates import build_batch_prompt, extract_json, parse_rate_table
+from src.llm_scheduler import PRIORITY_INTERACTIVE
+from src.tests.test_quotes import make_fetcher
+
+FENCED = """Here are the rates:
+```json
+[
+  {"bank": "SBI", "1yr": "6.80%", "2yr": 7.0, "5yr": "6.50 % p.a."},
+  {"bank": "hdfc", "1yr": 6.6, "2yr": null, "5yr": 7.0},
+  {"bank": "axis", "1yr": null, "2yr": null, "5yr": null}
+]
+```"""
+
+
+def test_extract_json_handles_fences_and_prose():
+    assert extract_json('```json\n{"bank": "sbi"}\n```') == {"bank": "sbi"}
+    assert extract_json('Sure! [{"bank": "sbi"}] Hope this helps.') == [{"bank": "sbi"}]
+    assert extract_json("not json") is None
+
+
+def test_parse_rate_table_types_rates_and_skips_empty_rows():
+    table = parse_rate_table(FENCED, ["sbi", "hdfc", "axis"])
+
+    assert set(table) == {"sbi", "hdfc"}
+    assert (table["sbi"]["1yr"], table["sbi"]["2yr"], table["sbi"]["5yr"]) == (6.8, 7.0, 6.5)
+    assert table["hdfc"]["2yr"] is None
+
+
+def test_batch_prompt_lists_every_bank():
+    prompt = build_batch_prompt(["hdfc", "sbi"])
+    assert "hdfc, sbi" in prompt
+
+
+def test_unparsed_answers_keep_raw_text_and_are_not_refetched(monkeypatch):
+    fetcher = make_fetcher(monkeypatch)
+    calls = []
+
+    def fake_call_llm(messages, priority=None, caller=None):
+        calls.append(priority)
+        return "SBI offers around 6.8% for one year."
+
+    monkeypatch.setattr(realtime, "call_llm", fake_call_llm)
+    row = fetcher.fetch_fd_rates(("sbi",))[0]
+    assert row["rates_raw"] == "SBI offers around 6.8% for one year."
+
+    fetcher.fetch_fd_rates(("sbi",))
+    assert calls == [PRIORITY_INTERACTIVE]  # the request's own miss; the failure is cached briefly
+    assert fetcher.fd_cache.stats()["negative_hits"] == 1
@@ -0,0 +1,57 @@
+import faiss
+import numpy as np
+import pytest
+
+import src.retriever as retriever_module
+from src.ann import build_ann_index, save_index_config
+from src.chunk_store import write_chunk_store
+from src.retriever import Retriever
+
+
+class NoModel:
+    def __init__(self, name):
+        pass
+
+
+def make_retriever(tmp_path, monkeypatch, kind, params):
+    """Index 3000 common chunks plus 8 rare ones far from every query."""
+    rng = np.random.default_rng(0)
+    common = rng.normal(size=(3000, 16)).astype("float32")
+    rare = rng.normal(loc=8.0, size=(8, 16)).astype("float32")  # far from every query
+    embeddings = np.vstack([common, rare])
+    index, params = build_ann_index(embeddings, kind, params)
+    faiss.write_index(index, str(tmp_path / "faiss.index"))
+    save_index_config(str(tmp_path), kind, params)
+    write_chunk_store(str(tmp_path), [
+        {"filename": "common.txt" if i < len(common) else "rare.txt", "chunk_id": i, "content": f"chunk {i}"}
+        for i in range(len(embeddings))
+    ])
+
+    monkeypatch.setattr(retriever_module, "SentenceTransformer", NoModel)
+    retriever = Retriever(index_dir=str(tmp_path), mode="vector")
+    queries = rng.normal(size=(4, 16)).astype("float32")
+    retriever.embed = lambda texts: queries[:len(texts)]
+    return retriever
+
+
+@pytest.mark.parametrize("kind, params", [
+    ("flat", None),
+    ("ivf", {"nlist": 64, "nprobe": 1}),
+    ("hnsw", {"M": 8, "ef_search": 16}),
+])
+def test_filtered_search_returns_top_k(tmp_path, monkeypatch, kind, params):
+    retriever = make_retriever(tmp_path, monkeypatch, kind, params)
+
+    results = retriever.retrieve_many(["q"] * 4, top_k=5, allowed_docs_per_query=[["rare.txt"]] * 4)
+    for hits in results:
+        assert len(hits) == 5
+        assert {h["source"] for h in hits} == {"rare.txt"}
+
+
+@pytest.mark.parametrize("kind", ["flat", "ivf"])
+def test_filter_naming_no_indexed_document_returns_nothing(tmp_path, monkeypatch, kind):
+    retriever = make_retriever(tmp_path, monkeypatch, kind, None)
+
+    assert retriever.retrieve("q", top_k=5, allowed_docs=["missing.txt"]) == []
+    results = retriever.retrieve_many(["q", "q"], top_k=5, allowed_docs_per_query=[["missing.txt"], None])
+    assert results[0] == [] and len(results[1]) == 5
@@ -0,0 +1,68 @@
+import asyncio
+from src.hedging import Hedger
+
+
+def _hedger(**kwargs):
+    hedger = Hedger(enabled=True, percentile=95, min_samples=5, **kwargs)
+    for _ in range(20):
+        hedger.latency.record(0.02)
+    hedger.latency.record(1.0)  # one slow outlier in the tail
+    return hedger
+
+
+def test_slow_call_is_hedged_and_loser_cancelled():
+    hedger = _hedger()
+    cancelled = []
+    delays = iter([1.0, 0.01])  # primary stalls, hedge is fast
+
+    async def call():
+        delay = next(delays)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            cancelled.append(delay)
+            raise
+        return delay
+
+    async def main():
+        result = await hedger.run(call)
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(main()) == 0.01
+    assert cancelled == [1.0]
+    stats = hedger.stats()
+    assert stats["decisions"]["hedge_won"]["count"] == 1
+    assert stats["extra_calls_total"] == 1
+    assert stats["saved_ms_total"] > 0
+
+
+def test_fast_call_is_not_hedged():
+    hedger = _hedger()
+    calls = []
+
+    async def call():
+        calls.append(1)
+        return "ok"
+
+    assert asyncio.run(hedger.run(call)) == "ok"
+    assert calls == [1]
+    assert hedger.stats()["decisions"] == {}
+
+
+def test_no_hedge_without_capacity_or_history():
+    busy = _hedger(can_hedge=lambda: False)
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return "ok"
+
+    assert asyncio.run(busy.run(slow)) == "ok"
+    assert calls == [1]
+    assert busy.stats()["decisions"]["hedge_skipped_no_capacity"]["count"] == 1
+
+    cold = Hedger(enabled=True, min_samples=5)
+    assert cold.threshold() is None
+    assert asyncio.run(cold.run(slow)) == "ok"
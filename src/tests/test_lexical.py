@@ -0,0 +1,104 @@
+import faiss
+import numpy as np
+import pytest
+
+import src.retriever as retriever_module
+from src.ann import build_ann_index, save_index_config
+from src.chunk_store import write_chunk_store
+from src.lexical import BM25Index, reciprocal_rank_fusion
+from src.retriever import RRF_K, Retriever
+
+CHUNKS = [
+    "A SIP invests a fixed amount in a mutual fund every month.",
+    "Section 80C lets you deduct up to 1.5 lakh for ELSS, PPF and life insurance.",
+    "An EMI is the fixed monthly payment on a loan.",
+    "The 50-30-20 rule splits income into needs, wants and savings.",
+    "A recurring deposit (RD) collects a fixed amount every month.",
+]
+
+
+class NoModel:
+    def __init__(self, name):
+        pass
+
+
+def test_exact_finance_token_ranks_its_chunk_first():
+    index = BM25Index.build(CHUNKS)
+    ids, scores = index.top("how much can I claim under 80C?", k=3)
+    assert ids[0] == 1
+    assert list(scores) == sorted(scores, reverse=True)
+
+    ids, _ = index.top("50-30-20 budget", k=3)
+    assert ids[0] == 3
+
+
+def test_top_skips_masked_and_zero_score_rows():
+    index = BM25Index.build(CHUNKS)
+    ids, _ = index.top("fixed amount every month", k=5)
+    assert {0, 4} <= set(ids.tolist())
+    assert 3 not in ids  # shares no term with the query
+
+    mask = np.ones(len(CHUNKS), dtype=bool)
+    mask[[0, 4]] = False
+    ids, scores = index.top("fixed amount every month", k=5, mask=mask)
+    assert not {0, 4} & set(ids.tolist())
+    assert (scores > 0).all()
+
+    assert len(index.top("cryptocurrency", k=5)[0]) == 0
+
+
+def test_save_load_roundtrip(tmp_path):
+    index = BM25Index.build(CHUNKS)
+    assert not BM25Index.exists(str(tmp_path))
+    index.save(str(tmp_path))
+    assert BM25Index.exists(str(tmp_path))
+
+    loaded = BM25Index.load(str(tmp_path))
+    assert loaded.terms == index.terms and loaded.n_docs == index.n_docs
+    for query in ["80C deduction", "RD every month", "emi on a loan"]:
+        np.testing.assert_array_equal(loaded.scores(query), index.scores(query))
+
+
+def test_rrf_disjoint_lists_interleave_by_rank():
+    fused = reciprocal_rank_fusion([["a", "b"], ["x", "y"]], k=60)
+    assert [doc for doc, _ in fused] == ["a", "x", "b", "y"]
+    assert fused[0][1] == pytest.approx(1 / 61)
+
+
+def test_rrf_overlap_outranks_single_list_hits():
+    fused = dict(reciprocal_rank_fusion([["a", "b", "c"], ["c", "d"]], k=60))
+    assert fused["c"] == pytest.approx(1 / 63 + 1 / 61)
+    assert max(fused, key=fused.get) == "c"
+    assert fused["a"] > fused["b"] == fused["d"]
+
+
+def test_collect_hybrid_fuses_vector_and_lexical_hits(tmp_path, monkeypatch):
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(len(CHUNKS), 8)).astype("float32")
+    index, params = build_ann_index(embeddings, "flat")
+    faiss.write_index(index, str(tmp_path / "faiss.index"))
+    save_index_config(str(tmp_path), "flat", params)
+    write_chunk_store(str(tmp_path), [
+        {"filename": f"doc{i}.txt", "chunk_id": 0, "content": text} for i, text in enumerate(CHUNKS)
+    ])
+
+    monkeypatch.setattr(retriever_module, "SentenceTransformer", NoModel)
+    retriever = Retriever(index_dir=str(tmp_path), mode="hybrid")
+
+    # FAISS found chunks 0 and 2; only BM25 knows about 80C
+    distances = np.array([0.5, 0.9], dtype="float32")
+    indices = np.array([0, 2])
+    hits = retriever._collect_hybrid("80C limit", distances, indices, top_k=3, fetch_k=4, mask=None)
+
+    expected = reciprocal_rank_fusion([[0, 2], [1]], k=RRF_K)[:3]
+    assert [h["source"] for h in hits] == [f"doc{i}.txt" for i, _ in expected]
+    assert [h["rrf_score"] for h in hits] == [score for _, score in expected]
+    by_source = {h["source"]: h for h in hits}
+    assert by_source["doc1.txt"]["score"] is None and by_source["doc1.txt"]["lexical_score"] > 0
+    assert by_source["doc0.txt"]["score"] == pytest.approx(0.5)
+    assert by_source["doc2.txt"]["lexical_score"] == 0.0
+
+    mask = np.ones(len(CHUNKS), dtype=bool)
+    mask[1] = False
+    hits = retriever._collect_hybrid("80C limit", distances, indices, top_k=3, fetch_k=4, mask=mask)
+    assert [h["source"] for h in hits] == ["doc0.txt", "doc2.txt"]
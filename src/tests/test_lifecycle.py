@@ -0,0 +1,70 @@
+import json
+import threading
+import time
+
+import src.app as app
+from src.lifecycle import Lifecycle
+
+
+def test_concurrent_first_use_loads_once():
+    calls = []
+
+    def factory():
+        calls.append(threading.get_ident())
+        time.sleep(0.05)
+        return object()
+
+    component = Lifecycle().register("slow", factory)
+    start = threading.Barrier(8)
+    values = []
+
+    def use():
+        start.wait()
+        values.append(component.get())
+
+    threads = [threading.Thread(target=use) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert len(values) == 8 and all(v is values[0] for v in values)
+    assert component.ready and component.load_seconds is not None
+
+
+def test_failed_load_is_retried_on_next_use():
+    attempts = []
+
+    def factory():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("index missing")
+        return "loaded"
+
+    component = Lifecycle().register("flaky", factory)
+    assert not component.warm()
+    assert component.status()["error"] == "RuntimeError: index missing"
+    assert component.get() == "loaded" and component.error is None
+
+
+def test_readyz_is_503_until_required_components_warm(monkeypatch):
+    lifecycle = Lifecycle()
+    release = threading.Event()
+    lifecycle.register("retriever", lambda: release.wait(5))
+    lifecycle.register("mongo", lambda: None, required=False)
+    monkeypatch.setattr(app, "lifecycle", lifecycle)
+
+    response = app.readiness()
+    assert response.status_code == 503
+    assert json.loads(response.body)["ready"] is False
+
+    warm = lifecycle.warm_in_background()
+    release.set()
+    warm.join(5)
+
+    response = app.readiness()
+    body = json.loads(response.body)
+    assert response.status_code == 200
+    assert body["ready"] is True and body["cold_start_seconds"] is not None
+    assert set(body["components"]) == {"retriever", "mongo"}
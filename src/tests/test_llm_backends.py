@@ -0,0 +1,27 @@
+import asyncio
+from src.llm import call_llm, acall_llm, stream_llm, FALLBACK_RESPONSE
+from src.llm_backends import StubBackend, get_backend, set_backend
+
+
+def test_stub_backend_is_selected_and_echoes():
+    set_backend(StubBackend(mode="echo", latency_ms=0, jitter_ms=0))
+    assert get_backend().name == "stub"
+
+    assert call_llm([{"role": "user", "content": "What is an SIP?"}]) == "ECHO: What is an SIP?"
+    assert asyncio.run(acall_llm([{"role": "user", "content": "hi"}])) == "ECHO: hi"
+    assert "".join(stream_llm([{"role": "user", "content": "a b c"}])) == "ECHO: a b c"
+
+
+def test_stub_backend_is_deterministic():
+    messages = [{"role": "user", "content": "Is equity suitable for me?"}]
+    a = StubBackend(mode="canned", latency_ms=200, jitter_ms=50, seed=7)
+    b = StubBackend(mode="canned", latency_ms=200, jitter_ms=50, seed=7)
+
+    assert a.respond(messages) == b.respond(messages)
+    assert [a.sample_latency() for _ in range(20)] == [b.sample_latency() for _ in range(20)]
+
+
+def test_stub_latency_respects_timeout():
+    set_backend(StubBackend(mode="echo", latency_ms=5000, jitter_ms=0, dist="fixed"))
+    assert asyncio.run(acall_llm([{"role": "user", "content": "slow"}], timeout=0.05)) == FALLBACK_RESPONSE
+    assert call_llm([{"role": "user", "content": "slow"}], timeout=0.05) == FALLBACK_RESPONSE
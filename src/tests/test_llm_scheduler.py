@@ -0,0 +1,84 @@
+import asyncio
+import threading
+import time
+import pytest
+from src.llm_scheduler import LLMScheduler, LLMOverloaded, PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
+
+
+def test_interactive_calls_run_before_queued_background_calls():
+    scheduler = LLMScheduler(max_concurrency=1, max_queue=10)
+    order = []
+
+    def call(name, priority):
+        with scheduler.slot(priority):
+            order.append(name)
+            time.sleep(0.02)
+
+    blocker = threading.Thread(target=call, args=("first", PRIORITY_INTERACTIVE))
+    blocker.start()
+    time.sleep(0.01)
+    threads = [threading.Thread(target=call, args=("background", PRIORITY_BACKGROUND))]
+    threads[0].start()
+    time.sleep(0.005)
+    threads.append(threading.Thread(target=call, args=("interactive", PRIORITY_INTERACTIVE)))
+    threads[1].start()
+    for t in [blocker] + threads:
+        t.join()
+
+    assert order == ["first", "interactive", "background"]
+    assert scheduler.stats()["by_priority"]["background"]["wait_p50_ms"] > 0
+
+
+def test_full_queue_rejects_or_displaces_background_work():
+    scheduler = LLMScheduler(max_concurrency=1, max_queue=1)
+
+    async def main():
+        async def hold(priority, seconds=0.05):
+            async with scheduler.aslot(priority):
+                await asyncio.sleep(seconds)
+            return "ok"
+
+        running = asyncio.ensure_future(hold(PRIORITY_INTERACTIVE))
+        await asyncio.sleep(0.01)
+        background = asyncio.ensure_future(hold(PRIORITY_BACKGROUND))
+        await asyncio.sleep(0.01)
+
+        # Queue full of background work: interactive request takes its place
+        interactive = asyncio.ensure_future(hold(PRIORITY_INTERACTIVE))
+        await asyncio.sleep(0.01)
+        # Queue full of interactive work: newcomer is rejected at once
+        with pytest.raises(LLMOverloaded):
+            await hold(PRIORITY_INTERACTIVE)
+        with pytest.raises(LLMOverloaded):
+            await background
+        return await asyncio.gather(running, interactive)
+
+    assert asyncio.run(main()) == ["ok", "ok"]
+    stats = scheduler.stats()["by_priority"]
+    assert stats["background"]["rejected"] == 1
+    assert stats["interactive"]["rejected"] == 1
+
+
+def test_waiters_past_their_deadline_are_dropped():
+    scheduler = LLMScheduler(max_concurrency=1)
+
+    with scheduler.slot():
+        with pytest.raises(LLMOverloaded):
+            with scheduler.slot(deadline=time.monotonic() + 0.02):
+                pass
+
+    assert scheduler.stats()["by_priority"]["interactive"]["dropped_deadline"] == 1
+    assert scheduler.stats()["queue_depth"] == 0
+    with scheduler.slot(deadline=time.monotonic() + 1):
+        pass
+
+
+def test_token_budget_delays_calls_until_the_bucket_refills():
+    scheduler = LLMScheduler(max_concurrency=10, tokens_per_minute=6000)  # 100 tokens/s
+
+    with scheduler.slot(tokens=6000):
+        pass
+    start = time.monotonic()
+    with scheduler.slot(tokens=10, deadline=time.monotonic() + 2):
+        pass
+    assert 0.05 <= time.monotonic() - start < 1.0
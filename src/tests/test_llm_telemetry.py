@@ -0,0 +1,38 @@
+import asyncio
+import json
+
+from src.llm import call_llm, acall_llm, stream_llm, llm_telemetry
+from src.llm_backends import StubBackend, set_backend
+from src.llm_telemetry import LLMTelemetry
+
+
+def test_calls_are_recorded_with_caller_and_outcome():
+    set_backend(StubBackend(mode="echo", latency_ms=0, jitter_ms=0))
+    call_llm([{"role": "user", "content": "What is an SIP?"}], caller="calc_explanation")
+    list(stream_llm([{"role": "user", "content": "a b c"}], caller="fallback"))
+
+    set_backend(StubBackend(mode="echo", latency_ms=5000, jitter_ms=0, dist="fixed"))
+    asyncio.run(acall_llm([{"role": "user", "content": "slow"}], timeout=0.05, caller="fd_rates"))
+
+    calc, stream, slow = llm_telemetry.recent(3)
+    assert (calc["caller"], calc["mode"], calc["outcome"], calc["model"]) == ("calc_explanation", "call", "ok", "stub")
+    assert calc["prompt_tokens"] > 0 and calc["completion_tokens"] > 0
+    assert calc["queue_ms"] is not None and not calc["coalesced"]
+    assert stream["first_token_ms"] is not None
+    assert (slow["caller"], slow["outcome"], slow["error"]) == ("fd_rates", "timeout", "TimeoutError")
+
+    by_caller = llm_telemetry.stats()["by_caller"]
+    assert by_caller["fd_rates"]["outcomes"]["timeout"] >= 1
+
+
+def test_jsonl_sink_and_histogram(tmp_path):
+    path = tmp_path / "llm.jsonl"
+    telemetry = LLMTelemetry(maxlen=10, jsonl_path=str(path))
+    for wall in (50, 300, 40000):
+        telemetry.record(caller="chat", outcome="ok", wall_ms=wall)
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["wall_ms"] for line in lines] == [50, 300, 40000]
+
+    hist = telemetry.stats()["overall"]["wall_ms_histogram"]
+    assert (hist["le_100"], hist["le_500"], hist["inf"]) == (1, 1, 1)
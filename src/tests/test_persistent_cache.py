@@ -0,0 +1,41 @@
+import time
+
+from src.amfi import NAVStore
+from src.persistent_cache import SQLiteCache, SQLiteStore
+from src.tests.nav_fixtures import FakeSession
+
+
+def test_entries_are_shared_between_connections_and_namespaced(tmp_path):
+    path = str(tmp_path / "realtime.sqlite3")
+    quotes = SQLiteStore(SQLiteCache(path), "quotes", retention=60)
+    now = time.time()
+    quotes.put("TCS", {"symbol": "TCS", "price": 3500.5}, now)
+
+    other_worker = SQLiteCache(path)  # e.g. a second uvicorn worker, or after a restart
+    value, fetched_at = SQLiteStore(other_worker, "quotes", retention=60).get("TCS")
+    assert (value["price"], fetched_at) == (3500.5, now)
+    assert SQLiteStore(other_worker, "fd_rates", retention=60).get("TCS") is None
+    assert other_worker._connect().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_entries_past_retention_are_ignored_and_purged(tmp_path):
+    db = SQLiteCache(str(tmp_path / "realtime.sqlite3"))
+    store = SQLiteStore(db, "quotes", retention=60)
+    store.put("OLD", {"price": 1.0}, 1000.0)  # expired long ago
+
+    assert store.get("OLD") is None
+    db.purge()
+    assert db.stats()["entries"] == {}
+
+
+def test_nav_store_warms_from_a_previous_download(tmp_path):
+    store = SQLiteStore(SQLiteCache(str(tmp_path / "realtime.sqlite3")), "amfi_nav", retention=3600)
+    first = NAVStore(FakeSession(), store=store)
+    first.get()
+
+    restarted = NAVStore(FakeSession(), store=store)
+    table = restarted.get()
+    assert restarted.session.calls == 0
+    assert restarted.loaded_from == "store"
+    assert restarted.freshness(table)["state"] == "fresh"
+    assert table.row(table.find("120465"))["nav"] == 58.12
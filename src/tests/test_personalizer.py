@@ -0,0 +1,51 @@
+from src.personalizer import make_chat_messages, make_prompt, select_excerpts
+from src.token_count import count_tokens
+
+DOCS = [
+    {"content": "An SIP invests a fixed amount every month. It averages your purchase cost. Start early.",
+     "source": "sip_basics.txt", "chunk_id": 0},
+    {"content": "An SIP invests a fixed amount every month. It averages your purchase cost. Start early.",
+     "source": "sip_basics.txt", "chunk_id": 0},
+    {"content": "Equity is ownership in a company. It averages your purchase cost. Returns vary.",
+     "source": "equity_basics.txt", "chunk_id": 3},
+]
+
+
+def test_select_excerpts_dedupes_chunks_and_sentences():
+    excerpts = select_excerpts(DOCS, budget=1000)
+
+    assert len(excerpts) == 2
+    assert excerpts[1] == "- Equity is ownership in a company. Returns vary. [source: equity_basics.txt]"
+
+
+def test_select_excerpts_trims_lower_ranked_chunks_at_sentence_boundaries():
+    full = select_excerpts(DOCS, budget=1000)
+    budget = count_tokens(full[0]) + 3
+    excerpts = select_excerpts(DOCS, budget=budget)
+
+    assert excerpts == [full[0]]
+    assert sum(count_tokens(e) for e in excerpts) <= budget
+
+
+def test_prompt_respects_intent_budget():
+    long_docs = [{"content": " ".join(f"Point {j} of note {i} on diversification." for j in range(100)),
+                  "source": f"doc{i}.txt", "chunk_id": i} for i in range(3)]
+    prompt = make_prompt("How should I invest?", long_docs, {}, budget=300)
+    assert 250 <= count_tokens(prompt) <= 300
+    assert "[source: doc0.txt]" in prompt and "doc1.txt" not in prompt
+
+    messages = make_chat_messages("How should I invest?", long_docs, {}, intent="education")
+    assert [m["role"] for m in messages] == ["user"]
+
+
+def test_select_excerpts_truncates_an_oversized_top_chunk():
+    docs = [
+        {"content": " ".join(f"word{i}" for i in range(400)) + ". Short tail.", "source": "best.txt", "chunk_id": 0},
+        {"content": "A tiny lower-ranked note.", "source": "other.txt", "chunk_id": 0},
+    ]
+    budget = 60
+    excerpts = select_excerpts(docs, budget=budget)
+
+    assert len(excerpts) == 1
+    assert excerpts[0].startswith("- word0 word1") and excerpts[0].endswith("... [source: best.txt]")
+    assert count_tokens(excerpts[0]) <= budget
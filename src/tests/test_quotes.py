@@ -0,0 +1,79 @@
+import time
+
+import pandas as pd
+
+import src.persistent_cache as persistent_cache
+import src.realtime as realtime
+from src.realtime import RealtimeFetcher
+
+NSE_PRICES = {"TCS": 4100.5, "INFY": 1850.0}
+
+
+class FakeResponse:
+    def __init__(self, symbol):
+        self.status_code = 200 if symbol in NSE_PRICES else 404
+        self.symbol = symbol
+
+    def json(self):
+        return {"priceInfo": {"lastPrice": NSE_PRICES[self.symbol]}}
+
+
+class FakeSession:
+    def __init__(self):
+        self.urls = []
+
+    def get(self, url, timeout=None):
+        self.urls.append(url)
+        return FakeResponse(url.rsplit("=", 1)[-1])
+
+
+def make_fetcher(monkeypatch):
+    monkeypatch.setattr(RealtimeFetcher, "_bootstrap_session", lambda self: None)
+    monkeypatch.setattr(realtime, "AMFI_BACKGROUND_REFRESH", False)
+    monkeypatch.setattr(persistent_cache, "REALTIME_CACHE", "memory")
+    fetcher = RealtimeFetcher()
+    fetcher.session = FakeSession()
+    return fetcher
+
+
+def test_fetch_quotes_batches_nse_misses_into_one_download(monkeypatch):
+    fetcher = make_fetcher(monkeypatch)
+    downloads = []
+
+    def fake_download(tickers, **kwargs):
+        downloads.append(list(tickers))
+        columns = pd.MultiIndex.from_product([tickers, ["Close"]])
+        return pd.DataFrame([[480.0, 95.0], [482.25, float("nan")]], columns=columns)
+
+    monkeypatch.setattr(realtime.yf, "download", fake_download)
+    quotes = fetcher.fetch_quotes(["tcs", "WIPRO", "INFY", "TCS", "ITC"])
+
+    assert [q["ticker"] for q in quotes] == ["TCS", "WIPRO", "INFY", "ITC"]
+    assert [q["source"] for q in quotes] == ["nseindia", "yfinance", "nseindia", "yfinance"]
+    assert (quotes[1]["price"], quotes[3]["price"]) == (482.25, 95.0)
+    assert downloads == [["WIPRO.NS", "ITC.NS"]]
+
+
+def test_quotes_share_cache_entries_with_fetch_stock_price(monkeypatch):
+    fetcher = make_fetcher(monkeypatch)
+    fetcher.fetch_quotes(["TCS"])
+    calls = len(fetcher.session.urls)
+
+    assert fetcher.fetch_stock_price("tcs")["freshness"]["state"] == "fresh"
+    assert fetcher.fetch_quotes(["TCS", "INFY"])[1]["freshness"]["state"] == "live"
+    assert len(fetcher.session.urls) == calls + 1  # only INFY went upstream
+
+
+def test_failed_refresh_keeps_the_last_good_quote(monkeypatch):
+    fetcher = make_fetcher(monkeypatch)
+    monkeypatch.setattr(realtime.yf, "download", lambda tickers, **kwargs: pd.DataFrame())
+    fetcher.quote_cache.store.put("ITC", fetcher._quote("ITC", 100.0, "nseindia"),
+                                  time.time() - realtime.STOCK_CACHE_TTL - 1)
+
+    assert fetcher.fetch_stock_price("ITC")["price"] == 100.0  # stale; refresh fails upstream
+    while fetcher.quote_cache.stats()["refreshing"]:
+        time.sleep(0.01)
+
+    quote = fetcher.fetch_stock_price("ITC")
+    assert (quote["price"], quote["freshness"]["state"]) == (100.0, "stale")
+    assert fetcher.quote_cache.stats()["background_refreshes"] == 1  # not retried on every read
@@ -0,0 +1,63 @@
+import numpy as np
+from src.response_cache import SemanticResponseCache, normalize_query
+
+
+def vec(*values):
+    return np.array(values, dtype="float32")
+
+
+def embed(text):
+    """Bag-of-words stand-in for the sentence embedder."""
+    vocab = ["sip", "elss", "tax", "start", "how"]
+    words = text.split()
+    return np.array([words.count(w) for w in vocab] + [1e-3], dtype="float32")
+
+
+def test_hit_above_threshold_within_same_intent():
+    cache = SemanticResponseCache(threshold=0.9)
+    cache.put(vec(1, 0, 0), "education", "SIP answer", ["sip_basics.txt"], ["sip_basics.txt"])
+
+    hit = cache.get(vec(0.95, 0.05, 0), "education", ["sip_basics.txt"])
+    assert hit["answer"] == "SIP answer"
+    assert cache.get(vec(0, 1, 0), "education", ["sip_basics.txt"]) is None
+    assert cache.get(vec(1, 0, 0), "planning", ["sip_basics.txt"]) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+
+def test_paraphrases_hit_across_sessions():
+    cache = SemanticResponseCache()
+    question = "What is an SIP?"
+    cache.put(embed(normalize_query(question)), "education", "SIP answer", ["sip_basics.txt"],
+              ["sip_basics.txt", "sip_basics.txt", "mutual_funds.txt"], {})
+
+    # Paraphrases retrieve the same documents in another order / mix
+    for paraphrase in ("what is sip", "Explain SIP please"):
+        hit = cache.get(embed(normalize_query(paraphrase)), "education", ["mutual_funds.txt", "sip_basics.txt"], {})
+        assert hit is not None and hit["answer"] == "SIP answer"
+    assert cache.get(embed(normalize_query("how to start sip")), "education", ["sip_basics.txt"]) is None
+    assert cache.stats()["hit_rate"] == 2 / 3
+
+
+def test_different_context_or_sources_never_share_answers():
+    cache = SemanticResponseCache(threshold=0.5)
+    cache.put(vec(1, 0), "education", "answer", ["a.txt"], ["a.txt"], {})
+
+    assert cache.get(vec(1, 0), "education", ["b.txt"], {}) is None
+    assert cache.get(vec(1, 0), "education", ["a.txt"], {"age": "30"}) is None
+    assert cache.stats()["source_mismatches"] == 2
+
+
+def test_lru_eviction_and_ttl(monkeypatch):
+    cache = SemanticResponseCache(threshold=0.9, ttl=10, maxsize=2)
+    cache.put(vec(1, 0, 0), "education", "a", [], [])
+    cache.put(vec(0, 1, 0), "education", "b", [], [])
+    cache.get(vec(1, 0, 0), "education", [])  # touch "a" so "b" is least recently used
+    cache.put(vec(0, 0, 1), "education", "c", [], [])
+
+    assert cache.get(vec(0, 1, 0), "education", []) is None
+    assert cache.stats()["evictions"] == 1
+
+    now = __import__("time").monotonic()
+    monkeypatch.setattr("src.response_cache.time.monotonic", lambda: now + 60)
+    assert cache.get(vec(1, 0, 0), "education", []) is None
+    assert cache.stats()["expirations"] == 2
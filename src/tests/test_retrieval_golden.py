@@ -0,0 +1,30 @@
+import json
+from src.intent_classifier import get_allowed_docs
+
+GOLDEN_PATH = "benchmarks/retrieval_golden.json"
+METADATA_PATH = "index/metadata.json"
+
+
+def load_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_golden_hits_exist_in_index():
+    chunks = {(m["filename"], m["chunk_id"]) for m in load_json(METADATA_PATH)}
+    for q in load_json(GOLDEN_PATH)["queries"]:
+        for filename, chunk_id in q["expected"]:
+            assert (filename, chunk_id) in chunks, q["query"]
+
+
+def test_golden_hits_reachable_under_intent_filter():
+    for q in load_json(GOLDEN_PATH)["queries"]:
+        allowed = get_allowed_docs(q["intent"])
+        for filename, _ in q["expected"]:
+            assert filename in allowed, q["query"]
+
+
+def test_golden_covers_every_data_file():
+    files = {m["filename"] for m in load_json(METADATA_PATH)}
+    covered = {hit[0] for q in load_json(GOLDEN_PATH)["queries"] for hit in q["expected"]}
+    assert covered == files
@@ -0,0 +1,96 @@
+import faiss
+import numpy as np
+import pytest
+
+import src.retriever as retriever_module
+from src.ann import build_ann_index, save_index_config
+from src.chunk_store import write_chunk_store
+from src.retriever import EmbeddingCache, Retriever
+
+
+class CountingModel:
+    """Deterministic stand-in for SentenceTransformer that records encode calls."""
+
+    calls = []
+
+    def __init__(self, name):
+        CountingModel.calls = []
+
+    def encode(self, texts, batch_size=None):
+        CountingModel.calls.append(list(texts))
+        return np.array([[len(t), sum(map(ord, t)) % 97, t.count(" "), 1.0] for t in texts], dtype="float32")
+
+
+def make_retriever(tmp_path, monkeypatch):
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(40, 4)).astype("float32")
+    index, params = build_ann_index(embeddings, "flat")
+    faiss.write_index(index, str(tmp_path / "faiss.index"))
+    save_index_config(str(tmp_path), "flat", params)
+    write_chunk_store(str(tmp_path), [
+        {"filename": f"doc{i // 10}.txt", "chunk_id": i % 10, "content": f"chunk {i}"} for i in range(40)
+    ])
+    monkeypatch.setattr(retriever_module, "SentenceTransformer", CountingModel)
+    return Retriever(index_dir=str(tmp_path), mode="vector")
+
+
+def test_cache_counts_hits_misses_and_evicts_least_recently_used():
+    cache = EmbeddingCache(maxsize=2)
+    a, b, c = (EmbeddingCache.make_key("m", q) for q in ["a", "b", "c"])
+
+    assert cache.get(a) is None
+    cache.put(a, [1.0])
+    cache.put(b, [2.0])
+    assert cache.get(a)[0] == 1.0  # a is now more recent than b
+    cache.put(c, [3.0])
+
+    assert cache.get(b) is None
+    assert cache.get(a) is not None and cache.get(c) is not None
+    assert cache.stats() == {
+        "size": 2, "maxsize": 2, "hits": 3, "misses": 2, "evictions": 1, "hit_rate": 0.6,
+    }
+
+
+def test_cache_key_ignores_case_and_whitespace():
+    assert EmbeddingCache.make_key("m", "  What is  SIP? ") == EmbeddingCache.make_key("m", "what is sip?")
+    assert EmbeddingCache.make_key("m", "sip") != EmbeddingCache.make_key("other", "sip")
+
+
+def test_embed_encodes_each_distinct_query_once(tmp_path, monkeypatch):
+    retriever = make_retriever(tmp_path, monkeypatch)
+
+    embs = retriever.embed(["What is SIP?", "what is  sip?", "EMI meaning"])
+    assert CountingModel.calls == [["What is SIP?", "EMI meaning"]]
+    np.testing.assert_array_equal(embs[0], embs[1])
+
+    again = retriever.embed(["what is sip?", "EMI meaning", "RD rules"])
+    assert CountingModel.calls[1:] == [["RD rules"]]
+    np.testing.assert_array_equal(again[:2], embs[[0, 2]])
+    stats = retriever.embedding_cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (2, 4, 3)
+
+
+def test_retrieve_many_matches_retrieve_per_query(tmp_path, monkeypatch):
+    retriever = make_retriever(tmp_path, monkeypatch)
+    queries = ["what is sip", "emi on a home loan", "rd vs fd", "tax saving under 80c"]
+    filters = [None, ["doc1.txt"], ["doc2.txt", "doc3.txt"], ["doc1.txt"]]
+
+    batched = retriever.retrieve_many(queries, top_k=4, allowed_docs_per_query=filters)
+    single = [retriever.retrieve(q, top_k=4, allowed_docs=f) for q, f in zip(queries, filters)]
+
+    assert batched == single
+    assert {h["source"] for h in batched[1]} == {"doc1.txt"}
+    assert {h["source"] for h in batched[2]} <= {"doc2.txt", "doc3.txt"}
+    assert all(len(hits) == 4 for hits in batched)
+
+
+def test_retrieve_many_rejects_mismatched_filters(tmp_path, monkeypatch):
+    retriever = make_retriever(tmp_path, monkeypatch)
+    with pytest.raises(ValueError):
+        retriever.retrieve_many(["a", "b"], allowed_docs_per_query=[None])
+
+
+def test_retrieve_many_with_no_queries_returns_empty(tmp_path, monkeypatch):
+    retriever = make_retriever(tmp_path, monkeypatch)
+    assert retriever.retrieve_many([]) == []
+    assert CountingModel.calls == []
@@ -0,0 +1,35 @@
+import src.app as app
+
+
+class FakeFetcher:
+    def __init__(self):
+        self.calls = []
+
+    def get(self):
+        return self
+
+    def fetch_quotes(self, tickers):
+        self.calls.append(("quotes", tickers))
+        return [{"ticker": t} for t in tickers]
+
+    def fetch_mf_nav(self, scheme):
+        self.calls.append(("nav", scheme))
+        return {"scheme_code": "120465", "scheme_name": scheme}
+
+
+def route(monkeypatch, query):
+    fetcher = FakeFetcher()
+    monkeypatch.setattr(app, "fetcher", fetcher)
+    app.try_realtime(query)
+    return [kind for kind, _ in fetcher.calls]
+
+
+def test_stock_questions_still_get_quotes(monkeypatch):
+    assert route(monkeypatch, "compare TCS, Infosys and Wipro") == ["quotes"]
+    assert route(monkeypatch, "share price of axis bank") == ["quotes"]
+
+
+def test_scheme_names_are_not_routed_to_bank_stocks(monkeypatch):
+    assert route(monkeypatch, "compare axis bluechip fund and sbi small cap") == ["nav"]
+    assert route(monkeypatch, "price of hdfc flexi cap") == ["nav"]
+    assert route(monkeypatch, "quote for icici prudential nifty index direct growth") == ["nav"]
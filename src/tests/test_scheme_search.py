@@ -0,0 +1,41 @@
+from src.scheme_search import SchemeIndex, clean_query
+
+NAMES = [
+    "Axis Bluechip Fund - Regular Plan - IDCW",
+    "Axis Bluechip Fund - Regular Plan - Growth",
+    "Axis Bluechip Fund - Direct Plan - Growth",
+    "Axis Midcap Fund - Direct Plan - Growth",
+    "HDFC Midcap Opportunities Fund - Direct Plan - Growth",
+    "HDFC Large Cap Fund - Direct Plan - Growth",
+    "SBI Small Cap Fund - Direct Plan - IDCW",
+    "SBI Small Cap Fund - Direct Plan - Growth",
+    "Parag Parikh Flexi Cap Fund - Regular Plan - Growth",
+    "ICICI Prudential Liquid Fund - Direct Plan - Growth",
+]
+INDEX = SchemeIndex.build(NAMES)
+
+
+def best(query):
+    row = INDEX.best(clean_query(query))
+    return NAMES[row] if row is not None else None
+
+
+def test_question_words_are_stripped():
+    assert clean_query("What is the NAV of Axis Bluechip Fund?") == "axis bluechip fund"
+
+
+def test_name_queries_resolve_to_the_right_variant():
+    assert best("what is the nav of axis bluechip fund?") == "Axis Bluechip Fund - Direct Plan - Growth"
+    assert best("axis blue chip regular") == "Axis Bluechip Fund - Regular Plan - Growth"
+    assert best("axis bluechip regular idcw") == "Axis Bluechip Fund - Regular Plan - IDCW"
+    assert best("sbi smallcap dividend") == "SBI Small Cap Fund - Direct Plan - IDCW"
+    assert best("hdfc mid cap") == "HDFC Midcap Opportunities Fund - Direct Plan - Growth"
+
+
+def test_top_ranks_candidates_and_rejects_noise():
+    ids, scores = INDEX.top("axis bluechip", n=3)
+    assert [NAMES[i] for i in ids][0] == "Axis Bluechip Fund - Direct Plan - Growth"
+    assert all(NAMES[i].startswith("Axis Bluechip") for i in ids)
+    assert list(scores) == sorted(scores, reverse=True)
+
+    assert best("what is a mutual fund?") is None
@@ -0,0 +1,98 @@
+import asyncio
+import threading
+import time
+import pytest
+from src.singleflight import SingleFlight
+
+
+def test_concurrent_threads_share_one_call():
+    flight = SingleFlight()
+    calls = []
+    results = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.1)
+        return "answer"
+
+    threads = [threading.Thread(target=lambda: results.append(flight.do("k", slow))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == ["answer"] * 8
+    assert flight.stats()["coalesced"] == 7
+
+    # Finished calls are not cached
+    flight.do("k", slow)
+    assert len(calls) == 2
+
+
+def test_errors_are_shared_with_waiters():
+    flight = SingleFlight()
+
+    def boom():
+        time.sleep(0.05)
+        raise ValueError("upstream")
+
+    errors = []
+
+    def call():
+        try:
+            flight.do("k", boom)
+        except ValueError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == ["upstream"] * 3
+
+
+def test_async_callers_share_one_call_and_survive_a_cancelled_peer():
+    flight = SingleFlight()
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    async def main():
+        impatient = asyncio.ensure_future(flight.ado("k", slow))
+        patient = [asyncio.ensure_future(flight.ado("k", slow)) for _ in range(4)]
+        await asyncio.sleep(0.01)
+        impatient.cancel()
+        results = await asyncio.gather(*patient)
+        with pytest.raises(asyncio.CancelledError):
+            await impatient
+        return results
+
+    assert asyncio.run(main()) == ["answer"] * 4
+    assert len(calls) == 1
+    assert flight.stats()["coalesced"] == 4
+
+
+def test_upstream_task_cancelled_when_last_waiter_leaves():
+    flight = SingleFlight()
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(1)
+            raise
+
+    async def main():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(flight.ado("k", slow), 0.02)
+        await asyncio.sleep(0)
+
+    asyncio.run(main())
+    assert cancelled == [1]
+    assert flight.stats()["in_flight"] == 0
@@ -0,0 +1,113 @@
+import threading
+import time
+
+from src.swr_cache import SWRCache
+
+
+class Loader:
+    def __init__(self, delay=0.0):
+        self.calls = []
+        self.delay = delay
+        self.version = 0
+        self.background = []
+
+    def __call__(self, keys, background=False):
+        self.calls.append(sorted(keys))
+        self.background.append(background)
+        time.sleep(self.delay)
+        self.version += 1
+        return {k: {"key": k, "version": self.version} for k in keys if k != "unknown"}
+
+
+def test_serves_fresh_then_stale_while_refreshing_once():
+    load = Loader()
+    cache = SWRCache("test", load, ttl=0.05, grace=10, popular_hits=0)
+
+    first = cache.get_many(["a", "b", "unknown"])
+    assert first["a"]["freshness"]["state"] == "live"
+    assert "unknown" not in first
+    assert cache.get("a")["freshness"]["state"] == "fresh"
+
+    time.sleep(0.06)
+    load.delay = 0.1
+    stale = [cache.get("a") for _ in range(5)]
+    assert {s["freshness"]["state"] for s in stale} == {"stale"}
+    assert stale[0]["version"] == 1
+
+    time.sleep(0.2)
+    assert load.calls == [["a", "b", "unknown"], ["a"]]  # one background refresh for five stale reads
+    assert load.background == [False, True]
+    assert cache.get("a")["version"] == 2
+
+
+def test_concurrent_misses_share_one_load():
+    load = Loader(delay=0.05)
+    cache = SWRCache("test", load, ttl=10, grace=10, popular_hits=0)
+
+    threads = [threading.Thread(target=cache.get, args=("a",)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert load.calls == [["a"]]
+
+
+def test_overlapping_batches_load_each_key_once():
+    load = Loader(delay=0.2)
+    cache = SWRCache("test", load, ttl=10, grace=10, popular_hits=0)
+    results = {}
+
+    def fetch(keys):
+        results[tuple(keys)] = cache.get_many(keys)
+
+    threads = [threading.Thread(target=fetch, args=(keys,)) for keys in (["tcs", "infy"], ["infy", "wipro"])]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sum(call.count("infy") for call in load.calls) == 1
+    assert all("infy" in r for r in results.values())
+    assert cache.stats()["coalesced"] == 1
+
+
+def test_popular_keys_are_refreshed_before_they_expire():
+    load = Loader()
+    cache = SWRCache("test", load, ttl=1.0, grace=10, popular_hits=3, popular_window=60)
+    for _ in range(3):
+        cache.get("hot")
+    cache.get("cold")
+
+    time.sleep(1.6)
+    cache.stop()
+    assert load.calls[:2] == [["hot"], ["cold"]]
+    assert ["hot"] in load.calls[2:] and ["cold"] not in load.calls[2:]
+    assert cache.stats()["proactive_refreshes"] >= 1
+
+
+def test_failures_are_cached_briefly_and_never_replace_a_good_value():
+    load = Loader()
+    fail = {"on": True}
+
+    def flaky(keys, background=False):
+        if fail["on"]:
+            load.calls.append(sorted(keys))
+            return {k: {"key": k, "error": "upstream down"} for k in keys}
+        return load(keys, background)
+
+    cache = SWRCache("test", flaky, ttl=0.05, grace=10, popular_hits=0, negative_ttl=0.1,
+                     is_failure=lambda value: "error" in value)
+    assert cache.get("a")["error"] == "upstream down"
+    assert cache.get("a")["freshness"]["state"] == "fresh"  # negative entry, no second load
+    assert load.calls == [["a"]]
+
+    time.sleep(0.11)
+    fail["on"] = False
+    assert cache.get("a")["freshness"]["state"] == "live"  # retried after negative_ttl
+
+    time.sleep(0.06)
+    fail["on"] = True
+    assert cache.get("a")["version"] == 1  # stale; its background refresh fails
+    time.sleep(0.05)
+    assert cache.get("a")["version"] == 1 and "error" not in cache.get("a")
+    assert len(load.calls) == 3  # the failed refresh is not retried on every read
@@ -0,0 +1,48 @@
+"""
+Local token counting for prompt budgets.
+
+The default is a heuristic: 4 characters per token, or one token per word /
+punctuation mark, whichever is larger. tiktoken is an optional extra (it is
+not in requirements.txt, and it downloads its encoding file on first use);
+when it is installed and loadable, its cl100k_base encoding is used instead.
+Counts are estimates for budgeting and logging, not provider billing.
+"""
+
+import re
+from functools import lru_cache
+
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+WORD_RE = re.compile(r"\w+|[^\w\s]")
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    # Loaded on first use: tiktoken fetches the encoding file on a cold cache
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:  # not installed, or encoding unavailable offline
+        return None
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return max(len(text) // 4, len(WORD_RE.findall(text)), 1)
+
+
+@lru_cache(maxsize=32)
+def count_tokens_cached(text: str) -> int:
+    """count_tokens() for long static strings (system prompt, templates)."""
+    return count_tokens(text)
+
+
+def split_sentences(text: str) -> list:
+    return [s.strip() for s in SENTENCE_RE.split(text.strip()) if s.strip()]
+
+
+def tokenizer_name() -> str:
+    return "tiktoken:cl100k_base" if _encoding() is not None else "heuristic"